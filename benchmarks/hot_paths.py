@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Hot Path Benchmarks
+Throughput and peak memory of the toolkit's hot paths, gated against a
+stored baseline.
+
+Each case builds its input with ``synthetic`` (fixed seeds), runs once to
+warm caches, then reports the best of several timed runs and the peak
+traced (Python and NumPy) allocation of one more run. Times are divided
+by a fixed calibration workload run interleaved with each case, so a
+baseline recorded on one machine still gates runs on a faster or slower
+one, and a shared machine changing speed mid-run affects both alike.
+Exits non-zero when a case is slower or larger than its baseline by more
+than the threshold.
+
+Author: David Osisek (CFOt)
+"""
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple
+
+import click
+
+import synthetic
+
+from fiber_toolkit.capacity_planner import CapacityPlanner
+from fiber_toolkit.link_budget import LinkBudget
+from fiber_toolkit.loss_calculator import LossCalculator
+from fiber_toolkit.otdr_parser import OTDRParser, analyze_file
+from fiber_toolkit.wavelength import WavelengthCalculator
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+BASELINE_VERSION = 1
+
+SCALAR_INPUTS = ('tx_power', 'rx_sensitivity', 'fiber_length', 'wavelength', 'fiber_type',
+                 'connector_count', 'splice_count', 'safety_margin')
+
+
+class Case(NamedTuple):
+    """A benchmark: ``setup(items, workdir)`` returns the zero-argument call to time."""
+    name: str
+    items: int
+    unit: str
+    setup: Callable
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, items: int, unit: str):
+    """Register a setup function as a benchmark case of ``items`` units."""
+    def register(setup):
+        CASES.append(Case(name, items, unit, setup))
+        return setup
+    return register
+
+
+@case('link_budget.calculate', 20_000, 'links')
+def _link_budget_scalar(items, workdir):
+    links = synthetic.link_fleet(items)[list(SCALAR_INPUTS)].to_dict('records')
+    return lambda: [LinkBudget(**link).calculate() for link in links]
+
+
+@case('link_budget.calculate_batch', 200_000, 'links')
+def _link_budget_batch(items, workdir):
+    links = synthetic.link_fleet(items)
+    return lambda: LinkBudget.calculate_batch(links)
+
+
+@case('loss_calculator.scalar', 100_000, 'calls')
+def _loss_scalar(items, workdir):
+    def run():
+        for _ in range(items // 4):
+            LossCalculator.connector_loss('LC-UPC', 2)
+            LossCalculator.splice_loss('fusion', 4)
+            LossCalculator.fiber_attenuation('SM', 1310, 2.5)
+            LossCalculator.fiber_attenuation('MM-OM3', 850, 0.3)
+    return run
+
+
+@case('loss_calculator.bom_losses', 500_000, 'rows')
+def _loss_bom(items, workdir):
+    components = synthetic.component_bom(items)
+    return lambda: LossCalculator.bom_losses(components)
+
+
+@case('otdr.parse', 500, 'files')
+def _otdr_parse(items, workdir):
+    paths = synthetic.sor_directory(os.path.join(workdir, 'parse'), items)
+
+    def run():
+        for path in paths:
+            with OTDRParser(path) as parser:
+                parser.parse()
+    return run
+
+
+@case('otdr.analyze', 500, 'files')
+def _otdr_analyze(items, workdir):
+    paths = synthetic.sor_directory(os.path.join(workdir, 'analyze'), items)
+    return lambda: [analyze_file(path) for path in paths]
+
+
+@case('otdr.detect', 40, 'files')
+def _otdr_detect(items, workdir):
+    paths = synthetic.sor_directory(os.path.join(workdir, 'detect'), items, points=64_000)
+    return lambda: [analyze_file(path, detect=True) for path in paths]
+
+
+@case('wavelength.channel_sweep', 50_000, 'links')
+def _wavelength_sweep(items, workdir):
+    links = synthetic.link_fleet(items)
+    links = links[links['fiber_type'] == 'SM']
+    return lambda: WavelengthCalculator.channel_sweep(links, grid='cwdm')
+
+
+@case('wavelength.dispersion_reach', 200_000, 'links')
+def _wavelength_reach(items, workdir):
+    links = synthetic.link_fleet(items)
+    links['bit_rate'] = 10.0
+    links['spectral_width'] = 0.1
+    return lambda: WavelengthCalculator.dispersion_reach(links)
+
+
+@case('capacity.plan_campus', 5_000, 'nodes')
+def _capacity_campus(items, workdir):
+    nodes = synthetic.campus_topology(items)
+    return lambda: CapacityPlanner.plan_campus(nodes)
+
+
+@case('capacity.conduit_fill_batch', 100_000, 'conduits')
+def _capacity_conduits(items, workdir):
+    cables = synthetic.cable_inventory(items)
+    return lambda: CapacityPlanner.conduit_fill_batch(cables)
+
+
+def calibration() -> Callable:
+    """Fixed NumPy + interpreter workload whose time is the unit for timings."""
+    import numpy as np
+
+    values = np.random.default_rng(0).random(200_000)
+
+    def work():
+        # Sorting, array temporaries and a Python loop, like the cases
+        np.sort(values)
+        np.sqrt(values * 2.0 + 1.0).sum()
+        sum(i * i for i in range(40_000))
+
+    return work
+
+
+def best_time(run: Callable, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(run: Callable) -> float:
+    """Peak traced allocation (MB) during one call."""
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def measure(bench: Case, scale: float, repeat: int, workdir: str) -> Dict:
+    """Best time, calibration time next to it, throughput and peak memory of a case."""
+    items = max(1, int(bench.items * scale))
+    run = bench.setup(items, workdir)
+    unit = calibration()
+    run()  # warm-up: lazy imports, spectral tables, page cache
+    seconds = calibration_s = float('inf')
+    for _ in range(repeat):
+        calibration_s = min(calibration_s, best_time(unit, 3))
+        seconds = min(seconds, best_time(run, 1))
+    return {
+        'items': items,
+        'unit': bench.unit,
+        'seconds': seconds,
+        'calibration_s': calibration_s,
+        'items_per_s': items / seconds,
+        'peak_mb': peak_memory(run),
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float,
+            memory_threshold: float) -> Dict[str, str]:
+    """
+    Verdict per case: 'ok', 'FAIL ...', 'new' or 'skip ...'.
+
+    Times are compared in calibration units; memory is compared as is.
+    """
+    verdicts = {}
+    for name, result in results['cases'].items():
+        reference = baseline.get('cases', {}).get(name)
+        if reference is None:
+            verdicts[name] = 'new'
+            continue
+        if reference['items'] != result['items']:
+            verdicts[name] = f"skip (baseline has {reference['items']} {result['unit']})"
+            continue
+        slower = ((result['seconds'] / result['calibration_s'])
+                  / (reference['seconds'] / reference['calibration_s']) - 1.0)
+        larger = result['peak_mb'] / max(reference['peak_mb'], 1e-3) - 1.0
+        problems = []
+        if slower > threshold:
+            problems.append(f"{slower:+.0%} time")
+        if larger > memory_threshold and result['peak_mb'] - reference['peak_mb'] > 1.0:
+            problems.append(f"{larger:+.0%} memory")
+        verdicts[name] = f"FAIL {', '.join(problems)}" if problems else f"ok {slower:+.0%}"
+    return verdicts
+
+
+@click.command()
+@click.option('--only', multiple=True, help='Run cases whose name contains this (repeatable)')
+@click.option('--scale', type=click.FloatRange(min=0.001), default=1.0, show_default=True,
+              help='Multiply every case size (baseline checks need the same sizes)')
+@click.option('--repeat', type=click.IntRange(min=1), default=5, show_default=True,
+              help='Timed runs per case; the fastest counts')
+@click.option('--baseline', 'baseline_path', type=click.Path(dir_okay=False),
+              default=BASELINE, show_default=True)
+@click.option('--threshold', type=float, default=0.3, show_default=True,
+              help='Allowed slowdown against the baseline (0.3 = 30 %)')
+@click.option('--memory-threshold', type=float, default=0.25, show_default=True,
+              help='Allowed peak-memory growth against the baseline')
+@click.option('--update-baseline', is_flag=True,
+              help='Record these results as the baseline instead of checking')
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False),
+              help='Also write the results as JSON')
+@click.option('--list', 'list_cases', is_flag=True, help='List cases and exit')
+def main(only, scale, repeat, baseline_path, threshold, memory_threshold, update_baseline,
+         json_path, list_cases):
+    """Benchmark hot paths and fail on regressions against the baseline."""
+    selected = [bench for bench in CASES if not only or any(part in bench.name for part in only)]
+    if list_cases:
+        for bench in selected:
+            click.echo(f"{bench.name:32} {bench.items:>10} {bench.unit}")
+        return
+    if not selected:
+        raise click.UsageError("No case matches --only")
+
+    results = {
+        'version': BASELINE_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cases': {},
+    }
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for bench in selected:
+            result = measure(bench, scale, repeat, workdir)
+            results['cases'][bench.name] = result
+            if not update_baseline and baseline.get('version') == BASELINE_VERSION:
+                verdict = compare(results, baseline, threshold, memory_threshold)[bench.name]
+                if verdict.startswith('FAIL'):
+                    # Confirm with a second, longer measurement before failing;
+                    # one slow burst on a shared machine is not a regression
+                    again = measure(bench, scale, repeat * 2, workdir)
+                    if (again['seconds'] / again['calibration_s']
+                            < result['seconds'] / result['calibration_s']):
+                        result.update(again, peak_mb=result['peak_mb'])
+                    result['peak_mb'] = min(result['peak_mb'], again['peak_mb'])
+            click.echo(f"{bench.name:32} {result['items_per_s']:>14,.0f} {bench.unit}/s "
+                       f"{result['seconds'] * 1000:9.1f} ms {result['peak_mb']:9.1f} MB")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if update_baseline:
+        # Cases not run this time keep their recorded values
+        cases = dict(baseline.get('cases', {})) if only else {}
+        cases.update(results['cases'])
+        with open(baseline_path, 'w') as f:
+            json.dump(dict(results, cases=cases), f, indent=2, sort_keys=True)
+            f.write('\n')
+        click.echo(f"Baseline written to {baseline_path}")
+        return
+    if not baseline:
+        click.echo(f"No baseline at {baseline_path}; run with --update-baseline", err=True)
+        sys.exit(1)
+    if baseline.get('version') != BASELINE_VERSION:
+        click.echo("Baseline format is out of date; run with --update-baseline", err=True)
+        sys.exit(1)
+
+    click.echo(f"\nAgainst {baseline_path} (recorded on Python {baseline['python']}, "
+               f"{baseline['machine']}):")
+    verdicts = compare(results, baseline, threshold, memory_threshold)
+    for name, verdict in verdicts.items():
+        click.echo(f"{verdict.split(' ')[0]:4} {name:32} {verdict.partition(' ')[2]}")
+    if any(verdict.startswith('FAIL') for verdict in verdicts.values()):
+        click.echo(f"Regression beyond {threshold:.0%} time / {memory_threshold:.0%} memory",
+                   err=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
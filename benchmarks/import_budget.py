@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Import Budget
+Check CLI start-up import time against a fixed budget.
+
+Each scripted invocation runs in a fresh interpreter under
+``python -X importtime``; the best of several runs must stay under the
+budget, and the machine-readable paths must not import rich, NumPy or
+pandas at all. Exits non-zero on any violation; tests/test_import_budget.py
+runs the same cases under pytest.
+
+Author: David Osisek (CFOt)
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('rich', 'numpy', 'pandas')
+DEFAULT_BUDGET_MS = 150.0
+
+# (name, interpreter arguments, modules that must not be imported)
+CASES = [
+    ('import fiber_toolkit', ['-c', 'import fiber_toolkit'], HEAVY_MODULES + ('click',)),
+    ('fiber --help', ['-m', 'fiber_toolkit', '--help'], HEAVY_MODULES),
+    ('fiber link-budget --format plain',
+     ['-m', 'fiber_toolkit', 'link-budget', '--tx-power', '0', '--rx-sensitivity', '-20',
+      '--fiber-length', '10', '--connectors', '2', '--format', 'plain'], HEAVY_MODULES),
+    ('fiber loss-calc --format json',
+     ['-m', 'fiber_toolkit', 'loss-calc', '--calc-type', 'connector',
+      '--connector-type', 'LC-UPC', '--count', '4', '--format', 'json'], HEAVY_MODULES),
+    ('fiber wavelength --format json',
+     ['-m', 'fiber_toolkit', 'wavelength', '--list-cwdm', '--format', 'json'], HEAVY_MODULES),
+]
+
+
+def measure(args: List[str]) -> Tuple[float, Set[str]]:
+    """
+    Run one interpreter with ``-X importtime``.
+
+    Returns:
+        (total import time in ms, names of every imported module)
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        modules.add(name.strip())
+        if not name[1:].startswith(' '):  # top level: cumulative covers children
+            total_us += int(cumulative)
+    return total_us / 1000.0, modules
+
+
+def check_case(name: str, args: List[str], forbidden: Tuple[str, ...],
+               budget_ms: float, repeat: int) -> Dict:
+    """Measure one case; the best of ``repeat`` runs is compared to the budget."""
+    runs = [measure(args) for _ in range(repeat)]
+    best = min(ms for ms, _ in runs)
+    loaded = runs[0][1]
+    heavy = sorted(m for m in forbidden
+                   if m in loaded or any(x.startswith(m + '.') for x in loaded))
+    return {
+        'name': name,
+        'ms': best,
+        'forbidden': heavy,
+        'ok': best <= budget_ms and not heavy,
+    }
+
+
+def check(budget_ms: float, repeat: int) -> List[Dict]:
+    """Measure every case."""
+    return [check_case(name, args, forbidden, budget_ms, repeat)
+            for name, args, forbidden in CASES]
+
+
+@click.command()
+@click.option('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, show_default=True,
+              help='Maximum total import time per invocation (ms)')
+@click.option('--repeat', type=click.IntRange(min=1), default=5, show_default=True,
+              help='Runs per case; the fastest counts')
+def main(budget_ms, repeat):
+    """Fail if CLI start-up exceeds the import-time budget."""
+    results = check(budget_ms, repeat)
+    for result in results:
+        flag = 'ok  ' if result['ok'] else 'FAIL'
+        extra = f"  imports {', '.join(result['forbidden'])}" if result['forbidden'] else ''
+        click.echo(f"{flag} {result['ms']:7.1f} ms  {result['name']}{extra}")
+    if not all(result['ok'] for result in results):
+        click.echo(f"Import budget of {budget_ms:.0f} ms exceeded", err=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
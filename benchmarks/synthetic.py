@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data
+Reproducible link fleets, component BOMs, campus topologies, cable
+inventories and OTDR traces for benchmarking.
+
+Every generator takes a size and a seed and returns the same data for the
+same arguments on any machine, so timings from different runs measure the
+code rather than the input. Values follow real plant: 0.1-80 km links,
+SM and OM3/OM4 fiber, FOA-typical component counts, and .sor files that
+the toolkit's own parser reads back (Bellcore/Telcordia SR-4731 issue 2).
+
+Author: David Osisek (CFOt)
+"""
+
+import os
+import struct
+import sys
+from typing import Dict, List
+
+import click
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from fiber_toolkit.sor_format import SPEED_OF_LIGHT  # noqa: E402
+
+DEFAULT_SEED = 20240101
+
+GROUP_INDEX = 1.4682
+SOR_ATTENUATION = 0.35  # dB/km of synthetic traces
+SOR_NOISE_FLOOR = -32.0  # dB
+
+
+def link_fleet(count: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    Links in ``LinkBudget.calculate_batch`` column form, with IDs.
+
+    Roughly 70 % single-mode (1310/1550 nm, 1-80 km) and 30 % multimode
+    (850/1300 nm, 0.1-0.5 km); a few percent carry custom unit losses.
+    """
+    rng = np.random.default_rng(seed)
+    single_mode = rng.random(count) < 0.7
+    fiber_length = np.where(single_mode, rng.uniform(1.0, 80.0, count),
+                            rng.uniform(0.1, 0.5, count))
+    wavelength = np.where(single_mode, rng.choice([1310, 1550], count),
+                          rng.choice([850, 1300], count))
+    fiber_type = np.where(single_mode, 'SM', rng.choice(['MM-OM3', 'MM-OM4'], count))
+    custom = rng.random(count) < 0.05
+    return pd.DataFrame({
+        'link_id': np.char.add('L', np.arange(count).astype(str)),
+        'building': rng.choice([f'B{i:02d}' for i in range(40)], count),
+        'tx_power': rng.choice([-3.0, 0.0, 2.0], count),
+        'rx_sensitivity': rng.choice([-18.0, -24.0, -28.0], count),
+        'fiber_length': fiber_length.round(3),
+        'wavelength': wavelength,
+        'fiber_type': fiber_type,
+        'connector_count': rng.integers(2, 9, count),
+        'splice_count': rng.integers(0, 13, count),
+        'connector_loss': np.where(custom, 0.5, np.nan),
+        'splice_loss': np.where(custom, 0.2, np.nan),
+        'safety_margin': 3.0,
+    })
+
+
+def component_bom(count: int, links: int = None, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    As-built component rows for ``LossCalculator.bom_losses``.
+
+    About 1 % of rows carry a type the calculator does not know, so the
+    unrecognized-row path is exercised too.
+    """
+    rng = np.random.default_rng(seed)
+    links = links or max(1, count // 10)
+    types = ['SC-UPC', 'LC-UPC', 'LC-APC', 'MPO', 'fusion', 'mechanical', 'fiber', 'SM',
+             'MM-OM4', 'unknown']
+    weights = [0.15, 0.2, 0.1, 0.05, 0.25, 0.04, 0.1, 0.06, 0.04, 0.01]
+    kind = rng.choice(types, count, p=weights)
+    is_fiber = np.isin(kind, ['fiber', 'SM', 'MM-OM4'])
+    return pd.DataFrame({
+        'link_id': np.char.add('L', rng.integers(0, links, count).astype(str)),
+        'type': kind,
+        'count': np.where(is_fiber, 1, rng.integers(1, 5, count)),
+        'fiber_type': np.where(kind == 'fiber', rng.choice(['SM', 'MM-OM3'], count), None),
+        'wavelength': np.where(is_fiber, rng.choice([850, 1310, 1550], count), np.nan),
+        'length': np.where(is_fiber, rng.uniform(0.05, 10.0, count).round(3), np.nan),
+    })
+
+
+def campus_topology(count: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """
+    Route tree for ``CapacityPlanner.plan_campus``: one MDF root, every
+    other node hanging off a random earlier node (random recursive tree).
+    """
+    rng = np.random.default_rng(seed)
+    index = np.arange(count)
+    parent = np.floor(rng.random(count) * index).astype(int)
+    names = np.char.add('N', index.astype(str))
+    return pd.DataFrame({
+        'node': names,
+        'parent': np.where(index == 0, None, names[parent]),
+        'length': np.where(index == 0, 0.0, rng.uniform(20.0, 600.0, count).round(1)),
+        'endpoints': np.where(index == 0, 0, rng.integers(2, 48, count)),
+    })
+
+
+def cable_inventory(conduits: int, seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    """Cables per conduit for ``CapacityPlanner.conduit_fill_batch``."""
+    rng = np.random.default_rng(seed)
+    per_conduit = rng.integers(1, 6, conduits)
+    conduit = np.repeat(np.arange(conduits), per_conduit)
+    return pd.DataFrame({
+        'conduit': np.char.add('C', conduit.astype(str)),
+        'cable_diameter': rng.choice([6.0, 9.5, 12.7, 14.0, 18.0, 22.0], len(conduit)),
+        'conduit_diameter': np.repeat(rng.choice([26.6, 35.1, 40.9, 52.5], conduits),
+                                      per_conduit),
+    })
+
+
+def backscatter_trace(points: int, spacing_km: float, events: List[Dict],
+                      seed: int = DEFAULT_SEED) -> np.ndarray:
+    """
+    Trace (dB, decreasing) with linear attenuation, event steps,
+    reflective spikes, an end-of-fiber drop and Gaussian noise.
+
+    Args:
+        points: Samples
+        spacing_km: Sample spacing (km)
+        events: ``{'distance', 'loss', 'reflective'}`` dicts; the last
+            one is the end of fiber
+        seed: Noise seed
+    """
+    rng = np.random.default_rng(seed)
+    distance = np.arange(points) * spacing_km
+    trace = -SOR_ATTENUATION * distance
+    for event in events[:-1]:
+        at = int(event['distance'] / spacing_km)
+        trace[at:] -= event['loss']
+        if event['reflective']:
+            trace[at:at + 3] += 4.0
+    end = int(events[-1]['distance'] / spacing_km)
+    trace[end:end + 3] += 6.0
+    trace[end + 3:] = SOR_NOISE_FLOOR
+    trace += rng.normal(0.0, 0.01, points)
+    return np.clip(trace, -65.0, 0.0)
+
+
+def _string(value: str) -> bytes:
+    return value.encode('latin-1') + b'\0'
+
+
+def _block(name: str, body: bytes) -> bytes:
+    # Issue 2 repeats the block name at the start of every block
+    return _string(name) + body
+
+
+def sor_bytes(points: int = 16_000, spacing_km: float = 0.005, event_count: int = 6,
+              seed: int = DEFAULT_SEED, fiber_id: str = 'F001') -> bytes:
+    """
+    A complete SR-4731 issue 2 file: Map, GenParams, SupParams,
+    FxdParams, KeyEvents and DataPts.
+
+    Connectors and splices are placed at random along the fiber, which
+    ends at 90 % of the trace, and KeyEvents lists them at the same
+    positions and losses the trace shows.
+    """
+    rng = np.random.default_rng(seed)
+    length_km = points * spacing_km * 0.9
+    positions = np.sort(rng.uniform(0.05, 0.95, event_count)) * length_km
+    events = [{'distance': float(d), 'loss': float(rng.uniform(0.1, 0.6)),
+               'reflective': bool(rng.random() < 0.5)} for d in positions]
+    events.append({'distance': length_km, 'loss': 0.0, 'reflective': True})
+    trace = backscatter_trace(points, spacing_km, events, seed)
+
+    km_per_unit = 1e-10 * SPEED_OF_LIGHT / GROUP_INDEX
+    general = _block('GenParams', b'EN' + _string('CABLE-1') + _string(fiber_id)
+                     + struct.pack('<HH', 652, 1310) + _string('MDF') + _string('IDF-2')
+                     + _string('') + b'BC' + struct.pack('<ii', 0, 0)
+                     + _string('bench') + _string('synthetic'))
+    supplier = _block('SupParams', b''.join(_string(value) for value in (
+        'Fiber-Optics-Toolkit', 'SYN-1', '0001', 'SM', '0001', '1.0', '')))
+    fixed = _block('FxdParams', struct.pack(
+        '<I2sHii' 'H' 'H' 'I' 'I' 'I' 'H' 'I' 'H' 'I' 'i' 'i' 'H' 'h' 'H' 'H' 'H' 'H' '2s',
+        1700000000, b'km', 13100, 0, 0,
+        1, 100, int(round(spacing_km * 10000 / km_per_unit)), points,
+        int(GROUP_INDEX * 100000), 800, 1000, 300, int(points * spacing_km * 1000), 0,
+        0, 0, 0, 0, 50, 65000, 3000, b'ST'))
+
+    records = [struct.pack('<HIhhi6s2s5I', 1, 0, 350, 0, 0, b'0F9999', b'LS', 0, 0, 0, 0, 0)
+               + _string('')]
+    for number, event in enumerate(events, 2):
+        end = number == len(events) + 1
+        code = (b'1E9999' if end else
+                b'1F9999' if event['reflective'] else b'0F9999')
+        records.append(struct.pack(
+            '<HIhhi6s2s5I', number, int(round(event['distance'] / km_per_unit)), 350,
+            int(round(event['loss'] * 1000)), -45000 if event['reflective'] else 0,
+            code, b'LS', 0, 0, 0, 0, 0) + _string(''))
+    total_loss = length_km * SOR_ATTENUATION + sum(event['loss'] for event in events)
+    end_units = int(round(length_km / km_per_unit))
+    key_events = _block('KeyEvents', struct.pack('<H', len(records)) + b''.join(records)
+                        + struct.pack('<iiIHiI', int(round(total_loss * 1000)), 0,
+                                      end_units, 40000, 0, end_units))
+
+    raw = np.round(-trace * 1000).astype('<u2')
+    data_points = _block('DataPts', struct.pack('<IHIH', points, 1, points, 1000)
+                         + raw.tobytes())
+
+    blocks = [('GenParams', general), ('SupParams', supplier), ('FxdParams', fixed),
+              ('KeyEvents', key_events), ('DataPts', data_points)]
+    entries = b''.join(_string(name) + struct.pack('<HI', 200, len(body))
+                       for name, body in blocks)
+    map_size = 4 + 2 + 4 + 2 + len(entries)
+    header = b'Map\0' + struct.pack('<HIH', 200, map_size, len(blocks) + 1) + entries
+    return header + b''.join(body for _, body in blocks)
+
+
+def sor_directory(directory: str, count: int, points: int = 16_000,
+                  seed: int = DEFAULT_SEED) -> List[str]:
+    """Write ``count`` distinct .sor files; returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for number in range(count):
+        path = os.path.join(directory, f'trace_{number:05d}.sor')
+        with open(path, 'wb') as f:
+            f.write(sor_bytes(points, seed=seed + number, fiber_id=f'F{number:05d}'))
+        paths.append(path)
+    return paths
+
+
+TABLES = {
+    'links': link_fleet,
+    'bom': component_bom,
+    'campus': campus_topology,
+    'cables': cable_inventory,
+}
+
+
+@click.command()
+@click.argument('kind', type=click.Choice(sorted(TABLES) + ['sor']))
+@click.option('--count', type=click.IntRange(min=1), required=True,
+              help='Rows (links, BOM rows, campus nodes, conduits) or .sor files')
+@click.option('--seed', type=int, default=DEFAULT_SEED, show_default=True)
+@click.option('--points', type=click.IntRange(min=1000), default=16_000, show_default=True,
+              help='Trace samples per .sor file')
+@click.option('--output', required=True,
+              help='Table file (.csv or .parquet), or a directory for sor')
+def main(kind, count, seed, points, output):
+    """Write a synthetic data set for benchmarking or manual testing."""
+    if kind == 'sor':
+        sor_directory(output, count, points, seed)
+    else:
+        from fiber_toolkit.table_io import ChunkWriter
+
+        with ChunkWriter(output) as writer:
+            writer.write(TABLES[kind](count, seed=seed))
+    click.echo(f"Wrote {count} {kind} -> {output}")
+
+
+if __name__ == '__main__':
+    main()
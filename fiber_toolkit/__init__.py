@@ -11,12 +11,35 @@ License: MIT
 __version__ = '1.0.0'
 __author__ = 'David Osisek'
 
-from .link_budget import LinkBudget
-from .loss_calculator import LossCalculator
-from .wavelength import WavelengthCalculator
+import importlib
+
+# Public classes and their modules, imported on first attribute access so
+# that ``import fiber_toolkit`` (and every CLI start) stays cheap
+_LAZY_EXPORTS = {
+    'LinkBudget': 'link_budget',
+    'LossCalculator': 'loss_calculator',
+    'WavelengthCalculator': 'wavelength',
+    'FiberNetwork': 'network',
+    'LinkFleet': 'fleet',
+}
 
 __all__ = [
     'LinkBudget',
     'LossCalculator',
     'WavelengthCalculator',
+    'FiberNetwork',
+    'LinkFleet',
 ]
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
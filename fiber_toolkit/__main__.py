@@ -5,11 +5,50 @@ Fiber Optics Toolkit - Main CLI Entry Point
 Author: David Osisek (CFOt)
 """
 
+import importlib
+
 import click
-from rich.console import Console
-from rich.table import Table
 
-@click.group()
+# Subcommand name -> (module, short help). Modules are imported only when
+# their command runs, so `fiber <tool>` pays for that tool alone.
+LAZY_COMMANDS = {
+    'link-budget': ('link_budget', 'Calculate fiber link budgets (FOA)'),
+    'loss-calc': ('loss_calculator', 'Calculate component losses'),
+    'wavelength': ('wavelength', 'Wavelength-specific calculations'),
+    'otdr': ('otdr_parser', 'Parse and analyze OTDR traces'),
+    'report': ('report_generator', 'Generate PDF test reports'),
+    'capacity': ('capacity_planner', 'Plan fiber infrastructure'),
+    'standards': ('standards_reference', 'Quick reference for FOA/TIA standards'),
+    'route': ('network', 'Find lowest-loss routes through a fiber network'),
+    'fleet': ('fleet', 'What-if recomputation of a link fleet'),
+}
+
+
+class LazyGroup(click.Group):
+    """Click group that imports subcommand modules on first use."""
+    
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(LAZY_COMMANDS))
+    
+    def get_command(self, ctx, name):
+        command = super().get_command(ctx, name)
+        if command is None and name in LAZY_COMMANDS:
+            module = importlib.import_module(f'.{LAZY_COMMANDS[name][0]}', __package__)
+            command = module.main
+            self.add_command(command, name)
+        return command
+    
+    def format_commands(self, ctx, formatter):
+        # Help text comes from the table above, so --help imports nothing
+        rows = [(name, LAZY_COMMANDS[name][1]) for name in LAZY_COMMANDS]
+        rows += [(name, command.get_short_help_str())
+                 for name, command in self.commands.items()
+                 if name not in LAZY_COMMANDS]
+        with formatter.section("Commands"):
+            formatter.write_dl(sorted(rows))
+
+
+@click.group(cls=LazyGroup)
 @click.version_option(version='1.0.0')
 def cli():
     """
@@ -23,6 +62,9 @@ def cli():
 @cli.command()
 def tools():
     """List all available tools."""
+    from rich.console import Console
+    from rich.table import Table
+    
     console = Console()
     
     console.print("\n[bold cyan]Fiber Optics Toolkit - Available Tools[/bold cyan]")
@@ -41,17 +83,22 @@ def tools():
         ("Report Generator", "fiber-report", "Generate PDF test reports"),
         ("Capacity Planner", "fiber-capacity", "Plan fiber infrastructure"),
         ("Standards Reference", "fiber-standards", "Quick reference for FOA/TIA standards"),
+        ("Network Routing", "fiber-route", "Find lowest-loss routes through a fiber network"),
+        ("Link Fleet", "fiber-fleet", "What-if recomputation of a link fleet"),
     ]
     
     for tool, command, desc in tools_list:
         table.add_row(tool, command, desc)
     
     console.print(table)
-    console.print("\n[dim]Run any command with --help for detailed usage[/dim]\n")
+    console.print("\n[dim]Each tool also runs as `fiber <command>`, e.g. `fiber link-budget`[/dim]")
+    console.print("[dim]Run any command with --help for detailed usage[/dim]\n")
 
 @cli.command()
 def about():
     """About the Fiber Optics Toolkit."""
+    from rich.console import Console
+    
     console = Console()
     
     console.print("\n[bold cyan]Fiber Optics Toolkit v1.0.0[/bold cyan]")
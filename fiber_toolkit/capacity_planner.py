@@ -3,19 +3,95 @@
 Capacity Planner
 Fiber strand count, conduit fill, and splice closure sizing.
 
+The campus planner takes a route tree of buildings/IDFs with strand
+demand, numbers strands so every segment carries one contiguous range,
+and picks the cheapest mix of standard cable counts for each segment
+(an unbounded covering knapsack solved for all segments at once).
+
 Author: David Osisek (CFOt)
 """
 
+import bisect
 import click
 import math
-from rich.console import Console
-from rich.table import Table
+from typing import TYPE_CHECKING, Dict, List
+
+from . import profiling
+from .cli_output import emit, format_option
+from .table_io import read_table, resolve_columns
+
+if TYPE_CHECKING:
+    import numpy as np
 
 class CapacityPlanner:
     """Infrastructure capacity planning."""
     
     STANDARD_COUNTS = [6, 12, 24, 48, 72, 144, 288, 432, 576]
     
+    # Illustrative installed cost per cable: (per metre, per cable for
+    # pulling and end preparation); pass a cost table for real prices
+    CABLE_COSTS = {
+        6: (1.10, 150.0),
+        12: (1.30, 150.0),
+        24: (1.70, 175.0),
+        48: (2.50, 200.0),
+        72: (3.30, 225.0),
+        144: (5.60, 275.0),
+        288: (9.80, 350.0),
+        432: (14.50, 425.0),
+        576: (18.90, 500.0),
+    }
+    
+    # Maximum conduit fill (%) for 1, 2 and 3+ cables (TIA-569 / NEC Ch. 9)
+    FILL_LIMITS = (53.0, 31.0, 40.0)
+    
+    # Three cables can jam at a pull bend when 1.05 * D / d falls in this range
+    JAM_FACTOR = 1.05
+    JAM_RANGE = (2.8, 3.2)
+    
+    # EMT trade sizes and inner diameters (mm), NEC Chapter 9 Table 4
+    CONDUIT_SIZES = {
+        '1/2': 15.8,
+        '3/4': 20.9,
+        '1': 26.6,
+        '1-1/4': 35.1,
+        '1-1/2': 40.9,
+        '2': 52.5,
+        '2-1/2': 69.4,
+        '3': 85.2,
+        '3-1/2': 97.4,
+        '4': 110.1,
+    }
+    
+    # Campus node table columns and the aliases accepted for each
+    CAMPUS_COLUMNS = {
+        'node': ('node', 'name', 'node_id', 'building'),
+        'parent': ('parent', 'upstream', 'parent_id'),
+        'length': ('length', 'segment_length', 'distance'),
+        'strands': ('strands', 'demand'),
+        'endpoints': ('endpoints',),
+    }
+    CABLE_COLUMNS = {
+        'conduit': ('conduit', 'conduit_id', 'duct'),
+        'cable_diameter': ('cable_diameter', 'diameter', 'od'),
+        'conduit_diameter': ('conduit_diameter', 'inner_diameter'),
+    }
+    CONDUIT_COLUMNS = {
+        'conduit': ('conduit', 'conduit_id', 'duct'),
+        'conduit_diameter': ('conduit_diameter', 'inner_diameter', 'diameter'),
+    }
+    COST_COLUMNS = {
+        'count': ('count', 'strands', 'fiber_count'),
+        'cost_per_m': ('cost_per_m', 'per_m', 'cost_per_meter'),
+        'fixed_cost': ('fixed_cost', 'per_cable', 'fixed'),
+    }
+    
+    @classmethod
+    def standard_count(cls, strands: float) -> int:
+        """Smallest standard cable count holding ``strands`` (the largest if none does)."""
+        index = bisect.bisect_left(cls.STANDARD_COUNTS, strands)
+        return cls.STANDARD_COUNTS[min(index, len(cls.STANDARD_COUNTS) - 1)]
+    
     @classmethod
     def calculate_strand_count(cls, endpoints: int, redundancy: float = 1.5, 
                                future_growth: float = 1.3):
@@ -23,8 +99,7 @@ class CapacityPlanner:
         base = endpoints * 2  # Assume duplex
         with_redundancy = base * redundancy
         with_growth = with_redundancy * future_growth
-        recommended = min([c for c in cls.STANDARD_COUNTS if c >= with_growth], 
-                         default=cls.STANDARD_COUNTS[-1])
+        recommended = cls.standard_count(with_growth)
         return {
             'base_strands': base,
             'with_redundancy': with_redundancy,
@@ -36,46 +111,682 @@ class CapacityPlanner:
     def conduit_fill(cls, conduit_diameter: float, cable_diameter: float,
                      cable_count: int = 1):
         """Calculate conduit fill percentage."""
+        return cls.conduit_fill_mixed(conduit_diameter, [cable_diameter] * cable_count)
+    
+    @classmethod
+    def max_fill(cls, cable_count: int) -> float:
+        """Maximum fill (%) for a number of cables (no cables: the 3+ limit, as always)."""
+        if cable_count < 1:
+            return cls.FILL_LIMITS[2]
+        return cls.FILL_LIMITS[min(cable_count, 3) - 1]
+    
+    @classmethod
+    def _max_fills(cls, cable_count: 'np.ndarray') -> 'np.ndarray':
+        """``max_fill`` for an array of cable counts."""
+        import numpy as np
+        
+        limits = np.asarray(cls.FILL_LIMITS)
+        return np.where(cable_count >= 1, limits[np.clip(cable_count, 1, 3) - 1], limits[2])
+    
+    @classmethod
+    def conduit_fill_mixed(cls, conduit_diameter: float, cable_diameters: List[float]) -> Dict:
+        """
+        Fill and jam check for one conduit holding cables of any diameters.
+        
+        The jam ratio applies to exactly three cables and uses their mean
+        diameter.
+        
+        Args:
+            conduit_diameter: Conduit inner diameter (mm)
+            cable_diameters: Outer diameter of every cable (mm)
+        
+        Returns:
+            Dictionary with areas, fill and maximum fill (%), jam ratio
+            (None unless three cables), jam risk and compliance
+        """
+        cable_count = len(cable_diameters)
         conduit_area = math.pi * (conduit_diameter / 2) ** 2
-        cable_area = math.pi * (cable_diameter / 2) ** 2
-        total_cable_area = cable_area * cable_count
+        total_cable_area = sum(math.pi * (d / 2) ** 2 for d in cable_diameters)
         fill_percent = (total_cable_area / conduit_area) * 100
+        max_fill = cls.max_fill(cable_count)
         
-        # TIA standards: 1 cable=53%, 2=31%, 3+=40%
-        if cable_count == 1:
-            max_fill = 53
-        elif cable_count == 2:
-            max_fill = 31
-        else:
-            max_fill = 40
+        jam_ratio = None
+        jam_risk = False
+        if cable_count == 3:
+            jam_ratio = cls.JAM_FACTOR * conduit_diameter / (sum(cable_diameters) / 3)
+            jam_risk = cls.JAM_RANGE[0] <= jam_ratio <= cls.JAM_RANGE[1]
         
         return {
             'conduit_area': conduit_area,
             'cable_area_total': total_cable_area,
+            'cable_count': cable_count,
             'fill_percent': fill_percent,
             'max_fill_percent': max_fill,
-            'compliant': fill_percent <= max_fill
+            'jam_ratio': jam_ratio,
+            'jam_risk': jam_risk,
+            'compliant': fill_percent <= max_fill and not jam_risk
+        }
+    
+    @classmethod
+    def _jam_risk(cls, cable_count: 'np.ndarray', conduit_diameter: 'np.ndarray',
+                  mean_diameter: 'np.ndarray') -> 'np.ndarray':
+        import numpy as np
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = cls.JAM_FACTOR * conduit_diameter / mean_diameter
+        return (cable_count == 3) & (ratio >= cls.JAM_RANGE[0]) & (ratio <= cls.JAM_RANGE[1])
+    
+    @classmethod
+    def _smallest_sizes(cls, cable_count: 'np.ndarray', cable_area: 'np.ndarray',
+                        mean_diameter: 'np.ndarray') -> 'np.ndarray':
+        """Index into ``CONDUIT_SIZES`` of the smallest compliant size (-1 if none)."""
+        import numpy as np
+        
+        inner = np.array(list(cls.CONDUIT_SIZES.values()))
+        limits = np.asarray(cls.FILL_LIMITS)[np.clip(cable_count, 1, 3) - 1]
+        # Fill rule alone: area / (pi/4 * D^2) <= limit
+        needed = np.sqrt(cable_area * 400.0 / (math.pi * limits))
+        index = np.searchsorted(inner, needed - 1e-9, side='left')
+        # Step past sizes where three cables would jam
+        for _ in range(len(inner)):
+            valid = index < len(inner)
+            jammed = np.zeros(len(index), dtype=bool)
+            jammed[valid] = cls._jam_risk(cable_count[valid], inner[index[valid]],
+                                          mean_diameter[valid])
+            if not jammed.any():
+                break
+            index[jammed] += 1
+        index[index >= len(inner)] = -1
+        return index
+    
+    @classmethod
+    def smallest_conduit(cls, cable_diameters: List[float]) -> Dict:
+        """
+        Smallest EMT trade size that holds a cable set within the fill and jam rules.
+        
+        Returns:
+            Dictionary with ``trade_size`` and ``conduit_diameter`` (None if
+            even the largest size is too small) and the fill check for it
+        """
+        import numpy as np
+        
+        count = len(cable_diameters)
+        area = sum(math.pi * (d / 2) ** 2 for d in cable_diameters)
+        index = int(cls._smallest_sizes(np.array([count]), np.array([area]),
+                                        np.array([area and sum(cable_diameters) / count]))[0])
+        if index < 0:
+            return {'trade_size': None, 'conduit_diameter': None, 'compliant': False}
+        trade_size, inner = list(cls.CONDUIT_SIZES.items())[index]
+        return dict(cls.conduit_fill_mixed(inner, cable_diameters),
+                    trade_size=trade_size, conduit_diameter=inner)
+    
+    @classmethod
+    @profiling.timed('capacity.conduit_fill_batch')
+    def conduit_fill_batch(cls, cables, conduits=None):
+        """
+        Fill, jam and smallest-size checks for a whole conduit inventory.
+        
+        One pass of grouped sums over the cable rows; no per-conduit loop.
+        
+        Args:
+            cables: DataFrame with one row per cable: ``conduit`` (ID) and
+                ``cable_diameter`` (mm), optionally ``conduit_diameter``
+                (inner, mm; the first value per conduit is used)
+            conduits: Optional DataFrame of ``conduit`` and
+                ``conduit_diameter``; conduits listed here without cables
+                are reported empty
+        
+        Returns:
+            DataFrame with one row per conduit: cable count, cable area,
+            mean cable diameter, conduit area, fill and maximum fill (%),
+            jam ratio, jam risk, compliance and the smallest compliant
+            trade size for its cables
+        """
+        import numpy as np
+        import pandas as pd
+        
+        found = resolve_columns(cables, cls.CABLE_COLUMNS)
+        if 'conduit' not in found or 'cable_diameter' not in found:
+            raise ValueError("Cable inventory needs conduit and cable_diameter columns")
+        ids = found['conduit']
+        diameters = pd.to_numeric(found['cable_diameter']).to_numpy(float)
+        
+        if conduits is not None:
+            listed = resolve_columns(conduits, cls.CONDUIT_COLUMNS)
+            if 'conduit' not in listed or 'conduit_diameter' not in listed:
+                raise ValueError("Conduit table needs conduit and conduit_diameter columns")
+            names = pd.Index(listed['conduit']).append(pd.Index(ids)).unique()
+            codes = names.get_indexer(ids)
+            inner = np.full(len(names), np.nan)
+            inner[names.get_indexer(listed['conduit'])] = pd.to_numeric(
+                listed['conduit_diameter']).to_numpy(float)
+        else:
+            codes, names = pd.factorize(ids)
+            inner = np.full(len(names), np.nan)
+        if 'conduit_diameter' in found:
+            per_cable = pd.to_numeric(found['conduit_diameter']).to_numpy(float)
+            first = np.full(len(names), np.nan)
+            # Reversed so the first row of each conduit is written last
+            first[codes[::-1]] = per_cable[::-1]
+            inner = np.where(np.isnan(inner), first, inner)
+        
+        n = len(names)
+        count = np.bincount(codes, minlength=n)
+        area = np.bincount(codes, weights=math.pi * (diameters / 2) ** 2, minlength=n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_diameter = np.bincount(codes, weights=diameters, minlength=n) / count
+            conduit_area = math.pi * (inner / 2) ** 2
+            fill = area / conduit_area * 100
+            jam_ratio = np.where(count == 3, cls.JAM_FACTOR * inner / mean_diameter, np.nan)
+        max_fill = cls._max_fills(count)
+        jam = cls._jam_risk(count, inner, mean_diameter)
+        
+        smallest = cls._smallest_sizes(count, area, mean_diameter)
+        trade_sizes = np.array(list(cls.CONDUIT_SIZES) + [''], dtype=object)
+        return pd.DataFrame({
+            'conduit': names,
+            'conduit_diameter': inner,
+            'cable_count': count,
+            'cable_area_total': area,
+            'mean_cable_diameter': mean_diameter,
+            'conduit_area': conduit_area,
+            'fill_percent': np.where(count > 0, fill, 0.0),
+            'max_fill_percent': max_fill,
+            'jam_ratio': jam_ratio,
+            'jam_risk': jam,
+            'compliant': ((count == 0) | (fill <= max_fill)) & ~jam & ~np.isnan(inner),
+            'smallest_trade_size': np.where(count > 0, trade_sizes[smallest], ''),
+        })
+    
+    @classmethod
+    def assign_ducts(cls, cable_diameters: List[float], duct_diameter: float,
+                     ducts: int) -> Dict:
+        """
+        Assign cables to parallel ducts of one size, using as few ducts as possible.
+        
+        Best-fit decreasing: cables are placed largest first into the
+        fullest duct that stays within the fill and jam rules with the
+        cable added, opening a new duct only when none can take it.
+        
+        Args:
+            cable_diameters: Outer diameter of every cable (mm)
+            duct_diameter: Inner diameter of each duct (mm)
+            ducts: Ducts available
+        
+        Returns:
+            Dictionary with ``ducts`` (per used duct: cable indices,
+            diameters and fill check), ``ducts_used`` and ``unplaced``
+            (indices of cables that fit in no duct)
+        """
+        duct_area = math.pi * (duct_diameter / 2) ** 2
+        order = sorted(range(len(cable_diameters)), key=lambda i: -cable_diameters[i])
+        loads: List[List[int]] = []
+        areas: List[float] = []
+        unplaced = []
+        
+        def fits(members: List[int], area: float, cable: int) -> bool:
+            count = len(members) + 1
+            fill = (area + math.pi * (cable_diameters[cable] / 2) ** 2) / duct_area * 100
+            if fill > cls.max_fill(count):
+                return False
+            if count == 3:
+                mean = (sum(cable_diameters[i] for i in members) + cable_diameters[cable]) / 3
+                ratio = cls.JAM_FACTOR * duct_diameter / mean
+                return not cls.JAM_RANGE[0] <= ratio <= cls.JAM_RANGE[1]
+            return True
+        
+        for cable in order:
+            candidates = [d for d in range(len(loads)) if fits(loads[d], areas[d], cable)]
+            if candidates:
+                duct = max(candidates, key=lambda d: areas[d])
+            elif len(loads) < ducts and fits([], 0.0, cable):
+                loads.append([])
+                areas.append(0.0)
+                duct = len(loads) - 1
+            else:
+                unplaced.append(cable)
+                continue
+            loads[duct].append(cable)
+            areas[duct] += math.pi * (cable_diameters[cable] / 2) ** 2
+        
+        return {
+            'ducts': [
+                dict(cls.conduit_fill_mixed(duct_diameter,
+                                            [cable_diameters[i] for i in members]),
+                     cables=members)
+                for members in loads
+            ],
+            'ducts_used': len(loads),
+            'unplaced': unplaced,
+        }
+    
+    @classmethod
+    def _cost_table(cls, costs=None) -> Dict[int, tuple]:
+        """Cable costs as {count: (per metre, per cable)} from a dict or table."""
+        if costs is None:
+            return dict(cls.CABLE_COSTS)
+        if isinstance(costs, dict):
+            return {int(count): tuple(map(float, value)) for count, value in costs.items()}
+        found = resolve_columns(costs, cls.COST_COLUMNS)
+        if 'count' not in found or 'cost_per_m' not in found:
+            raise ValueError("Cost table needs count and cost_per_m columns")
+        fixed = found.get('fixed_cost', [0.0] * len(found['count']))
+        return {int(count): (float(per_m), float(per_cable or 0.0))
+                for count, per_m, per_cable in zip(found['count'], found['cost_per_m'], fixed)}
+    
+    @staticmethod
+    def _node_labels(column) -> 'np.ndarray':
+        """Node names as strings; whole-number floats (from NaN parents) lose the '.0'."""
+        import pandas as pd
+        
+        if pd.api.types.is_float_dtype(column) and (column.dropna() % 1 == 0).all():
+            column = column.astype('Int64')
+        return column.astype('string').fillna('').str.strip().to_numpy(dtype=object)
+    
+    @classmethod
+    def _campus_tree(cls, nodes, redundancy: float, future_growth: float) -> Dict:
+        """
+        Resolve a node table to parent indices, depth levels and strand demand.
+        
+        Nodes without a parent are roots (MDFs). Each non-root node's
+        ``length`` is the segment to its parent (m).
+        """
+        import numpy as np
+        import pandas as pd
+        
+        frame = nodes if hasattr(nodes, 'columns') else pd.DataFrame(nodes)
+        found = resolve_columns(frame, cls.CAMPUS_COLUMNS)
+        if 'node' not in found or 'parent' not in found:
+            raise ValueError("Campus nodes need node and parent columns")
+        names = cls._node_labels(found['node'])
+        index = pd.Index(names)
+        if not index.is_unique:
+            raise ValueError(f"Duplicate node: {index[index.duplicated()][0]}")
+        n = len(names)
+        
+        parent_names = cls._node_labels(found['parent'])
+        has_parent = parent_names != ''
+        parent = np.full(n, -1, dtype=np.intp)
+        parent[has_parent] = index.get_indexer(parent_names[has_parent])
+        if (parent[has_parent] < 0).any():
+            unknown = parent_names[has_parent][parent[has_parent] < 0][0]
+            raise ValueError(f"Unknown parent node: {unknown}")
+        
+        if 'strands' in found:
+            strands = np.ceil(pd.to_numeric(found['strands']).fillna(0).to_numpy(float))
+        elif 'endpoints' in found:
+            endpoints = pd.to_numeric(found['endpoints']).fillna(0).to_numpy(float)
+            # Duplex endpoints with redundancy and growth, as calculate_strand_count
+            strands = np.ceil(endpoints * 2 * redundancy * future_growth - 1e-9)
+        else:
+            raise ValueError("Campus nodes need a strands or endpoints column")
+        length = np.zeros(n)
+        if 'length' in found:
+            length = pd.to_numeric(found['length']).fillna(0).to_numpy(float)
+        
+        # Children grouped by parent (CSR), then breadth-first depth levels
+        children = np.argsort(parent, kind='stable')
+        sorted_parent = parent[children]
+        first = np.searchsorted(sorted_parent, np.arange(n), side='left')
+        last = np.searchsorted(sorted_parent, np.arange(n), side='right')
+        levels = [np.flatnonzero(~has_parent)]
+        reached = len(levels[0])
+        while True:
+            frontier = levels[-1]
+            counts = last[frontier] - first[frontier]
+            total = int(counts.sum())
+            if not total:
+                break
+            starts = np.repeat(first[frontier] - np.cumsum(counts) + counts, counts)
+            levels.append(children[starts + np.arange(total)])
+            reached += total
+        if reached != n:
+            raise ValueError("Campus route tree has a cycle (nodes not reachable from a root)")
+        
+        return {'names': names, 'parent': parent, 'levels': levels,
+                'strands': strands.astype(np.int64), 'length': length}
+    
+    @staticmethod
+    def _size_segments(required: 'np.ndarray', length: 'np.ndarray',
+                       costs: Dict[int, tuple]) -> Dict:
+        """
+        Cheapest mix of standard cables covering each segment's strands.
+        
+        Unbounded covering knapsack per segment, with cable cost
+        length * per_metre + per_cable. Counts are handled in units of
+        their greatest common divisor. Some optimal mix uses fewer than
+        c_best other cables (c_best = the count with the lowest cost per
+        strand on that segment), so all but the last c_best * c_max units
+        are filled with that cable and the DP runs over at most that range,
+        for all segments at once.
+        
+        Returns:
+            Dictionary with ``counts`` (cable sizes), ``cables`` (segments x
+            sizes), ``capacity`` and ``cost`` arrays
+        """
+        import numpy as np
+        
+        sizes = np.array(sorted(costs), dtype=np.int64)
+        per_m = np.array([costs[c][0] for c in sizes])
+        fixed = np.array([costs[c][1] for c in sizes])
+        unit = int(np.gcd.reduce(sizes))
+        units = sizes // unit
+        widest = int(units.max())
+        n, k = len(required), len(sizes)
+        
+        weights = length[:, None] * per_m[None, :] + fixed[None, :]
+        need = -(-required // unit)
+        best = (weights / units).argmin(axis=1)
+        best_units = units[best]
+        bulk = np.maximum(0, (need - (best_units - 1) * widest) // best_units)
+        rest = need - bulk * best_units
+        
+        # Segments sorted by remaining units, so those still open at step u
+        # are a prefix
+        order = np.argsort(-rest, kind='stable')
+        rest_sorted = rest[order]
+        weights_sorted = weights[order].T.copy()
+        top = int(rest_sorted[0]) if n else 0
+        open_count = np.searchsorted(-rest_sorted, -np.arange(top + 1), side='right')
+        
+        ring = np.zeros((widest + 1, n))
+        choices = [None] * (top + 1)
+        for u in range(1, top + 1):
+            m = open_count[u]
+            base = ring[(u - units) % (widest + 1), :m]
+            base[units >= u] = 0.0
+            candidates = base + weights_sorted[:, :m]
+            pick = candidates.argmin(axis=0)
+            ring[u % (widest + 1), :m] = candidates[pick, np.arange(m)]
+            choices[u] = pick.astype(np.int8)
+        
+        cables = np.zeros((n, k), dtype=np.int64)
+        cables[np.arange(n), best] = bulk
+        for j, segment in enumerate(order.tolist()):
+            u = int(rest_sorted[j])
+            while u > 0:
+                choice = choices[u][j]
+                cables[segment, choice] += 1
+                u -= units[choice]
+        
+        return {
+            'counts': sizes,
+            'cables': cables,
+            'capacity': cables @ sizes,
+            'cost': (cables * weights).sum(axis=1),
+        }
+    
+    @classmethod
+    @profiling.timed('capacity.plan_campus')
+    def plan_campus(cls, nodes, costs=None, redundancy: float = 1.5,
+                    future_growth: float = 1.3) -> Dict:
+        """
+        Allocate strands and size cables for a campus route tree.
+        
+        Every building's strands run home to its root (MDF), so each
+        segment carries the demand of its whole subtree. Strands are
+        numbered depth-first from the root, which gives each building one
+        contiguous range and each segment the contiguous range of its
+        subtree. Each segment gets the cheapest mix of standard cables
+        that holds its strands.
+        
+        Args:
+            nodes: DataFrame or mapping with ``node``, ``parent`` (empty for
+                roots), ``length`` (segment to the parent, m) and either
+                ``strands`` or ``endpoints`` (duplex, scaled by redundancy
+                and growth) per node
+            costs: {count: (cost per metre, cost per cable)} or a table
+                with count, cost_per_m and fixed_cost columns; defaults to
+                ``CABLE_COSTS``
+            redundancy: Redundancy factor for ``endpoints``
+            future_growth: Growth factor for ``endpoints``
+        
+        Returns:
+            Dictionary with ``nodes`` (DataFrame, one row per node with its
+            strand range and its upstream segment's cables, spare strands
+            and cost), ``total_cost``, ``cables`` ({count: cables used}),
+            ``cable_length`` (m of cable) and node/segment counts
+        """
+        import numpy as np
+        import pandas as pd
+        
+        tree = cls._campus_tree(nodes, redundancy, future_growth)
+        parent, levels, strands = tree['parent'], tree['levels'], tree['strands']
+        
+        subtree = strands.copy()
+        for level in reversed(levels[1:]):
+            np.add.at(subtree, parent[level], subtree[level])
+        
+        # Depth-first numbering: a node's strands follow its parent's own
+        # strands and the subtrees of its earlier siblings
+        start = np.zeros(len(strands), dtype=np.int64)
+        roots = levels[0]
+        start[roots] = np.cumsum(subtree[roots]) - subtree[roots]
+        for level in levels[1:]:
+            up = parent[level]
+            before = np.cumsum(subtree[level]) - subtree[level]
+            group_first = np.r_[True, up[1:] != up[:-1]]
+            first_index = np.maximum.accumulate(np.where(group_first, np.arange(len(level)), 0))
+            start[level] = start[up] + strands[up] + before - before[first_index]
+        
+        segments = np.flatnonzero((parent >= 0) & (subtree > 0))
+        sizing = cls._size_segments(subtree[segments], tree['length'][segments],
+                                    cls._cost_table(costs))
+        sizes, cables = sizing['counts'], sizing['cables']
+        
+        capacity = np.zeros(len(strands), dtype=np.int64)
+        cost = np.zeros(len(strands))
+        capacity[segments] = sizing['capacity']
+        cost[segments] = sizing['cost']
+        mix = [''] * len(strands)
+        for segment, row in zip(segments.tolist(), cables.tolist()):
+            mix[segment] = ' + '.join(f"{count}x{size}" for size, count
+                                      in zip(sizes.tolist(), row) if count)
+        cable_count = np.zeros(len(strands), dtype=np.int64)
+        cable_count[segments] = cables.sum(axis=1)
+        
+        has_strands = strands > 0
+        names = tree['names']
+        frame = pd.DataFrame({
+            'node': names,
+            'parent': np.where(parent >= 0, names[np.maximum(parent, 0)], ''),
+            'length': tree['length'],
+            'strands': strands,
+            'strand_first': np.where(has_strands, start + 1, 0),
+            'strand_last': np.where(has_strands, start + strands, 0),
+            'subtree_strands': subtree,
+            'cables': mix,
+            'cable_count': cable_count,
+            'capacity': capacity,
+            'spare': np.where(capacity > 0, capacity - subtree, 0),
+            'cost': cost,
+        })
+        
+        used = cables.sum(axis=0)
+        return {
+            'nodes': frame,
+            'node_count': len(strands),
+            'segment_count': len(segments),
+            'total_strands': int(strands.sum()),
+            'total_cost': float(cost.sum()),
+            'cable_length': float((cables.sum(axis=1) * tree['length'][segments]).sum()),
+            'cables': {int(size): int(count) for size, count in zip(sizes, used) if count},
         }
 
+def _parse_cables(text: str) -> List[float]:
+    """Cable diameters from '14,14,9.5' or '2x14,9.5'."""
+    diameters = []
+    for item in text.split(','):
+        count, sep, diameter = item.strip().rpartition('x')
+        try:
+            diameters += [float(diameter)] * (int(count) if sep else 1)
+        except ValueError:
+            raise click.BadParameter(f"expected diameters like 2x14,9.5, got {item!r}",
+                                     param_hint='--cables')
+    return diameters
+
+
 @click.command()
-@click.option('--calc-type', type=click.Choice(['strands', 'conduit']), required=True)
+@click.option('--calc-type', required=True,
+              type=click.Choice(['strands', 'conduit', 'conduit-size', 'ducts', 'campus']))
 @click.option('--endpoints', type=int, help='Number of endpoints')
 @click.option('--redundancy', type=float, default=1.5, help='Redundancy factor')
 @click.option('--growth', type=float, default=1.3, help='Growth factor')
 @click.option('--conduit-diameter', type=float, help='Conduit diameter (mm)')
 @click.option('--cable-diameter', type=float, help='Cable diameter (mm)')
 @click.option('--cable-count', type=int, default=1, help='Number of cables')
-def main(calc_type, endpoints, redundancy, growth, conduit_diameter, cable_diameter, cable_count):
+@click.option('--cables', help='Mixed cable diameters (mm), e.g. 2x14,9.5')
+@click.option('--ducts', type=click.IntRange(min=1), help='Ducts: parallel ducts available')
+@click.option('--inventory', 'inventory_path', type=click.Path(exists=True, dir_okay=False),
+              help='Conduit: cable inventory (conduit, cable_diameter[, conduit_diameter])')
+@click.option('--conduits', 'conduits_path', type=click.Path(exists=True, dir_okay=False),
+              help='Conduit: conduit table (conduit, conduit_diameter)')
+@click.option('--nodes', 'nodes_path', type=click.Path(exists=True, dir_okay=False),
+              help='Campus: node table (node, parent, length, strands or endpoints)')
+@click.option('--costs', 'costs_path', type=click.Path(exists=True, dir_okay=False),
+              help='Campus: cable cost table (count, cost_per_m, fixed_cost)')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False),
+              help='Campus plan or conduit inventory results (.csv or .parquet)')
+@format_option
+@profiling.profile_option
+def main(calc_type, endpoints, redundancy, growth, conduit_diameter, cable_diameter, cable_count,
+         cables, ducts, inventory_path, conduits_path, nodes_path, costs_path, output_path,
+         format):
     """Capacity planning for fiber infrastructure."""
-    console = Console()
+    if calc_type == 'campus':
+        _run_campus(nodes_path, costs_path, output_path, redundancy, growth, format)
+        return
+    if calc_type == 'conduit' and inventory_path:
+        _run_inventory(inventory_path, conduits_path, output_path, format)
+        return
+    diameters = _parse_cables(cables) if cables else None
+    if calc_type in ('conduit-size', 'ducts') and not diameters:
+        raise click.UsageError(f"--calc-type {calc_type} requires --cables")
+    if calc_type == 'ducts' and not (conduit_diameter and ducts):
+        raise click.UsageError("--calc-type ducts requires --conduit-diameter and --ducts")
     
     if calc_type == 'strands':
         result = CapacityPlanner.calculate_strand_count(endpoints, redundancy, growth)
-        console.print(f"\nRecommended strand count: {result['recommended_count']}")
+    elif calc_type == 'conduit' and diameters:
+        result = CapacityPlanner.conduit_fill_mixed(conduit_diameter, diameters)
     elif calc_type == 'conduit':
         result = CapacityPlanner.conduit_fill(conduit_diameter, cable_diameter, cable_count)
+    elif calc_type == 'conduit-size':
+        result = CapacityPlanner.smallest_conduit(diameters)
+    elif calc_type == 'ducts':
+        result = CapacityPlanner.assign_ducts(diameters, conduit_diameter, ducts)
+    
+    if format != 'table':
+        emit(result, format)
+        return
+    
+    from rich.console import Console
+    console = Console()
+    
+    if calc_type == 'strands':
+        console.print(f"\nRecommended strand count: {result['recommended_count']}")
+    elif calc_type == 'conduit':
         console.print(f"\nFill: {result['fill_percent']:.1f}% (Max: {result['max_fill_percent']}%)")
+        if result['jam_ratio'] is not None:
+            console.print(f"Jam ratio: {result['jam_ratio']:.2f}"
+                          f"{' (jam risk)' if result['jam_risk'] else ''}")
         console.print(f"Compliant: {'Yes' if result['compliant'] else 'No'}")
+    elif calc_type == 'conduit-size':
+        if result['trade_size'] is None:
+            console.print("\n[red]No standard conduit size holds these cables[/red]")
+        else:
+            console.print(f"\nSmallest conduit: {result['trade_size']} in. EMT "
+                          f"({result['conduit_diameter']} mm ID), fill "
+                          f"{result['fill_percent']:.1f}% (Max: {result['max_fill_percent']}%)")
+    elif calc_type == 'ducts':
+        console.print(f"\nDucts used: {result['ducts_used']} of {ducts}")
+        for number, duct in enumerate(result['ducts'], 1):
+            sizes = ', '.join(f"{diameters[i]:g}" for i in duct['cables'])
+            console.print(f"Duct {number}: {sizes} mm - fill {duct['fill_percent']:.1f}% "
+                          f"(Max: {duct['max_fill_percent']}%)")
+        if result['unplaced']:
+            sizes = ', '.join(f"{diameters[i]:g}" for i in result['unplaced'])
+            console.print(f"[red]Unplaced: {sizes} mm[/red]")
+
+
+def _run_inventory(inventory_path, conduits_path, output_path, format):
+    conduits = read_table(conduits_path) if conduits_path else None
+    try:
+        results = CapacityPlanner.conduit_fill_batch(read_table(inventory_path), conduits)
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+    if output_path:
+        from .table_io import ChunkWriter
+        with ChunkWriter(output_path) as writer:
+            writer.write(results)
+    
+    summary = {
+        'conduits': len(results),
+        'cables': int(results['cable_count'].sum()),
+        'compliant': int(results['compliant'].sum()),
+        'overfilled': int((results['fill_percent'] > results['max_fill_percent']).sum()),
+        'jam_risk': int(results['jam_risk'].sum()),
+        'missing_diameter': int(results['conduit_diameter'].isna().sum()),
+    }
+    if format != 'table':
+        if output_path:
+            summary['output'] = output_path
+        emit(summary, format)
+        return
+    
+    from rich.console import Console
+    console = Console()
+    console.print(f"\n[bold cyan]Checked {summary['conduits']} conduits "
+                  f"({summary['cables']} cables)[/bold cyan]")
+    console.print(f"[green]Compliant: {summary['compliant']}[/green]  "
+                  f"[red]Overfilled: {summary['overfilled']}[/red]  "
+                  f"[yellow]Jam risk: {summary['jam_risk']}[/yellow]")
+    if summary['missing_diameter']:
+        console.print(f"No conduit diameter: {summary['missing_diameter']}")
+    if output_path:
+        console.print(f"Results -> {output_path}")
+    console.print()
+
+
+def _run_campus(nodes_path, costs_path, output_path, redundancy, growth, format):
+    if not nodes_path:
+        raise click.UsageError("--calc-type campus requires --nodes")
+    costs = read_table(costs_path) if costs_path else None
+    try:
+        plan = CapacityPlanner.plan_campus(read_table(nodes_path), costs, redundancy, growth)
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+    if output_path:
+        from .table_io import ChunkWriter
+        with ChunkWriter(output_path) as writer:
+            writer.write(plan['nodes'])
+    
+    summary = {key: value for key, value in plan.items() if key != 'nodes'}
+    if format != 'table':
+        if output_path:
+            summary['output'] = output_path
+        emit(summary, format)
+        return
+    
+    from rich.console import Console
+    from rich.table import Table
+    
+    console = Console()
+    table = Table(title="Campus Cable Plan")
+    table.add_column("Cable", style="cyan", justify="right")
+    table.add_column("Cables", justify="right")
+    for size, count in plan['cables'].items():
+        table.add_row(f"{size}F", str(count))
+    console.print()
+    console.print(table)
+    console.print(f"Nodes: {plan['node_count']}  Segments: {plan['segment_count']}  "
+                  f"Strands: {plan['total_strands']}  "
+                  f"Cable: {plan['cable_length'] / 1000:.2f} km  "
+                  f"[bold]Cost: {plan['total_cost']:,.2f}[/bold]")
+    if output_path:
+        console.print(f"Plan -> {output_path}")
+    console.print()
+
 
 if __name__ == '__main__':
     main()
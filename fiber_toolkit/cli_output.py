@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+CLI Output
+Machine-readable output shared by the command-line tools.
+
+``--format table`` (the default) renders with rich; ``plain`` and ``json``
+write with the standard library only, so scripted calls never import rich.
+
+Author: David Osisek (CFOt)
+"""
+
+import json
+from typing import Dict, Iterator, Tuple
+
+import click
+
+FORMATS = ('table', 'plain', 'json')
+
+format_option = click.option(
+    '--format', type=click.Choice(FORMATS), default='table', show_default=True,
+    help='Output format; plain and json skip the rich renderer')
+
+
+def _flatten(data, prefix: str = '') -> Iterator[Tuple[str, object]]:
+    """Yield (dotted key, value) pairs from nested dicts and lists."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _flatten(value, f"{prefix}{key}.")
+    elif isinstance(data, (list, tuple)):
+        for index, value in enumerate(data):
+            yield from _flatten(value, f"{prefix}{index}.")
+    else:
+        yield prefix.rstrip('.'), data
+
+
+def emit(data: Dict, format: str):
+    """
+    Write a result in a machine-readable format.
+
+    Args:
+        data: JSON-serializable result
+        format: 'json' (indented document) or 'plain' (one
+            ``key<TAB>value`` line per leaf, nested keys dotted)
+    """
+    if format == 'json':
+        click.echo(json.dumps(data, indent=2))
+        return
+    for key, value in _flatten(data):
+        click.echo(f"{key}\t{'' if value is None else value}")
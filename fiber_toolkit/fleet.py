@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Link Fleet
+Incremental what-if recomputation over many link budgets.
+
+A ``LinkFleet`` keeps every link's budget inputs and loss components in
+columns. Changing a parameter for a subset of links (or changing a
+standard value such as the typical connector loss) recomputes only those
+rows and only the loss components that depend on the change, and reports
+which links moved between PASS, MARGINAL and FAIL. Results are
+identical to ``LinkBudget.calculate_batch`` on the edited fleet.
+
+Author: David Osisek (CFOt)
+"""
+
+import time
+from typing import TYPE_CHECKING, Dict
+
+import click
+
+from . import profiling
+from .cli_output import emit, format_option
+from .link_budget import LinkBudget
+from .spectral import attenuation
+from .table_io import DEFAULT_CHUNK_SIZE, ChunkWriter, read_table
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Budget inputs held per link
+FLOAT_INPUTS = ('tx_power', 'rx_sensitivity', 'fiber_length', 'wavelength',
+                'connector_count', 'splice_count', 'safety_margin',
+                'connector_loss', 'splice_loss', 'fiber_loss')
+
+# Loss component -> (count or length, unit loss) it is the product of
+COMPONENTS = {
+    'fiber': ('fiber_length', 'fiber_loss'),
+    'connector': ('connector_count', 'connector_loss'),
+    'splice': ('splice_count', 'splice_loss'),
+}
+
+# Unit losses that follow a standard value unless set per link; fiber
+# loss follows the spectral curve of the link's type and wavelength
+STANDARD_VALUES = {
+    'connector_loss': LinkBudget.CONNECTOR_LOSS_TYPICAL,
+    'splice_loss': LinkBudget.FUSION_SPLICE_TYPICAL,
+}
+
+# Status tiers collapsed to their reported text (PASS, MARGINAL, FAIL)
+STATUSES = tuple(dict.fromkeys(LinkBudget.STATUS_TEXT))
+_STATUS_INDEX = tuple(STATUSES.index(text) for text in LinkBudget.STATUS_TEXT)
+
+
+class LinkFleet:
+    """Columnar link budgets with delta updates and status-change reports."""
+
+    def __init__(self, data=None, id_column: str = 'link_id', **columns):
+        """
+        Evaluate a fleet of links.
+
+        Args:
+            data: DataFrame or mapping of link columns, as for
+                ``LinkBudget.calculate_batch``; other DataFrame columns
+                (IDs, routes, notes) are kept as attributes for selecting
+                and reporting
+            id_column: Attribute used as the link ID in reports
+            **columns: Column arrays or scalars, overriding ``data``
+        """
+        import numpy as np
+
+        inputs = LinkBudget._batch_inputs(data, columns)
+        self.columns = {name: np.array(inputs[name], dtype=float) for name in FLOAT_INPUTS}
+        # Fiber types as codes into ``fiber_types``
+        fiber_types, codes = np.unique(inputs['fiber_type'], return_inverse=True)
+        self.fiber_types = fiber_types.tolist()
+        self.columns['fiber_type'] = codes.reshape(-1).astype(np.int16)
+        self._standard = {
+            'connector_loss': np.isnan(inputs['custom_connector_loss']),
+            'splice_loss': np.isnan(inputs['custom_splice_loss']),
+            'fiber_loss': np.isnan(inputs['custom_fiber_loss']),
+        }
+        self.standards = dict(STANDARD_VALUES)
+
+        used = {alias for aliases in LinkBudget.BATCH_COLUMNS.values() for alias in aliases}
+        self.attributes = {}
+        if hasattr(data, 'columns'):
+            for name in data.columns:
+                if name not in used:
+                    self.attributes[name] = data[name].to_numpy()
+        self.id_column = id_column
+        self._id_index = None
+
+        self.totals = {
+            component: self.columns[count] * self.columns[unit]
+            for component, (count, unit) in COMPONENTS.items()
+        }
+        self.som = self._som(self.columns, self.totals)
+        self.status_code = LinkBudget.status_codes(self.som)
+        self._counts = np.bincount(np.asarray(_STATUS_INDEX)[self.status_code],
+                                   minlength=len(STATUSES))
+
+    @classmethod
+    def from_table(cls, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   id_column: str = 'link_id') -> 'LinkFleet':
+        """Load a fleet from a CSV/Parquet links file (same columns as batch mode)."""
+        return cls(read_table(path, chunk_size), id_column=id_column)
+
+    @staticmethod
+    def _som(columns: Dict, totals: Dict) -> 'np.ndarray':
+        # Same operation order as LinkBudget.calculate_batch, so results match exactly
+        power_budget = columns['tx_power'] - columns['rx_sensitivity']
+        total_loss = totals['fiber'] + totals['connector'] + totals['splice']
+        return power_budget - total_loss - columns['safety_margin']
+
+    def __len__(self):
+        return len(self.som)
+
+    # ------------------------------------------------------------------
+    # Selecting links
+
+    def _rows(self, links, return_order: bool = False):
+        """
+        Row indices for None (all), a slice, a boolean mask or indices.
+
+        Rows come back sorted and unique. With ``return_order``, also
+        returns the positions in ``links`` that each row was taken from
+        (the last one for a repeated row), or None when ``links`` was
+        already in order, so per-link values can follow their rows.
+        """
+        import numpy as np
+
+        order = None
+        if links is None:
+            rows = np.arange(len(self))
+        elif isinstance(links, slice):
+            rows = np.arange(len(self))[links]
+        else:
+            links = np.asarray(links)
+            if links.dtype == bool:
+                rows = np.flatnonzero(links)
+            else:
+                rows = links.astype(np.intp).reshape(-1)
+                if len(rows) > 1 and not (rows[1:] > rows[:-1]).all():
+                    # Each row once, in order; a repeated row keeps its last value
+                    rows, last = np.unique(rows[::-1], return_index=True)
+                    order = len(links) - 1 - last
+        return (rows, order) if return_order else rows
+
+    def select(self, **equals) -> 'np.ndarray':
+        """
+        Row indices of links whose columns equal the given values.
+
+        Attributes (``route='R7'``) and budget inputs
+        (``fiber_type='MM'``, ``connector_count=4``) can be combined;
+        list values match any of their items.
+        """
+        import numpy as np
+
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in equals.items():
+            if name == 'fiber_type':
+                column = self.columns[name]
+                names = value if isinstance(value, (list, tuple, set)) else [value]
+                value = [self.fiber_types.index(v) for v in names if v in self.fiber_types]
+            elif name in self.attributes:
+                column = self.attributes[name]
+            elif name in self.columns:
+                column = self.columns[name]
+            else:
+                raise KeyError(f"Unknown fleet column: {name}")
+            if isinstance(value, (list, tuple, set)):
+                mask &= np.isin(column, list(value))
+            else:
+                mask &= column == value
+        return np.flatnonzero(mask)
+
+    def index(self, ids) -> 'np.ndarray':
+        """Row indices of the given link IDs (``id_column``)."""
+        import numpy as np
+        import pandas as pd
+
+        if self._id_index is None:
+            if self.id_column not in self.attributes:
+                raise KeyError(f"Fleet has no ID column: {self.id_column}")
+            self._id_index = pd.Index(self.attributes[self.id_column])
+        ids = list(ids)
+        rows = self._id_index.get_indexer(ids)
+        if (rows < 0).any():
+            raise KeyError(f"Unknown link ID: {ids[int(np.argmax(rows < 0))]}")
+        return rows.astype(np.intp)
+
+    # ------------------------------------------------------------------
+    # Delta updates
+
+    def update(self, links=None, apply: bool = True, **changes) -> Dict:
+        """
+        Change budget inputs for some links and recompute only those rows.
+
+        Args:
+            links: Rows to change (see ``select`` and ``index``); None
+                changes every link
+            apply: False previews the change without modifying the fleet
+            **changes: New values, scalar or one per selected link, for
+                any ``LinkBudget.BATCH_COLUMNS`` name; a unit loss of NaN
+                or 0 returns those links to the standard value
+
+        Returns:
+            Change report (see ``_change``)
+        """
+        unknown = set(changes) - set(LinkBudget.BATCH_COLUMNS)
+        if unknown:
+            raise TypeError(f"Unknown link budget column: {', '.join(sorted(unknown))}")
+        rows, order = self._rows(links, return_order=True)
+        if order is not None:
+            count = len(links)
+            changes = {name: self._reorder(name, value, order, count)
+                       for name, value in changes.items()}
+        return self._change(rows, changes, standard=False, apply=apply)
+
+    @staticmethod
+    def _reorder(name: str, value, order: 'np.ndarray', count: int):
+        """Put a per-link value in sorted row order; scalars pass through."""
+        import numpy as np
+
+        if np.ndim(value) == 0:
+            return value
+        value = np.asarray(value)
+        if len(value) != count:
+            raise ValueError(f"{name}: expected {count} values, one per link, got {len(value)}")
+        return value[order]
+
+    def what_if(self, links=None, **changes) -> Dict:
+        """Report the effect of ``update`` without applying it."""
+        return self.update(links, apply=False, **changes)
+
+    def set_standard(self, name: str, value: float, apply: bool = True) -> Dict:
+        """
+        Change a standard unit loss for every link that uses it.
+
+        Links with their own value for ``name`` are not touched.
+
+        Args:
+            name: 'connector_loss' or 'splice_loss'
+            value: New standard value (dB per mated pair or splice)
+            apply: False previews the change without modifying the fleet
+
+        Returns:
+            Change report (see ``_change``)
+        """
+        if name not in STANDARD_VALUES:
+            raise ValueError(f"Not a standard value: {name}")
+        import numpy as np
+
+        rows = np.flatnonzero(self._standard[name])
+        report = self._change(rows, {name: value}, standard=True, apply=apply)
+        if apply:
+            self.standards[name] = float(value)
+        return report
+
+    def _fiber_type_codes(self, value, shape) -> 'np.ndarray':
+        """Codes for fiber type names, adding new names to ``fiber_types``."""
+        import numpy as np
+
+        names, inverse = np.unique(
+            np.broadcast_to(np.asarray(value, dtype=object), shape).astype(str),
+            return_inverse=True)
+        for name in names.tolist():
+            if name not in self.fiber_types:
+                self.fiber_types.append(name)
+        lookup = np.array([self.fiber_types.index(name) for name in names.tolist()],
+                          dtype=np.int16)
+        return lookup[inverse.reshape(shape)]
+
+    def _change(self, rows: 'np.ndarray', changes: Dict, standard: bool,
+                apply: bool) -> Dict:
+        """
+        Recompute ``rows`` with ``changes`` applied.
+
+        Only the inputs and loss components the change touches are
+        gathered; everything else for the rows is read from the stored
+        totals.
+
+        Returns:
+            Dictionary with ``updated`` (rows recomputed), ``changed``
+            (rows whose status text changed), ``transitions``
+            ({'PASS -> FAIL': n, ...}), ``rows``, ``before``, ``after``,
+            ``som_before`` and ``som_after`` for the changed rows,
+            ``summary`` (status counts after the change) and ``applied``
+        """
+        import numpy as np
+
+        local, standard_mask = {}, {}
+
+        def get(name):
+            if name not in local:
+                local[name] = self.columns[name][rows]
+            return local[name]
+
+        def is_standard(name):
+            if name not in standard_mask:
+                standard_mask[name] = self._standard[name][rows]
+            return standard_mask[name]
+
+        for name, value in changes.items():
+            if name == 'fiber_type':
+                local[name] = self._fiber_type_codes(value, rows.shape)
+                continue
+            value = np.array(np.broadcast_to(np.asarray(value, dtype=float), rows.shape))
+            if name in self._standard and not standard:
+                # Matches the constructor's ``value or default`` rule
+                revert = np.isnan(value) | (value == 0)
+                standard_mask[name] = revert
+                if name in STANDARD_VALUES:
+                    value[revert] = self.standards[name]
+            local[name] = value
+
+        if {'wavelength', 'fiber_type', 'fiber_loss'} & set(changes):
+            on_curve = is_standard('fiber_loss')
+            if on_curve.any():
+                fiber_loss = get('fiber_loss').copy()
+                codes, wavelength = get('fiber_type'), get('wavelength')
+                for code in np.flatnonzero(np.bincount(codes[on_curve])):
+                    selected = on_curve & (codes == code)
+                    fiber_loss[selected] = attenuation(self.fiber_types[code],
+                                                       wavelength[selected])
+                local['fiber_loss'] = fiber_loss
+
+        totals = {}
+        for component, (count, unit) in COMPONENTS.items():
+            if count in local or unit in local:
+                totals[component] = get(count) * get(unit)
+            else:
+                totals[component] = self.totals[component][rows]
+        som = self._som({name: get(name) for name in
+                         ('tx_power', 'rx_sensitivity', 'safety_margin')}, totals)
+        status_code = LinkBudget.status_codes(som)
+
+        status_index = np.asarray(_STATUS_INDEX)
+        before = status_index[self.status_code[rows]]
+        after = status_index[status_code]
+        n = len(STATUSES)
+        pairs = np.bincount(before * n + after, minlength=n * n).reshape(n, n)
+        counts = self._counts - pairs.sum(axis=1) + pairs.sum(axis=0)
+        moved = before != after
+
+        report = {
+            'updated': len(rows),
+            'changed': int(moved.sum()),
+            'transitions': {
+                f"{STATUSES[i]} -> {STATUSES[j]}": int(pairs[i, j])
+                for i in range(n) for j in range(n) if i != j and pairs[i, j]
+            },
+            'rows': rows[moved],
+            'before': np.asarray(STATUSES)[before[moved]],
+            'after': np.asarray(STATUSES)[after[moved]],
+            'som_before': self.som[rows][moved],
+            'som_after': som[moved],
+            'summary': dict(zip(STATUSES, counts.tolist())),
+            'applied': apply,
+        }
+
+        if apply:
+            for name, values in local.items():
+                self.columns[name][rows] = values
+            for name, mask in standard_mask.items():
+                self._standard[name][rows] = mask
+            for component, values in totals.items():
+                self.totals[component][rows] = values
+            self.som[rows] = som
+            self.status_code[rows] = status_code
+            self._counts = counts
+        return report
+
+    # ------------------------------------------------------------------
+    # Results
+
+    def summary(self) -> Dict:
+        """Link count and links per status."""
+        return dict({'links': len(self)}, **dict(zip(STATUSES, self._counts.tolist())))
+
+    def to_frame(self, links=None):
+        """
+        Links as a DataFrame: attributes, inputs and budget results.
+
+        Result columns are named like ``link_budget.run_batch`` output,
+        with the loss totals under ``LinkBudget.TOTAL_COLUMNS`` names
+        (``fiber_loss_total`` is the fiber total in dB).
+        """
+        import numpy as np
+        import pandas as pd
+
+        rows = self._rows(links)
+        frame = {name: values[rows] for name, values in self.attributes.items()}
+        for name in ('tx_power', 'rx_sensitivity', 'fiber_length', 'wavelength'):
+            frame[name] = self.columns[name][rows]
+        frame['fiber_type'] = np.asarray(self.fiber_types, dtype=object)[
+            self.columns['fiber_type'][rows]]
+        for name in ('connector_count', 'splice_count'):
+            frame[name] = self.columns[name][rows]
+        frame.update({
+            'power_budget': self.columns['tx_power'][rows] - self.columns['rx_sensitivity'][rows],
+            'fiber_loss_total': self.totals['fiber'][rows],
+            'connector_loss_total': self.totals['connector'][rows],
+            'splice_loss_total': self.totals['splice'][rows],
+            'total_loss': (self.totals['fiber'][rows] + self.totals['connector'][rows]
+                           + self.totals['splice'][rows]),
+            'safety_margin': self.columns['safety_margin'][rows],
+            'som': self.som[rows],
+            'status_code': self.status_code[rows],
+            'status': np.asarray(LinkBudget.STATUS_TEXT)[self.status_code[rows]],
+        })
+        return pd.DataFrame(frame)
+
+
+def _parse_assignments(items, option: str) -> Dict:
+    """Parse repeated ``name=value`` options; values are numbers where possible."""
+    parsed = {}
+    for item in items:
+        name, sep, value = item.partition('=')
+        if not sep or not name:
+            raise click.BadParameter(f"expected name=value, got {item!r}",
+                                     param_hint=option)
+        try:
+            parsed[name] = float(value)
+        except ValueError:
+            parsed[name] = value
+    return parsed
+
+
+def _selection(fleet: LinkFleet, where: Dict):
+    """Rows matching ``--where`` filters (None = all links)."""
+    if not where:
+        return None
+    filters = {}
+    for name, value in where.items():
+        column = fleet.attributes.get(name, fleet.columns.get(name))
+        if column is None:
+            raise click.BadParameter(f"Unknown column: {name}", param_hint='--where')
+        if column.dtype == object and not isinstance(value, str):
+            # IDs like 1234 are read as numbers by the parser but strings in the file
+            value = [value, f"{value:g}"]
+        filters[name] = value
+    return fleet.select(**filters)
+
+
+@click.command()
+@click.option('--links', 'links_path', type=click.Path(exists=True, dir_okay=False),
+              required=True, help='Links file (.csv or .parquet), as for batch mode')
+@click.option('--set', 'assignments', multiple=True, metavar='NAME=VALUE',
+              help='Change a budget input (e.g. fiber_loss=0.22) for the selected links')
+@click.option('--where', multiple=True, metavar='COLUMN=VALUE',
+              help='Select links by attribute or input (e.g. route=R7); repeatable')
+@click.option('--standard', multiple=True, metavar='NAME=VALUE',
+              help='Change a standard value (connector_loss, splice_loss) fleet-wide')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False),
+              help='Write the links whose status changed (.csv or .parquet)')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+              show_default=True, help='Rows read per chunk')
+@format_option
+@profiling.profile_option
+def main(links_path, assignments, where, standard, output_path, chunk_size, format):
+    """What-if recomputation of a link fleet: which links change status."""
+    changes = _parse_assignments(assignments, '--set')
+    standards = _parse_assignments(standard, '--standard')
+    filters = _parse_assignments(where, '--where')
+    if filters and not changes:
+        raise click.UsageError("--where selects the links --set changes")
+    for name in standards:
+        if name not in STANDARD_VALUES:
+            raise click.BadParameter(f"Not a standard value: {name}", param_hint='--standard')
+
+    fleet = LinkFleet.from_table(links_path, chunk_size)
+    before = fleet.summary()
+    before_status = fleet.status_code.copy()
+    before_som = fleet.som.copy()
+
+    started = time.perf_counter()
+    updated = 0
+    try:
+        for name, value in standards.items():
+            updated += fleet.set_standard(name, value)['updated']
+        if changes:
+            updated += fleet.update(_selection(fleet, filters), **changes)['updated']
+    except (TypeError, ValueError) as exc:
+        raise click.UsageError(str(exc))
+    elapsed = time.perf_counter() - started
+
+    # Net effect of all changes, against the fleet as loaded
+    import numpy as np
+
+    status_index = np.asarray(_STATUS_INDEX)
+    old, new = status_index[before_status], status_index[fleet.status_code]
+    moved = np.flatnonzero(old != new)
+    n = len(STATUSES)
+    pairs = np.bincount(old[moved] * n + new[moved], minlength=n * n).reshape(n, n)
+    transitions = {f"{STATUSES[i]} -> {STATUSES[j]}": int(pairs[i, j])
+                   for i in range(n) for j in range(n) if pairs[i, j]}
+    after = fleet.summary()
+
+    if output_path:
+        changed = fleet.to_frame(moved)
+        changed.insert(len(changed.columns) - 2, 'som_before', before_som[moved])
+        changed['status_before'] = np.asarray(STATUSES)[old[moved]]
+        with ChunkWriter(output_path) as writer:
+            writer.write(changed)
+
+    if format != 'table':
+        result = {'before': before, 'after': after, 'changed': len(moved),
+                  'transitions': transitions, 'updated': updated,
+                  'update_ms': round(elapsed * 1000, 3)}
+        if output_path:
+            result['output'] = output_path
+        emit(result, format)
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    colors = {'PASS': 'green', 'MARGINAL': 'yellow', 'FAIL': 'red'}
+    table = Table(title=f"Fleet what-if ({after['links']} links)")
+    table.add_column("Status", style="cyan")
+    table.add_column("Before", justify="right")
+    table.add_column("After", justify="right")
+    table.add_column("Change", justify="right")
+    for status in STATUSES:
+        delta = after[status] - before[status]
+        table.add_row(f"[{colors[status]}]{status}[/{colors[status]}]",
+                      str(before[status]), str(after[status]), f"{delta:+d}")
+    console.print()
+    console.print(table)
+    console.print(f"Recomputed {updated} links in {elapsed * 1000:.1f} ms; "
+                  f"{len(moved)} changed status")
+    for transition, count in transitions.items():
+        console.print(f"  {transition}: {count}")
+    if output_path:
+        console.print(f"Changed links -> {output_path}")
+    console.print()
+
+
+if __name__ == '__main__':
+    main()
@@ -8,9 +8,17 @@ Standards: FOA, TIA-568
 """
 
 import click
-from rich.console import Console
-from rich.table import Table
-from typing import Dict
+from functools import partial
+from typing import TYPE_CHECKING, Dict
+
+from . import profiling
+from .cli_output import emit, format_option
+from .parallel import imap_ordered
+from .spectral import attenuation
+from .table_io import DEFAULT_CHUNK_SIZE, ChunkWriter, iter_chunks
+
+if TYPE_CHECKING:
+    import numpy as np  # imported where used; single-link runs never load it
 
 
 class LinkBudget:
@@ -28,17 +36,63 @@ class LinkBudget:
     SAFETY_MARGIN_MIN = 3.0        # dB
     SAFETY_MARGIN_PREFERRED = 6.0  # dB
     
-    # Fiber attenuation (dB/km)
-    FIBER_LOSS = {
-        'SM': {
-            1310: 0.35,
-            1550: 0.25,
-        },
-        'MM': {
-            850: 3.0,
-            1300: 1.0,
-        }
+    # SOM status tiers, indexed by status code
+    STATUS_EXCELLENT = 0
+    STATUS_GOOD = 1
+    STATUS_MARGINAL = 2
+    STATUS_FAIL = 3
+    STATUS_THRESHOLDS = (0.0, 3.0, 6.0)  # dB, ascending tier boundaries
+    STATUS_TEXT = ('PASS', 'PASS', 'MARGINAL', 'FAIL')
+    STATUS_DETAIL = (
+        'Excellent margin',
+        'Good margin',
+        'Low margin - monitor',
+        'Insufficient margin',
+    )
+    
+    # Result files name the loss totals apart from the per-unit input
+    # columns, which pass through, so an output file reads back as input
+    TOTAL_COLUMNS = {
+        'fiber_loss': 'fiber_loss_total',
+        'connector_loss': 'connector_loss_total',
+        'splice_loss': 'splice_loss_total',
+    }
+    
+    # Batch input columns and the aliases accepted for each
+    BATCH_COLUMNS = {
+        'tx_power': ('tx_power',),
+        'rx_sensitivity': ('rx_sensitivity',),
+        'fiber_length': ('fiber_length', 'length'),
+        'wavelength': ('wavelength',),
+        'fiber_type': ('fiber_type',),
+        'connector_count': ('connector_count', 'connectors'),
+        'splice_count': ('splice_count', 'splices'),
+        'connector_loss': ('connector_loss',),
+        'splice_loss': ('splice_loss',),
+        'fiber_loss': ('fiber_loss',),
+        'safety_margin': ('safety_margin', 'margin'),
+    }
+    
+    # Inverse solvers: solved quantity -> (result column, input it replaces)
+    SOLVE_TARGETS = {
+        'length': ('max_length', 'fiber_length'),
+        'connectors': ('max_connectors', 'connector_count'),
+        'splices': ('max_splices', 'splice_count'),
+        'tx-power': ('min_tx_power', 'tx_power'),
+    }
+    
+    # Monte Carlo mode: component losses are drawn between a floor mirroring
+    # the max below the typical value (clipped at 0 dB) and the FOA max
+    MC_DISTRIBUTIONS = ('triangular', 'uniform', 'normal')
+    MC_SPLICE_TYPES = {
+        'fusion': (FUSION_SPLICE_TYPICAL, FUSION_SPLICE_MAX),
+        'mechanical': (MECHANICAL_SPLICE_TYPICAL, MECHANICAL_SPLICE_MAX),
     }
+    MC_PERCENTILES = (1, 5, 50, 95, 99)
+    MC_CHUNK_ELEMENTS = 1 << 22  # component draws held at once (32 MB)
+    MC_BINS = 1 << 14            # resolution of the loss distribution
+    MC_MAX_LOSS_MIXES = 128       # distinct (connector, splice) unit losses drawn
+    MC_LOSS_STEP = 0.01          # dB, first grid unit losses are bucketed to
     
     def __init__(
         self,
@@ -90,15 +144,10 @@ class LinkBudget:
             self.fiber_loss = self._get_fiber_loss(fiber_type, wavelength)
     
     def _get_fiber_loss(self, fiber_type: str, wavelength: int) -> float:
-        """Get standard fiber loss for type and wavelength."""
-        if fiber_type not in self.FIBER_LOSS:
-            return 0.35  # Default SM @ 1310
-        
-        wavelengths = self.FIBER_LOSS[fiber_type]
-        # Find closest wavelength
-        closest = min(wavelengths.keys(), key=lambda x: abs(x - wavelength))
-        return wavelengths[closest]
+        """Get standard fiber loss for type and wavelength (spectral curve)."""
+        return attenuation(fiber_type, wavelength)
     
+    @profiling.timed('link_budget.calculate')
     def calculate(self) -> Dict:
         """
         Calculate link budget.
@@ -120,17 +169,15 @@ class LinkBudget:
         
         # Status
         if som >= 6.0:
-            status = "PASS"
-            status_detail = "Excellent margin"
+            code = self.STATUS_EXCELLENT
         elif som >= 3.0:
-            status = "PASS"
-            status_detail = "Good margin"
+            code = self.STATUS_GOOD
         elif som >= 0:
-            status = "MARGINAL"
-            status_detail = "Low margin - monitor"
+            code = self.STATUS_MARGINAL
         else:
-            status = "FAIL"
-            status_detail = "Insufficient margin"
+            code = self.STATUS_FAIL
+        status = self.STATUS_TEXT[code]
+        status_detail = self.STATUS_DETAIL[code]
         
         return {
             'power_budget': power_budget,
@@ -144,8 +191,553 @@ class LinkBudget:
             'status_detail': status_detail,
         }
     
+    @classmethod
+    def status_codes(cls, som) -> 'np.ndarray':
+        """
+        Map an array of SOM values (dB) to status codes.
+        
+        NaN (a link with a missing power or length) is graded FAIL, as
+        ``calculate()`` grades it.
+        """
+        import numpy as np
+        
+        som = np.asarray(som, dtype=float)
+        tiers = np.searchsorted(cls.STATUS_THRESHOLDS, som, side='right')
+        codes = (cls.STATUS_FAIL - tiers).astype(np.int8)
+        codes[np.isnan(som)] = cls.STATUS_FAIL
+        return codes
+    
+    @classmethod
+    def _batch_fiber_loss(cls, fiber_type, wavelength: 'np.ndarray') -> 'np.ndarray':
+        """Resolve standard fiber loss (dB/km) for every row at once."""
+        import numpy as np
+        
+        types = np.broadcast_to(np.asarray(fiber_type, dtype=object), wavelength.shape)
+        uniques, inverse = np.unique(types.astype(str), return_inverse=True)
+        inverse = inverse.reshape(wavelength.shape)
+        loss = np.empty(wavelength.shape, dtype=float)
+        for i, name in enumerate(uniques):
+            rows = inverse == i
+            loss[rows] = attenuation(name, wavelength[rows])
+        return loss
+    
+    @classmethod
+    def _batch_inputs(cls, data, columns: Dict,
+                      required=('tx_power', 'rx_sensitivity', 'fiber_length')
+                      ) -> Dict[str, 'np.ndarray']:
+        """
+        Resolve batch input columns to broadcast float arrays.
+        
+        Unit losses (``connector_loss``, ``splice_loss``, ``fiber_loss``)
+        are per component or per km, with defaults already applied;
+        ``fiber_type`` is a string array and ``custom_connector_loss``,
+        ``custom_splice_loss`` and ``custom_fiber_loss`` hold the
+        user-supplied values (NaN where the standard value applies).
+        Power and length columns left out of ``required`` are NaN when
+        missing. Blank cells (NaN) take the constructor default in the
+        optional columns - wavelength, component counts, safety margin and
+        fiber type - and stay NaN in power and length, which grades the
+        link FAIL.
+        """
+        import numpy as np
+        
+        source = {}
+        if data is not None:
+            for name, aliases in cls.BATCH_COLUMNS.items():
+                for alias in aliases:
+                    if alias in data:
+                        source[name] = data[alias]
+                        break
+        for name, value in columns.items():
+            if name not in cls.BATCH_COLUMNS:
+                raise TypeError(f"Unknown link budget column: {name}")
+            source[name] = value
+        
+        missing = [n for n in required if n not in source]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        
+        def column(name, default):
+            value = source.get(name)
+            if value is None:
+                value = default
+            value = np.atleast_1d(np.asarray(value, dtype=float))
+            if not np.isnan(default):
+                blank = np.isnan(value)
+                if blank.any():
+                    value = np.where(blank, default, value)
+            return value
+        
+        tx_power = column('tx_power', np.nan)
+        rx_sensitivity = column('rx_sensitivity', np.nan)
+        fiber_length = column('fiber_length', np.nan)
+        wavelength = column('wavelength', 1310)
+        connector_count = column('connector_count', 0)
+        splice_count = column('splice_count', 0)
+        safety_margin = column('safety_margin', 3.0)
+        (tx_power, rx_sensitivity, fiber_length, wavelength, connector_count,
+         splice_count, safety_margin) = np.broadcast_arrays(
+            tx_power, rx_sensitivity, fiber_length, wavelength,
+            connector_count, splice_count, safety_margin)
+        shape = tx_power.shape
+        
+        # Custom unit losses fall back to defaults when missing, NaN or zero,
+        # matching the ``value or default`` rule of the constructor
+        def unit_loss(name, default):
+            custom = np.broadcast_to(column(name, np.nan), shape)
+            return np.where(np.isnan(custom) | (custom == 0), default, custom)
+        
+        connector_loss = unit_loss('connector_loss', cls.CONNECTOR_LOSS_TYPICAL)
+        splice_loss = unit_loss('splice_loss', cls.FUSION_SPLICE_TYPICAL)
+        fiber_type = np.broadcast_to(
+            np.asarray(source.get('fiber_type', 'SM'), dtype=object), shape)
+        blank = np.equal(fiber_type, None) | (fiber_type != fiber_type) | (fiber_type == '')
+        fiber_type = np.where(blank, 'SM', fiber_type).astype(str)
+        standard_fiber_loss = cls._batch_fiber_loss(fiber_type, wavelength)
+        fiber_loss = unit_loss('fiber_loss', standard_fiber_loss)
+        custom_fiber_loss = unit_loss('fiber_loss', np.nan)
+        custom_connector_loss = unit_loss('connector_loss', np.nan)
+        custom_splice_loss = unit_loss('splice_loss', np.nan)
+        
+        return {
+            'tx_power': tx_power,
+            'rx_sensitivity': rx_sensitivity,
+            'fiber_length': fiber_length,
+            'wavelength': wavelength,
+            'connector_count': connector_count,
+            'splice_count': splice_count,
+            'safety_margin': safety_margin,
+            'connector_loss': connector_loss,
+            'splice_loss': splice_loss,
+            'fiber_loss': fiber_loss,
+            'fiber_type': fiber_type,
+            'custom_fiber_loss': custom_fiber_loss,
+            'custom_connector_loss': custom_connector_loss,
+            'custom_splice_loss': custom_splice_loss,
+        }
+    
+    @classmethod
+    @profiling.timed('link_budget.calculate_batch')
+    def calculate_batch(cls, data=None, **columns):
+        """
+        Calculate link budgets for many links in one vectorized pass.
+        
+        Gives the same numbers as building one ``LinkBudget`` per row and
+        calling ``calculate()``, without the per-link objects and dicts.
+        
+        Args:
+            data: Optional pandas DataFrame or mapping of column arrays.
+                Column names follow the constructor arguments; the aliases
+                in ``BATCH_COLUMNS`` (``length``, ``connectors``,
+                ``splices``, ``margin``) are accepted too.
+            **columns: Column arrays or scalars, overriding ``data``.
+        
+        Returns:
+            Dictionary of NumPy arrays keyed like ``calculate()`` plus
+            ``status_code``, or a DataFrame when ``data`` is a DataFrame
+        """
+        import numpy as np
+        
+        inputs = cls._batch_inputs(data, columns)
+        safety_margin = inputs['safety_margin']
+        power_budget = inputs['tx_power'] - inputs['rx_sensitivity']
+        fiber_loss_total = inputs['fiber_length'] * inputs['fiber_loss']
+        connector_loss_total = inputs['connector_count'] * inputs['connector_loss']
+        splice_loss_total = inputs['splice_count'] * inputs['splice_loss']
+        total_loss = fiber_loss_total + connector_loss_total + splice_loss_total
+        som = power_budget - total_loss - safety_margin
+        status_code = cls.status_codes(som)
+        profiling.count('link_budget.links', len(som))
+        
+        results = {
+            'power_budget': power_budget,
+            'fiber_loss': fiber_loss_total,
+            'connector_loss': connector_loss_total,
+            'splice_loss': splice_loss_total,
+            'total_loss': total_loss,
+            'safety_margin': safety_margin,
+            'som': som,
+            'status_code': status_code,
+            'status': np.asarray(cls.STATUS_TEXT)[status_code],
+            'status_detail': np.asarray(cls.STATUS_DETAIL)[status_code],
+        }
+        
+        if hasattr(data, 'columns') and hasattr(data, 'index'):
+            return type(data)(results, index=data.index)
+        return results
+    
+    @classmethod
+    @profiling.timed('link_budget.solve_batch')
+    def solve_batch(cls, solve: str, data=None, target_som: float = None, **columns):
+        """
+        Invert the loss model: the limit that leaves exactly ``target_som``.
+        
+        Closed form per row, no trial runs:
+        
+        - ``length``: longest fiber (km) at the link's attenuation
+        - ``connectors`` / ``splices``: most mated pairs / splices (whole
+          numbers) with the other components and length as given
+        - ``tx-power``: lowest transmitter power (dBm)
+        
+        Args:
+            solve: One of ``SOLVE_TARGETS``
+            data: Optional DataFrame or mapping of link columns, as for
+                ``calculate_batch``; the solved column is not needed and
+                is ignored if present
+            target_som: SOM (dB) to keep after the safety margin, scalar
+                or per row; defaults to the lowest SOM graded PASS
+            **columns: Column arrays or scalars, overriding ``data``
+        
+        Returns:
+            Dictionary of arrays: the solved column (see
+            ``SOLVE_TARGETS``), ``feasible`` (False where even none of the
+            component, or zero length, misses the target; the value is NaN
+            there) and ``som`` at the solved value, or a DataFrame when
+            ``data`` is a DataFrame
+        """
+        import numpy as np
+        
+        if solve not in cls.SOLVE_TARGETS:
+            raise ValueError(f"Unknown solve target: {solve}")
+        name, replaced = cls.SOLVE_TARGETS[solve]
+        required = [n for n in ('tx_power', 'rx_sensitivity', 'fiber_length')
+                    if n != replaced]
+        columns = {key: value for key, value in columns.items() if key != replaced}
+        inputs = cls._batch_inputs(data, columns, required)
+        if target_som is None:
+            target_som = cls.STATUS_THRESHOLDS[1]
+        target_som = np.broadcast_to(np.asarray(target_som, dtype=float),
+                                     inputs['tx_power'].shape)
+        
+        losses = {
+            'fiber_length': inputs['fiber_length'] * inputs['fiber_loss'],
+            'connector_count': inputs['connector_count'] * inputs['connector_loss'],
+            'splice_count': inputs['splice_count'] * inputs['splice_loss'],
+        }
+        other_loss = sum(loss for key, loss in losses.items() if key != replaced)
+        # Loss the solved quantity may take up while still meeting the target
+        allowance = (inputs['tx_power'] - inputs['rx_sensitivity']
+                     - inputs['safety_margin'] - target_som - other_loss)
+        
+        if solve == 'tx-power':
+            value = inputs['rx_sensitivity'] + inputs['safety_margin'] + target_som + other_loss
+            feasible = np.ones(value.shape, dtype=bool)
+            som = target_som.copy()
+        else:
+            unit = {'length': inputs['fiber_loss'],
+                    'connectors': inputs['connector_loss'],
+                    'splices': inputs['splice_loss']}[solve]
+            value = allowance / unit
+            if solve != 'length':
+                # Tolerance keeps exact fits (2.9999999) from rounding down
+                value = np.floor(value + 1e-9)
+            feasible = value >= 0
+            value = np.where(feasible, value, np.nan)
+            som = allowance - value * unit + target_som
+        
+        results = {name: value, 'feasible': feasible, 'som': som}
+        if hasattr(data, 'columns') and hasattr(data, 'index'):
+            return type(data)(results, index=data.index)
+        return results
+    
+    @classmethod
+    def _component_bounds(cls, typical: 'np.ndarray', maximum: float) -> 'np.ndarray':
+        """(low, typical, high) loss bounds per row for one component type."""
+        import numpy as np
+        
+        high = np.maximum(typical, maximum)
+        low = np.maximum(2 * typical - high, 0.0)
+        return np.stack([low, typical, high], axis=-1)
+    
+    @staticmethod
+    def _draw_losses(rng, distribution: str, bounds, size) -> 'np.ndarray':
+        """Draw component losses (dB) between ``bounds`` = (low, typical, high)."""
+        import numpy as np
+        
+        low, mode, high = bounds
+        if high <= low:
+            return np.full(size, mode)
+        if distribution == 'uniform':
+            return rng.uniform(low, high, size)
+        if distribution == 'normal':
+            # Centred on typical with the bounds at +/-2 sigma, clipped to them
+            samples = rng.normal(mode, (high - low) / 4.0, size)
+            return samples.clip(low, high, out=samples)
+        return rng.triangular(low, mode, high, size)
+    
+    @staticmethod
+    def _component_mean(distribution: str, bounds: 'np.ndarray') -> 'np.ndarray':
+        """Expected component loss (dB) per row of (low, typical, high) ``bounds``."""
+        import math
+        import numpy as np
+        
+        low, mode, high = np.moveaxis(np.asarray(bounds, dtype=float), -1, 0)
+        if distribution == 'uniform':
+            return np.where(high > low, (low + high) / 2.0, mode)
+        if distribution == 'normal':
+            # Mean of N(mode, sigma) clipped to [low, high]
+            sigma = np.maximum((high - low) / 4.0, 1e-12)
+            alpha, beta = (low - mode) / sigma, (high - mode) / sigma
+            cdf = np.vectorize(lambda x: 0.5 * (1.0 + math.erf(x / math.sqrt(2.0))))
+            pdf = lambda x: np.exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi)
+            below, above = cdf(alpha), 1.0 - cdf(beta)
+            mean = (low * below + high * above + mode * (1.0 - below - above)
+                    + sigma * (pdf(alpha) - pdf(beta)))
+            return np.where(high > low, mean, mode)
+        return (low + mode + high) / 3.0
+    
+    @classmethod
+    def _loss_distributions(cls, rng, distribution: str, draws: int,
+                            counts, connector_bounds, splice_bounds) -> Dict:
+        """
+        Distributions of total connector + splice loss over ``draws`` trials
+        for several component counts with the same unit-loss bounds.
+        
+        Each trial draws the largest number of connectors and splices any
+        count needs once; running sums over those draws give the total for
+        every count, so one set of draws serves all of them. Trials are
+        drawn as (chunk, components) arrays of at most ``MC_CHUNK_ELEMENTS``
+        values and binned into a fixed histogram per count over its exact
+        loss range, so memory is bounded for any draw count.
+        
+        Args:
+            counts: (connectors, splices) pairs
+        
+        Returns:
+            Dictionary keyed by count pair of dictionaries with bin
+            ``edges``, cumulative ``cdf`` at the edges, and the exact
+            ``mean`` and ``std`` of the total loss
+        """
+        import numpy as np
+        
+        most_connectors = max(c for c, _ in counts)
+        most_splices = max(s for _, s in counts)
+        bins, state = {}, {}
+        for pair in counts:
+            connectors, splices = pair
+            lo = connectors * connector_bounds[0] + splices * splice_bounds[0]
+            hi = connectors * connector_bounds[2] + splices * splice_bounds[2]
+            n_bins = cls.MC_BINS if hi > lo else 1
+            edges = np.linspace(lo, hi if hi > lo else lo + 1e-9, n_bins + 1)
+            bins[pair] = (edges, n_bins / (edges[-1] - edges[0]))
+            state[pair] = [np.zeros(n_bins, dtype=np.int64), 0.0, 0.0]
+        
+        def running_totals(n, components, bounds):
+            # Column k holds the total of the first k components
+            totals = np.zeros((n, components + 1))
+            if components:
+                np.cumsum(cls._draw_losses(rng, distribution, bounds, (n, components)),
+                          axis=1, out=totals[:, 1:])
+            return totals
+        
+        chunk = max(1, cls.MC_CHUNK_ELEMENTS // max(1, most_connectors + most_splices))
+        for start in range(0, draws, chunk):
+            n = min(chunk, draws - start)
+            connector_totals = running_totals(n, most_connectors, connector_bounds)
+            splice_totals = running_totals(n, most_splices, splice_bounds)
+            for (connectors, splices), (edges, scale) in bins.items():
+                loss = connector_totals[:, connectors] + splice_totals[:, splices]
+                totals = state[connectors, splices]
+                index = ((loss - edges[0]) * scale).astype(np.intp)
+                totals[0] += np.bincount(index.clip(0, len(totals[0]) - 1),
+                                         minlength=len(totals[0]))
+                totals[1] += loss.sum()
+                totals[2] += np.dot(loss, loss)
+        
+        distributions = {}
+        for pair, (hist, total, total_sq) in state.items():
+            mean = total / draws
+            distributions[pair] = {
+                'edges': bins[pair][0],
+                'cdf': np.concatenate([[0.0], np.cumsum(hist) / draws]),
+                'mean': mean,
+                'std': np.sqrt(max(total_sq / draws - mean * mean, 0.0)),
+            }
+        return distributions
+    
+    @classmethod
+    def _loss_buckets(cls, connector_loss: 'np.ndarray', splice_loss: 'np.ndarray'):
+        """
+        Group links by (connector, splice) unit loss for shared draws.
+        
+        Exact values are used while there are at most ``MC_MAX_LOSS_MIXES``
+        distinct pairs. Beyond that, unit losses are rounded to a grid
+        starting at ``MC_LOSS_STEP`` and doubled until the pairs fit, so
+        fleets of individually measured losses cost no more than that.
+        
+        Returns:
+            (connector bucket, splice bucket) arrays, the distinct bucket
+            pairs, and each link's index into them
+        """
+        import numpy as np
+        
+        connector_bucket, splice_bucket, step = connector_loss, splice_loss, None
+        while True:
+            pairs, inverse = np.unique(np.column_stack([connector_bucket, splice_bucket]),
+                                       axis=0, return_inverse=True)
+            if len(pairs) <= cls.MC_MAX_LOSS_MIXES:
+                return connector_bucket, splice_bucket, pairs, inverse.reshape(-1)
+            step = cls.MC_LOSS_STEP if step is None else 2 * step
+            connector_bucket = np.round(connector_loss / step) * step
+            splice_bucket = np.round(splice_loss / step) * step
+    
+    @staticmethod
+    def _loss_quantile(dist: Dict, q: float) -> float:
+        """Loss (dB) at cumulative probability ``q``, interpolated within a bin."""
+        import numpy as np
+        
+        cdf, edges = dist['cdf'], dist['edges']
+        i = int(np.clip(np.searchsorted(cdf, q, side='left'), 1, len(cdf) - 1))
+        width = cdf[i] - cdf[i - 1]
+        frac = (q - cdf[i - 1]) / width if width > 0 else 0.0
+        return edges[i - 1] + frac * (edges[i] - edges[i - 1])
+    
+    @classmethod
+    @profiling.timed('link_budget.monte_carlo_batch')
+    def monte_carlo_batch(cls, data=None, draws: int = 100_000,
+                          distribution: str = 'triangular',
+                          splice_type: str = 'fusion', seed: int = None,
+                          **columns):
+        """
+        Statistical link budgets: SOM distribution and P(fail) per link.
+        
+        Every connector and splice loss is drawn independently between a
+        floor and the FOA maximum (``CONNECTOR_LOSS_MAX`` and the splice
+        type's max), centred on the link's typical unit loss; fiber loss
+        and the safety margin stay deterministic. Links with the same unit
+        losses share one set of draws, which running sums turn into the
+        total for every component count, and each link's probabilities are
+        read off its count's distribution at its own deterministic headroom.
+        Cost is draws x (most connectors + most splices) per distinct unit
+        loss pair, and at most ``MC_MAX_LOSS_MIXES`` pairs are drawn: past
+        that, unit losses are bucketed (``_loss_buckets``) and each link's
+        distribution is shifted by its expected loss minus the bucket's, so
+        means are unchanged and only the spread is the bucket's.
+        
+        Args:
+            data: Optional pandas DataFrame or mapping of column arrays,
+                as for ``calculate_batch``
+            draws: Monte Carlo trials per unit-loss pair
+            distribution: 'triangular' (mode at typical), 'uniform', or
+                'normal' (centred on typical, clipped to the bounds)
+            splice_type: 'fusion' or 'mechanical'; sets the splice max and
+                the default typical splice loss
+            seed: Seed for reproducible draws
+            **columns: Column arrays or scalars, overriding ``data``
+        
+        Returns:
+            Dictionary of NumPy arrays: deterministic ``som``,
+            ``som_mean``, ``som_std``, ``som_pNN`` percentiles (see
+            ``MC_PERCENTILES``), and ``p_fail``, ``p_marginal``,
+            ``p_pass``; a DataFrame when ``data`` is a DataFrame
+        """
+        import numpy as np
+        
+        if distribution not in cls.MC_DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {distribution}")
+        if splice_type not in cls.MC_SPLICE_TYPES:
+            raise ValueError(f"Unknown splice type: {splice_type}")
+        if draws < 1:
+            raise ValueError("draws must be at least 1")
+        splice_typical, splice_max = cls.MC_SPLICE_TYPES[splice_type]
+        if 'splice_loss' not in columns and not (data is not None and 'splice_loss' in data):
+            columns['splice_loss'] = splice_typical
+        
+        inputs = cls._batch_inputs(data, columns)
+        connector_count = inputs['connector_count'].astype(np.int64)
+        splice_count = inputs['splice_count'].astype(np.int64)
+        if (connector_count < 0).any() or (splice_count < 0).any():
+            raise ValueError("Component counts must not be negative")
+        
+        # Headroom before component losses: SOM = headroom - component loss
+        headroom = (inputs['tx_power'] - inputs['rx_sensitivity']
+                    - inputs['fiber_length'] * inputs['fiber_loss']
+                    - inputs['safety_margin'])
+        som = (headroom - connector_count * inputs['connector_loss']
+               - splice_count * inputs['splice_loss'])
+        # Links whose unit losses share a bucket share draws; each link's
+        # distribution is shifted by the difference between its expected
+        # loss and the bucket's, which keeps every link's mean loss right
+        connector_bucket, splice_bucket, loss_mixes, mix_index = cls._loss_buckets(
+            inputs['connector_loss'], inputs['splice_loss'])
+        def mean_shift(exact, bucket, maximum):
+            return (cls._component_mean(distribution, cls._component_bounds(exact, maximum))
+                    - cls._component_mean(distribution, cls._component_bounds(bucket, maximum)))
+        offset = (connector_count * mean_shift(inputs['connector_loss'], connector_bucket,
+                                               cls.CONNECTOR_LOSS_MAX)
+                  + splice_count * mean_shift(inputs['splice_loss'], splice_bucket, splice_max))
+        
+        shape = headroom.shape
+        results = {'som': som, 'som_mean': np.empty(shape), 'som_std': np.empty(shape)}
+        for q in cls.MC_PERCENTILES:
+            results[f'som_p{q:02d}'] = np.empty(shape)
+        for name in ('p_fail', 'p_marginal', 'p_pass'):
+            results[name] = np.empty(shape)
+        
+        rng = np.random.default_rng(seed)
+        thresholds = cls.STATUS_THRESHOLDS
+        for i, (connector_loss, splice_loss) in enumerate(loss_mixes):
+            links = np.flatnonzero(mix_index == i)
+            counts, count_index = np.unique(
+                np.column_stack([connector_count[links], splice_count[links]]),
+                axis=0, return_inverse=True)
+            count_index = count_index.reshape(-1)
+            dists = cls._loss_distributions(
+                rng, distribution, draws, [tuple(int(n) for n in pair) for pair in counts],
+                cls._component_bounds(connector_loss, cls.CONNECTOR_LOSS_MAX),
+                cls._component_bounds(splice_loss, splice_max))
+            for j, pair in enumerate(counts):
+                dist = dists[int(pair[0]), int(pair[1])]
+                rows = links[count_index == j]
+                room = headroom[rows] - offset[rows]
+                results['som_mean'][rows] = room - dist['mean']
+                results['som_std'][rows] = dist['std']
+                for q in cls.MC_PERCENTILES:
+                    # SOM falls as loss rises: its q-th percentile is loss's (100 - q)-th
+                    loss = cls._loss_quantile(dist, 1.0 - q / 100.0)
+                    results[f'som_p{q:02d}'][rows] = room - loss
+                # P(SOM < t) = P(loss > headroom - t)
+                below = [1.0 - np.interp(room - t, dist['edges'], dist['cdf'])
+                         for t in thresholds[:2]]
+                results['p_fail'][rows] = below[0]
+                results['p_marginal'][rows] = below[1] - below[0]
+                results['p_pass'][rows] = 1.0 - below[1]
+        
+        if hasattr(data, 'columns') and hasattr(data, 'index'):
+            return type(data)(results, index=data.index)
+        return results
+    
+    def monte_carlo(self, draws: int = 100_000, distribution: str = 'triangular',
+                    splice_type: str = 'fusion', seed: int = None) -> Dict:
+        """
+        Statistical link budget for this link.
+        
+        Args:
+            draws: Monte Carlo trials
+            distribution: One of ``MC_DISTRIBUTIONS``
+            splice_type: 'fusion' or 'mechanical' (sets the splice max)
+            seed: Seed for reproducible draws
+        
+        Returns:
+            Dictionary like one row of ``monte_carlo_batch``, plus
+            ``draws`` and ``distribution``
+        """
+        results = self.monte_carlo_batch(
+            draws=draws, distribution=distribution, splice_type=splice_type,
+            seed=seed, tx_power=self.tx_power, rx_sensitivity=self.rx_sensitivity,
+            fiber_length=self.fiber_length, connector_count=self.connector_count,
+            splice_count=self.splice_count, connector_loss=self.connector_loss,
+            splice_loss=self.splice_loss, fiber_loss=self.fiber_loss,
+            safety_margin=self.safety_margin)
+        summary = {'draws': draws, 'distribution': distribution}
+        summary.update({name: float(values[0]) for name, values in results.items()})
+        return summary
+    
     def print_report(self):
         """Print formatted link budget report."""
+        from rich.console import Console
+        from rich.table import Table
+        
         console = Console()
         results = self.calculate()
         
@@ -230,22 +822,224 @@ class LinkBudget:
         
         console.print(margin_table)
         console.print()
+    
+    def print_monte_carlo(self, statistics: Dict):
+        """Print the SOM distribution from ``monte_carlo()``."""
+        from rich.console import Console
+        from rich.table import Table
+        
+        console = Console()
+        table = Table(title="Statistical SOM (Monte Carlo)", show_header=False)
+        table.add_column("Parameter", style="cyan")
+        table.add_column("Value", style="green")
+        
+        table.add_row("Draws", f"{statistics['draws']:,} ({statistics['distribution']})")
+        table.add_row("Deterministic SOM", f"{statistics['som']:.2f} dB")
+        table.add_row("Mean SOM", f"{statistics['som_mean']:.2f} dB")
+        table.add_row("Std Deviation", f"{statistics['som_std']:.3f} dB")
+        for q in self.MC_PERCENTILES:
+            table.add_row(f"P{q} SOM", f"{statistics[f'som_p{q:02d}']:.2f} dB")
+        table.add_row("P(PASS)", f"[green]{statistics['p_pass']:.4%}[/green]")
+        table.add_row("P(MARGINAL)", f"[yellow]{statistics['p_marginal']:.4%}[/yellow]")
+        table.add_row("P(FAIL)", f"[red]{statistics['p_fail']:.4%}[/red]")
+        
+        console.print(table)
+        console.print()
+
+
+def _evaluate_chunk(chunk, monte_carlo: Dict = None):
+    """Evaluate one chunk of links; input columns not in the results pass through."""
+    results = LinkBudget.calculate_batch(chunk).rename(columns=LinkBudget.TOTAL_COLUMNS)
+    if monte_carlo:
+        statistics = LinkBudget.monte_carlo_batch(chunk, **monte_carlo)
+        results = results.join(statistics.drop(columns='som'))
+    passthrough = chunk.drop(columns=[c for c in results.columns
+                                      if c in chunk.columns])
+    return passthrough.join(results)
+
+
+def run_batch(input_path: str, output_path: str,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+              monte_carlo: Dict = None) -> Dict:
+    """
+    Evaluate every link in a CSV/Parquet file, streaming chunk by chunk.
+    
+    Each chunk is evaluated with ``LinkBudget.calculate_batch`` and written
+    before later ones are read, so memory stays constant for any file size.
+    Input columns that are not budget results (link IDs, notes, per-unit
+    losses) are passed through to the output; the loss totals are written
+    as ``fiber_loss_total``, ``connector_loss_total`` and
+    ``splice_loss_total`` (see ``LinkBudget.TOTAL_COLUMNS``).
+    
+    Args:
+        input_path: Links file (.csv or .parquet)
+        output_path: Results file (.csv or .parquet)
+        chunk_size: Rows evaluated per chunk
+        workers: Worker processes (0 = one per CPU); output order is
+            the input order regardless
+        monte_carlo: Optional ``monte_carlo_batch`` keyword arguments
+            (``draws``, ``distribution``, ``splice_type``, ``seed``); adds
+            the SOM distribution and P(fail) columns to the output
+    
+    Returns:
+        Dictionary with link count and per-status totals, plus the
+        expected number of failing links (sum of P(fail)) in statistical mode
+    """
+    summary = {'links': 0}
+    summary.update({status: 0 for status in LinkBudget.STATUS_TEXT})
+    if monte_carlo:
+        summary['expected_failures'] = 0.0
+    
+    evaluate = partial(_evaluate_chunk, monte_carlo=monte_carlo)
+    chunks = iter_chunks(input_path, chunk_size)
+    with ChunkWriter(output_path) as writer:
+        for results in imap_ordered(evaluate, chunks, workers):
+            writer.write(results)
+            
+            summary['links'] += len(results)
+            for status, count in results['status'].value_counts().items():
+                summary[status] += int(count)
+            if monte_carlo:
+                summary['expected_failures'] += float(results['p_fail'].sum())
+    
+    return summary
+
+
+def _solve_chunk(chunk, solve: str, target_som: float = None):
+    """Solve one chunk of links; a ``target_som`` column overrides the default."""
+    if 'target_som' in chunk:
+        default = LinkBudget.STATUS_THRESHOLDS[1] if target_som is None else target_som
+        target_som = chunk['target_som'].fillna(default).to_numpy()
+    results = LinkBudget.solve_batch(solve, chunk, target_som)
+    passthrough = chunk.drop(columns=[c for c in results.columns
+                                      if c in chunk.columns])
+    return passthrough.join(results)
+
+
+def run_solve(input_path: str, output_path: str, solve: str,
+              target_som: float = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              workers: int = 1) -> Dict:
+    """
+    Run an inverse solver over every link in a CSV/Parquet file.
+    
+    Streams chunk by chunk like ``run_batch``; the output is each input
+    row plus the solved column, ``feasible`` and ``som``.
+    
+    Returns:
+        Dictionary with link and infeasible-link counts
+    """
+    summary = {'links': 0, 'infeasible': 0}
+    evaluate = partial(_solve_chunk, solve=solve, target_som=target_som)
+    with ChunkWriter(output_path) as writer:
+        for results in imap_ordered(evaluate, iter_chunks(input_path, chunk_size), workers):
+            writer.write(results)
+            summary['links'] += len(results)
+            summary['infeasible'] += int((~results['feasible']).sum())
+    return summary
+
+
+def _print_solution(solve: str, results: Dict, target_som: float):
+    """Render a single-link inverse solution."""
+    from rich.console import Console
+    
+    name = LinkBudget.SOLVE_TARGETS[solve][0]
+    value = results[name][0]
+    console = Console()
+    console.print()
+    if not results['feasible'][0]:
+        console.print(f"[red]Not achievable: the link misses {target_som:.2f} dB SOM "
+                      f"even without any {solve}[/red]\n")
+        return
+    text = {
+        'max_length': f"Maximum length: {value:.3f} km",
+        'max_connectors': f"Maximum connectors: {int(value)}",
+        'max_splices': f"Maximum splices: {int(value)}",
+        'min_tx_power': f"Minimum TX power: {value:.2f} dBm",
+    }[name]
+    console.print(f"[bold cyan]{text}[/bold cyan]")
+    console.print(f"SOM at that value: {results['som'][0]:.2f} dB "
+                  f"(target {target_som:.2f} dB)\n")
 
 
 @click.command()
-@click.option('--tx-power', type=float, required=True, help='Transmitter power (dBm)')
-@click.option('--rx-sensitivity', type=float, required=True, help='Receiver sensitivity (dBm)')
-@click.option('--fiber-length', type=float, required=True, help='Fiber length (km)')
+@click.option('--tx-power', type=float, help='Transmitter power (dBm)')
+@click.option('--rx-sensitivity', type=float, help='Receiver sensitivity (dBm)')
+@click.option('--fiber-length', type=float, help='Fiber length (km)')
 @click.option('--wavelength', type=int, default=1310, help='Wavelength (nm)')
 @click.option('--fiber-type', type=click.Choice(['SM', 'MM'], case_sensitive=False), 
               default='SM', help='Fiber type')
 @click.option('--connectors', type=int, default=0, help='Number of connectors')
 @click.option('--splices', type=int, default=0, help='Number of splices')
 @click.option('--safety-margin', type=float, default=3.0, help='Safety margin (dB)')
+@click.option('--input', 'input_path', type=click.Path(exists=True, dir_okay=False),
+              help='Batch mode: links file (.csv or .parquet)')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False),
+              help='Batch mode: results file (.csv or .parquet)')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+              show_default=True, help='Batch mode: links evaluated per chunk')
+@click.option('--workers', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Batch mode: worker processes (0 = one per CPU)')
+@click.option('--splice-type', type=click.Choice(list(LinkBudget.MC_SPLICE_TYPES)),
+              default='fusion', show_default=True, help='Splice type (typical and max loss)')
+@click.option('--monte-carlo', 'draws', type=click.IntRange(min=1),
+              help='Statistical mode: Monte Carlo draws per link (e.g. 1000000)')
+@click.option('--distribution', type=click.Choice(LinkBudget.MC_DISTRIBUTIONS),
+              default='triangular', show_default=True,
+              help='Statistical mode: component loss distribution')
+@click.option('--seed', type=int, help='Statistical mode: random seed')
+@click.option('--solve', type=click.Choice(list(LinkBudget.SOLVE_TARGETS)),
+              help='Inverse mode: solve for maximum length/connectors/splices or '
+                   'minimum TX power (the solved option is not needed)')
+@click.option('--target-som', type=float,
+              help='Inverse mode: SOM to keep (dB) [default: 3, lowest PASS]')
+@format_option
+@profiling.profile_option
 def main(tx_power, rx_sensitivity, fiber_length, wavelength, fiber_type, 
-         connectors, splices, safety_margin):
+         connectors, splices, safety_margin, input_path, output_path, chunk_size,
+         workers, splice_type, draws, distribution, seed, solve, target_som, format):
     """Calculate fiber optic link budget (FOA compliant)."""
     
+    if solve:
+        if draws:
+            raise click.UsageError("--solve and --monte-carlo are exclusive")
+        _run_solve_command(solve, target_som, tx_power, rx_sensitivity, fiber_length,
+                           wavelength, fiber_type, connectors, splices, safety_margin,
+                           splice_type, input_path, output_path, chunk_size, workers,
+                           format)
+        return
+    
+    monte_carlo = None
+    if draws:
+        monte_carlo = {'draws': draws, 'distribution': distribution,
+                       'splice_type': splice_type, 'seed': seed}
+    
+    if input_path:
+        if not output_path:
+            raise click.UsageError("--input requires --output")
+        summary = run_batch(input_path, output_path, chunk_size, workers, monte_carlo)
+        if format != 'table':
+            emit(dict(summary, output=output_path), format)
+            return
+        
+        from rich.console import Console
+        console = Console()
+        console.print(f"\n[bold cyan]Evaluated {summary['links']} links[/bold cyan]"
+                      f" -> {output_path}")
+        console.print(f"[green]PASS: {summary['PASS']}[/green]  "
+                      f"[yellow]MARGINAL: {summary['MARGINAL']}[/yellow]  "
+                      f"[red]FAIL: {summary['FAIL']}[/red]\n")
+        if monte_carlo:
+            console.print(f"Expected failures (sum of P(fail)): "
+                          f"{summary['expected_failures']:.1f}\n")
+        return
+    
+    missing = [name for name, value in (('--tx-power', tx_power),
+                                        ('--rx-sensitivity', rx_sensitivity),
+                                        ('--fiber-length', fiber_length))
+               if value is None]
+    if missing:
+        raise click.UsageError(f"Missing option(s): {', '.join(missing)}")
+    
     budget = LinkBudget(
         tx_power=tx_power,
         rx_sensitivity=rx_sensitivity,
@@ -254,10 +1048,69 @@ def main(tx_power, rx_sensitivity, fiber_length, wavelength, fiber_type,
         fiber_type=fiber_type,
         connector_count=connectors,
         splice_count=splices,
+        splice_loss=LinkBudget.MC_SPLICE_TYPES[splice_type][0],
         safety_margin=safety_margin
     )
+    statistics = budget.monte_carlo(**monte_carlo) if monte_carlo else None
     
+    if format != 'table':
+        results = budget.calculate()
+        if statistics:
+            results['monte_carlo'] = statistics
+        emit(results, format)
+        return
     budget.print_report()
+    if statistics:
+        budget.print_monte_carlo(statistics)
+
+
+def _run_solve_command(solve, target_som, tx_power, rx_sensitivity, fiber_length,
+                       wavelength, fiber_type, connectors, splices, safety_margin,
+                       splice_type, input_path, output_path, chunk_size, workers,
+                       format):
+    if input_path:
+        if not output_path:
+            raise click.UsageError("--input requires --output")
+        summary = run_solve(input_path, output_path, solve, target_som, chunk_size, workers)
+        if format != 'table':
+            emit(dict(summary, output=output_path), format)
+            return
+        from rich.console import Console
+        console = Console()
+        console.print(f"\n[bold cyan]Solved {solve} for {summary['links']} links"
+                      f"[/bold cyan] -> {output_path}")
+        console.print(f"[red]Not achievable: {summary['infeasible']}[/red]\n")
+        return
+    
+    name, replaced = LinkBudget.SOLVE_TARGETS[solve]
+    options = {'tx_power': ('--tx-power', tx_power),
+               'rx_sensitivity': ('--rx-sensitivity', rx_sensitivity),
+               'fiber_length': ('--fiber-length', fiber_length)}
+    options.pop(replaced, None)
+    missing = [flag for flag, value in options.values() if value is None]
+    if missing:
+        raise click.UsageError(f"Missing option(s): {', '.join(missing)}")
+    
+    if target_som is None:
+        target_som = LinkBudget.STATUS_THRESHOLDS[1]
+    results = LinkBudget.solve_batch(
+        solve, target_som=target_som, tx_power=tx_power, rx_sensitivity=rx_sensitivity,
+        fiber_length=fiber_length, wavelength=wavelength, fiber_type=fiber_type.upper(),
+        connector_count=connectors, splice_count=splices,
+        splice_loss=LinkBudget.MC_SPLICE_TYPES[splice_type][0],
+        safety_margin=safety_margin)
+    
+    if format != 'table':
+        value = results[name][0]
+        emit({
+            name: (int(value) if solve in ('connectors', 'splices') else float(value))
+            if results['feasible'][0] else None,
+            'feasible': bool(results['feasible'][0]),
+            'som': float(results['som'][0]) if results['feasible'][0] else None,
+            'target_som': target_som,
+        }, format)
+        return
+    _print_solution(solve, results, target_som)
 
 
 if __name__ == '__main__':
@@ -3,13 +3,25 @@
 Loss Calculator
 Calculate connector, splice, and fiber losses.
 
+Bill-of-materials mode totals a component table (one row per connector,
+splice or fiber run with its link ID) per link and per category. Type
+names are encoded once per distinct value, so millions of rows cost one
+integer lookup each, and rows whose type is not recognized are reported
+rather than priced at a default.
+
 Author: David Osisek (CFOt)
 """
 
 import click
-from rich.console import Console
-from rich.table import Table
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from . import profiling
+from .cli_output import emit, format_option
+from .spectral import FIBER_MODELS, attenuation
+from .table_io import DEFAULT_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    import numpy as np
 
 class LossCalculator:
     """Calculate various fiber optic losses."""
@@ -30,14 +42,21 @@ class LossCalculator:
         'mechanical': 0.3,
     }
     
-    FIBER_ATTENUATION = {
-        'SM': {1310: 0.35, 1550: 0.25},
-        'MM-OM1': {850: 3.0, 1300: 1.0},
-        'MM-OM2': {850: 3.0, 1300: 1.0},
-        'MM-OM3': {850: 3.0, 1300: 1.0},
-        'MM-OM4': {850: 3.0, 1300: 1.0},
-        'MM-OM5': {850: 3.0, 1300: 1.0},
+    BOM_CATEGORIES = ('connector', 'splice', 'fiber')
+    
+    # Accepted BOM column names, first match wins
+    BOM_COLUMNS = {
+        'type': ('type', 'component', 'component_type'),
+        'count': ('count', 'quantity', 'qty'),
+        'fiber_type': ('fiber_type',),
+        'wavelength': ('wavelength', 'wavelength_nm'),
+        'length': ('length', 'length_km'),
+        'link_id': ('link_id', 'link'),
     }
+    
+    # Why a BOM row was left out of the totals; index is the reason code
+    BOM_REASONS = ('', 'unknown type', 'unknown fiber type', 'missing count',
+                   'missing wavelength', 'missing length')
 
     @classmethod
     def connector_loss(cls, connector_type: str, count: int = 1) -> Dict:
@@ -66,9 +85,7 @@ class LossCalculator:
     @classmethod
     def fiber_attenuation(cls, fiber_type: str, wavelength: int, length: float) -> Dict:
         """Calculate fiber attenuation."""
-        atten_map = cls.FIBER_ATTENUATION.get(fiber_type, cls.FIBER_ATTENUATION['SM'])
-        closest_wl = min(atten_map.keys(), key=lambda x: abs(x - wavelength))
-        atten_per_km = atten_map[closest_wl]
+        atten_per_km = attenuation(fiber_type, wavelength)
         total = atten_per_km * length
         return {
             'fiber_type': fiber_type,
@@ -77,28 +94,341 @@ class LossCalculator:
             'attenuation_per_km': atten_per_km,
             'total_loss': total
         }
+    
+    @classmethod
+    def component_table(cls) -> Tuple[Tuple[str, str, float], ...]:
+        """
+        BOM type codes: (name, category, loss per unit) indexed by code.
+        
+        Fiber rows are priced from the spectral curve, so their unit loss
+        is NaN. 'FIBER' takes its fiber type from the fiber_type column;
+        the fiber type names themselves ('SM', 'MM-OM3') are also accepted.
+        """
+        return (tuple((name, 'connector', loss) for name, loss in cls.CONNECTOR_TYPES.items())
+                + tuple((name, 'splice', loss) for name, loss in cls.SPLICE_TYPES.items())
+                + tuple((name, 'fiber', float('nan')) for name in ('FIBER',) + tuple(FIBER_MODELS)))
+    
+    @classmethod
+    def encode_types(cls, values) -> 'np.ndarray':
+        """
+        Component type codes (index into ``component_table()``), -1 if unknown.
+        
+        Names are normalized once per distinct value, not per row; a
+        pandas Categorical column is used as already encoded.
+        """
+        import numpy as np
+        import pandas as pd
+        
+        lookup = {}
+        for code, (name, category, _) in enumerate(cls.component_table()):
+            lookup[name.lower() if category == 'splice' else name.upper()] = code
+        if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+            codes, names = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, names = pd.factorize(pd.Series(values))
+        known = np.array([lookup.get(str(name).strip().upper(),
+                                     lookup.get(str(name).strip().lower(), -1))
+                          for name in names] + [-1], dtype=np.int32)
+        # Missing values factorize to -1, which picks the trailing -1
+        return known[codes]
+    
+    @classmethod
+    @profiling.timed('loss.bom_losses')
+    def bom_losses(cls, components) -> Dict:
+        """
+        Loss totals for a bill of materials, per link and per category.
+        
+        Connector and splice rows cost their unit loss times ``count``;
+        fiber rows cost attenuation at ``wavelength`` times ``length`` (km)
+        times ``count`` (1 when blank or absent). Rows that cannot be
+        priced (unknown type or fiber type, missing connector or splice
+        count, wavelength or length) add nothing and are returned in
+        ``unrecognized`` with a reason.
+        
+        Args:
+            components: DataFrame (or dict of columns) with ``type`` and
+                optionally ``count``, ``fiber_type``, ``wavelength``,
+                ``length`` and ``link_id`` (see ``BOM_COLUMNS``); without
+                a link ID every row belongs to one link, 'all'
+        
+        Returns:
+            Dictionary of DataFrames: ``links`` (per-link counts and losses,
+            in order of first appearance), ``categories``, ``components``
+            (per recognized type) and ``unrecognized`` (the offending input
+            rows plus ``reason``)
+        """
+        import numpy as np
+        import pandas as pd
+        
+        frame = components if isinstance(components, pd.DataFrame) else pd.DataFrame(components)
+        found = {}
+        for name, aliases in cls.BOM_COLUMNS.items():
+            alias = next((alias for alias in aliases if alias in frame), None)
+            if alias is not None:
+                found[name] = frame[alias]
+        if 'type' not in found:
+            raise ValueError("BOM needs a type column")
+        
+        n = len(frame)
+        table = cls.component_table()
+        categories = np.array([cls.BOM_CATEGORIES.index(category)
+                               for _, category, _ in table] + [-1], dtype=np.int8)
+        unit_loss = np.array([loss for _, _, loss in table] + [np.nan])
+        codes = cls.encode_types(found['type'])
+        category = categories[codes]
+        reason = np.where(codes < 0, 1, 0).astype(np.int8)
+        
+        if 'count' in found:
+            count = pd.to_numeric(found['count'], errors='coerce').to_numpy(float, copy=True)
+            # Fiber rows are priced by length; a blank count means one run
+            count[(category == 2) & np.isnan(count)] = 1.0
+            reason[(reason == 0) & np.isnan(count)] = 3
+        else:
+            count = np.ones(n)
+        loss = unit_loss[codes] * count
+        
+        fiber = np.flatnonzero(category == 2)
+        length = np.zeros(n)
+        if len(fiber):
+            loss[fiber], length[fiber], fiber_reason = cls._fiber_losses(found, codes[fiber],
+                                                                         table, fiber)
+            reason[fiber] = np.where(reason[fiber] == 0, fiber_reason, reason[fiber])
+            loss[fiber] *= count[fiber]
+        
+        bad = reason > 0
+        loss[bad] = 0.0
+        category = np.where(bad, -1, category)
+        quantity = np.where(bad, 0.0, count)
+        
+        if 'link_id' in found:
+            link_codes, link_names = pd.factorize(found['link_id'], use_na_sentinel=False)
+        else:
+            link_codes, link_names = np.zeros(n, dtype=np.intp), pd.Index(['all'])
+        links = len(link_names)
+        
+        # One grouped reduction per quantity over (link, category) pairs;
+        # excluded rows carry zero weights
+        width = len(cls.BOM_CATEGORIES)
+        key = link_codes * width + np.maximum(category, 0)
+        
+        def per_link(weights):
+            return np.bincount(key, weights=weights, minlength=links * width).reshape(links, width)
+        
+        counts, losses = per_link(quantity), per_link(loss)
+        per_link_frame = {}
+        for index, name in enumerate(cls.BOM_CATEGORIES):
+            per_link_frame[f'{name}_count'] = counts[:, index]
+            if name == 'fiber':
+                per_link_frame['fiber_km'] = per_link(length * quantity)[:, index]
+            per_link_frame[f'{name}_loss'] = losses[:, index]
+        per_link_frame['total_loss'] = losses.sum(axis=1)
+        per_link_frame['unrecognized'] = np.bincount(link_codes[bad], minlength=links)
+        link_frame = pd.DataFrame(per_link_frame, index=pd.Index(link_names, name='link_id'))
+        
+        valid = ~bad
+        slots = len(table)
+        type_rows = np.bincount(codes[valid], minlength=slots)
+        present = np.flatnonzero(type_rows)
+        component_frame = pd.DataFrame({
+            'category': [table[code][1] for code in present],
+            'rows': type_rows[present],
+            'count': np.bincount(codes[valid], weights=count[valid], minlength=slots)[present],
+            'total_loss': np.bincount(codes[valid], weights=loss[valid], minlength=slots)[present],
+        }, index=pd.Index([table[code][0] for code in present], name='type'))
+        
+        category_frame = (component_frame.groupby('category', sort=False)[['rows', 'count', 'total_loss']]
+                          .sum().reindex(list(cls.BOM_CATEGORIES), fill_value=0))
+        
+        unrecognized = frame.iloc[np.flatnonzero(bad)].copy()
+        unrecognized['reason'] = np.array(cls.BOM_REASONS, dtype=object)[reason[bad]]
+        return {
+            'links': link_frame,
+            'categories': category_frame,
+            'components': component_frame,
+            'unrecognized': unrecognized,
+        }
+    
+    @classmethod
+    def _fiber_losses(cls, found: Dict, codes: 'np.ndarray', table, rows: 'np.ndarray'):
+        """Per-run loss (dB), length (km) and reason codes for fiber rows."""
+        import numpy as np
+        import pandas as pd
+        
+        loss = np.zeros(len(rows))
+        reason = np.zeros(len(rows), dtype=np.int8)
+        
+        # 'FIBER' rows name their type in fiber_type; type-named rows carry it
+        names = np.array([name for name, _, _ in table], dtype=object)[codes]
+        if 'fiber_type' in found:
+            given = found['fiber_type'].iloc[rows].to_numpy(dtype=object)
+            names = np.where(pd.isna(given), names, given)
+        type_codes, type_names = pd.factorize(names)
+        resolved = [str(name).strip().upper() for name in type_names]
+        
+        wavelength = (pd.to_numeric(found['wavelength'].iloc[rows], errors='coerce').to_numpy(float)
+                      if 'wavelength' in found else np.full(len(rows), np.nan))
+        length = (pd.to_numeric(found['length'].iloc[rows], errors='coerce').to_numpy(float)
+                  if 'length' in found else np.full(len(rows), np.nan))
+        reason[np.isnan(length)] = 5
+        reason[np.isnan(wavelength)] = 4
+        for code, name in enumerate(resolved):
+            selected = type_codes == code
+            if name not in FIBER_MODELS:
+                reason[selected] = 2
+                continue
+            selected &= reason == 0
+            loss[selected] = attenuation(name, wavelength[selected]) * length[selected]
+        return loss, length, reason
+
+
+def _bom_chunk(chunk) -> Tuple[int, Dict]:
+    # Positional index, so unrecognized rows can be numbered file-wide
+    return len(chunk), LossCalculator.bom_losses(chunk.reset_index(drop=True))
+
+
+def run_bom(input_path: str, output_path: str = None, unrecognized_path: str = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1) -> Dict:
+    """
+    Total a BOM file per link, streaming it chunk by chunk.
+    
+    Chunks are reduced independently and their per-link and per-type
+    partial sums merged, so only the per-link totals are held in memory.
+    
+    Args:
+        input_path: Component table (.csv or .parquet)
+        output_path: Optional per-link totals file (.csv or .parquet)
+        unrecognized_path: Optional file for the rows left out of the totals
+        chunk_size: Rows per chunk
+        workers: Worker processes (0 = one per CPU)
+    
+    Returns:
+        Dictionary with ``rows`` and the merged ``links``, ``categories``,
+        ``components`` and ``unrecognized`` DataFrames (the latter indexed
+        by row number in the file); all empty for an empty file
+    """
+    import pandas as pd
+    
+    from .parallel import imap_ordered
+    from .table_io import ChunkWriter, iter_chunks
+    
+    links, components, unrecognized = [], [], []
+    rows = 0
+    for count, result in imap_ordered(_bom_chunk, iter_chunks(input_path, chunk_size), workers):
+        links.append(result['links'])
+        components.append(result['components'])
+        bad = result['unrecognized']
+        bad.index = bad.index + rows
+        unrecognized.append(bad)
+        rows += count
+    if not links:
+        # No chunks at all (a 0-byte CSV): reduce
+        # an empty table so the merged frames keep their columns
+        empty = LossCalculator.bom_losses(pd.DataFrame({'type': [], 'link_id': []}))
+        links, components, unrecognized = ([empty[name]] for name in
+                                           ('links', 'components', 'unrecognized'))
+    
+    merged = {'rows': rows}
+    merged['links'] = pd.concat(links).groupby(level=0, sort=False).sum()
+    merged['components'] = (pd.concat(components).groupby(level=0, sort=False)
+                            .agg({'category': 'first', 'rows': 'sum', 'count': 'sum',
+                                  'total_loss': 'sum'}))
+    merged['categories'] = (merged['components'].groupby('category', sort=False)
+                            [['rows', 'count', 'total_loss']].sum()
+                            .reindex(list(LossCalculator.BOM_CATEGORIES), fill_value=0))
+    merged['unrecognized'] = pd.concat(unrecognized)
+    
+    if output_path:
+        with ChunkWriter(output_path) as writer:
+            writer.write(merged['links'].reset_index())
+    if unrecognized_path:
+        with ChunkWriter(unrecognized_path) as writer:
+            writer.write(merged['unrecognized'].rename_axis('row').reset_index())
+    return merged
+
 
 @click.command()
-@click.option('--calc-type', type=click.Choice(['connector', 'splice', 'fiber']), required=True)
+@click.option('--calc-type', type=click.Choice(['connector', 'splice', 'fiber', 'bom']), required=True)
 @click.option('--connector-type', type=str, help='Connector type (SC-UPC, LC-APC, etc.)')
 @click.option('--splice-type', type=click.Choice(['fusion', 'mechanical']), help='Splice type')
 @click.option('--fiber-type', type=str, help='Fiber type (SM, MM-OM3, etc.)')
 @click.option('--wavelength', type=int, help='Wavelength (nm)')
 @click.option('--length', type=float, help='Fiber length (km)')
 @click.option('--count', type=int, default=1, help='Number of connectors/splices')
-def main(calc_type, connector_type, splice_type, fiber_type, wavelength, length, count):
+@click.option('--bom', 'bom_path', type=click.Path(exists=True, dir_okay=False),
+              help='BOM: component table (type, count, fiber_type, wavelength, length, link_id)')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False),
+              help='BOM: write per-link totals (.csv or .parquet)')
+@click.option('--unrecognized', 'unrecognized_path', type=click.Path(dir_okay=False),
+              help='BOM: write the rows left out of the totals')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+              show_default=True, help='BOM: rows per chunk')
+@click.option('--workers', type=click.IntRange(min=0), default=1, show_default=True,
+              help='BOM: worker processes (0 = one per CPU)')
+@format_option
+@profiling.profile_option
+def main(calc_type, connector_type, splice_type, fiber_type, wavelength, length, count,
+         bom_path, output_path, unrecognized_path, chunk_size, workers, format):
     """Calculate fiber optic component losses."""
-    console = Console()
-    
+    if calc_type == 'bom':
+        if not bom_path:
+            raise click.UsageError("--calc-type bom requires --bom")
+        _run_bom_command(bom_path, output_path, unrecognized_path, chunk_size, workers, format)
+        return
     if calc_type == 'connector':
         result = LossCalculator.connector_loss(connector_type, count)
-        console.print(f"\nConnector Loss: {result['total_loss']:.2f} dB")
+        label = "Connector Loss"
     elif calc_type == 'splice':
         result = LossCalculator.splice_loss(splice_type, count)
-        console.print(f"\nSplice Loss: {result['total_loss']:.2f} dB")
+        label = "Splice Loss"
     elif calc_type == 'fiber':
         result = LossCalculator.fiber_attenuation(fiber_type, wavelength, length)
-        console.print(f"\nFiber Loss: {result['total_loss']:.2f} dB")
+        label = "Fiber Loss"
+    
+    if format != 'table':
+        emit(result, format)
+        return
+    
+    from rich.console import Console
+    Console().print(f"\n{label}: {result['total_loss']:.2f} dB")
+
+def _run_bom_command(bom_path, output_path, unrecognized_path, chunk_size, workers, format):
+    try:
+        result = run_bom(bom_path, output_path, unrecognized_path, chunk_size, workers)
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+    categories = result['categories']
+    summary = {
+        'rows': result['rows'],
+        'links': len(result['links']),
+        'total_loss': float(categories['total_loss'].sum()),
+        'categories': {name: {'rows': int(row['rows']), 'count': float(row['count']),
+                              'total_loss': float(row['total_loss'])}
+                       for name, row in categories.iterrows()},
+        'unrecognized': {reason: int(n) for reason, n
+                         in result['unrecognized']['reason'].value_counts().items()},
+    }
+    if format != 'table':
+        emit(summary, format)
+        return
+    
+    from rich.console import Console
+    from rich.table import Table
+    
+    console = Console()
+    table = Table(title=f"BOM: {summary['rows']} rows, {summary['links']} links")
+    for header in ('Category', 'Rows', 'Count', 'Loss (dB)'):
+        table.add_column(header, justify='left' if header == 'Category' else 'right')
+    for name, row in categories.iterrows():
+        table.add_row(name.title(), f"{int(row['rows'])}", f"{row['count']:.0f}",
+                      f"{row['total_loss']:.2f}")
+    table.add_row('[bold]Total[/bold]', '', '', f"[bold]{summary['total_loss']:.2f}[/bold]")
+    console.print(table)
+    for reason, n in summary['unrecognized'].items():
+        console.print(f"[yellow]Not counted ({reason}): {n} rows[/yellow]")
+    for path, label in ((output_path, 'Per-link totals'), (unrecognized_path, 'Unrecognized rows')):
+        if path:
+            console.print(f"{label} -> {path}")
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,743 @@
+#!/usr/bin/env python3
+"""
+Fiber Network
+Loss-weighted routing over meshed fiber plant.
+
+Nodes are patch panels and splice closures; spans are cable runs between
+them, costed with the same FOA values as ``LinkBudget`` and
+``LossCalculator``. Passing through a panel adds one mated connector
+pair, passing through a closure one splice. Paths are found with
+Dijkstra (lowest loss) and Yen (k lowest) over a CSR adjacency, and
+results are cached: editing a span invalidates only the cached routes it
+can affect.
+
+Author: David Osisek (CFOt)
+"""
+
+import bisect
+import heapq
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import click
+
+from . import profiling
+from .cli_output import emit, format_option
+from .link_budget import LinkBudget
+from .loss_calculator import LossCalculator
+from .table_io import DEFAULT_CHUNK_SIZE, iter_chunks, resolve_columns
+
+INF = float('inf')
+
+# Routes kept in the path cache before the oldest are evicted
+CACHE_SIZE = 4096
+
+NODE_KINDS = ('panel', 'closure')
+
+# Table columns and the aliases accepted for each
+SPAN_COLUMNS = {
+    'span_id': ('span_id', 'span', 'id'),
+    'a': ('a', 'from', 'node_a'),
+    'b': ('b', 'to', 'node_b'),
+    'length': ('length', 'fiber_length'),
+    'fiber_type': ('fiber_type',),
+    'connectors': ('connectors', 'connector_count'),
+    'splices': ('splices', 'splice_count'),
+    'connector_type': ('connector_type',),
+    'splice_type': ('splice_type',),
+    'connector_loss': ('connector_loss',),
+    'splice_loss': ('splice_loss',),
+    'fiber_loss': ('fiber_loss',),
+}
+NODE_COLUMNS = {
+    'name': ('name', 'node', 'node_id'),
+    'kind': ('kind', 'type'),
+    'connector_type': ('connector_type',),
+    'splice_type': ('splice_type',),
+    'transit_loss': ('transit_loss',),
+}
+SPAN_ATTRIBUTES = tuple(SPAN_COLUMNS)[3:]
+
+# (cost, node indices, span indices); cost includes half the transit loss
+# of both end nodes, see FiberNetwork._weight_of
+_Route = Tuple[float, Tuple[int, ...], Tuple[int, ...]]
+
+
+def _present(value) -> bool:
+    """False for None, NaN and empty strings (missing table cells)."""
+    return value is not None and value == value and value != ''
+
+
+def _connector_unit_loss(connector_type) -> float:
+    """Loss per mated pair for a connector type, NaN if none is given."""
+    if not _present(connector_type):
+        return float('nan')
+    return LossCalculator.connector_loss(connector_type)['loss_per_connector']
+
+
+def _splice_unit_loss(splice_type) -> float:
+    """Loss per splice for a splice type, NaN if none is given."""
+    if not _present(splice_type):
+        return float('nan')
+    return LossCalculator.splice_loss(splice_type)['loss_per_splice']
+
+
+class FiberNetwork:
+    """Graph of panels, closures and spans with cached loss-weighted routing."""
+
+    def __init__(self, wavelength: int = 1310, fiber_type: str = 'SM',
+                 cache_size: int = CACHE_SIZE):
+        """
+        Args:
+            wavelength: Wavelength (nm) used for fiber attenuation
+            fiber_type: Default fiber type for spans ('SM' or 'MM')
+            cache_size: Routes kept in the path cache
+        """
+        self.wavelength = wavelength
+        self.fiber_type = fiber_type
+        self.cache_size = cache_size
+
+        # Nodes
+        self._names: List[str] = []
+        self._node_index: Dict[str, int] = {}
+        self._kind: List[str] = []
+        self._transit: List[float] = []
+
+        # Spans (removed spans stay as tombstones so indices are stable)
+        self._span_ids: List = []
+        self._span_index: Dict = {}
+        self._a: List[int] = []
+        self._b: List[int] = []
+        self._attrs: List[Dict] = []
+        self._loss: List[float] = []
+        self._weight: List[float] = []
+        self._alive: List[bool] = []
+
+        self._csr = None
+        self._cache: 'OrderedDict[Tuple, List[_Route]]' = OrderedDict()
+        self._span_routes: Dict[int, Set[Tuple]] = defaultdict(set)
+        self.stats = {'hits': 0, 'misses': 0, 'invalidated': 0}
+
+    # ------------------------------------------------------------------
+    # Building the graph
+
+    def _transit_loss(self, kind: str, connector_type: str = None,
+                      splice_type: str = None) -> float:
+        """Loss (dB) of passing through a node of this kind."""
+        if kind == 'closure':
+            if splice_type:
+                return LossCalculator.splice_loss(splice_type)['loss_per_splice']
+            return LinkBudget.FUSION_SPLICE_TYPICAL
+        if connector_type:
+            return LossCalculator.connector_loss(connector_type)['loss_per_connector']
+        return LinkBudget.CONNECTOR_LOSS_TYPICAL
+
+    def add_node(self, name: str, kind: str = 'panel', connector_type: str = None,
+                 splice_type: str = None, transit_loss: float = None) -> int:
+        """
+        Add a panel or closure.
+
+        Args:
+            name: Node name
+            kind: 'panel' (transit = one mated connector pair) or
+                'closure' (transit = one splice)
+            connector_type: Panel connector type (``LossCalculator.CONNECTOR_TYPES``)
+            splice_type: Closure splice type ('fusion' or 'mechanical')
+            transit_loss: Explicit pass-through loss (dB), overriding the above
+
+        Returns:
+            Node index
+        """
+        if kind not in NODE_KINDS:
+            raise ValueError(f"Unknown node kind: {kind}")
+        if name in self._node_index:
+            raise ValueError(f"Node already exists: {name}")
+        if transit_loss is None:
+            transit_loss = self._transit_loss(kind, connector_type, splice_type)
+        index = len(self._names)
+        self._names.append(name)
+        self._node_index[name] = index
+        self._kind.append(kind)
+        self._transit.append(float(transit_loss))
+        return index
+
+    def _node(self, name: str) -> int:
+        """Index of ``name``, adding it as a panel on first use."""
+        index = self._node_index.get(name)
+        if index is None:
+            index = self.add_node(name)
+        return index
+
+    def _span_loss(self, attrs: Dict) -> float:
+        """Total span loss (dB) from its attributes, as ``LinkBudget`` computes it."""
+        connector_loss = attrs.get('connector_loss')
+        if not connector_loss and attrs.get('connector_type'):
+            connector_loss = _connector_unit_loss(attrs['connector_type'])
+        splice_loss = attrs.get('splice_loss')
+        if not splice_loss and attrs.get('splice_type'):
+            splice_loss = _splice_unit_loss(attrs['splice_type'])
+        budget = LinkBudget(
+            tx_power=0.0,
+            rx_sensitivity=0.0,
+            fiber_length=attrs.get('length', 0.0),
+            wavelength=self.wavelength,
+            fiber_type=attrs.get('fiber_type') or self.fiber_type,
+            connector_count=attrs.get('connectors', 0),
+            splice_count=attrs.get('splices', 0),
+            connector_loss=connector_loss,
+            splice_loss=splice_loss,
+            fiber_loss=attrs.get('fiber_loss'),
+        )
+        return budget.calculate()['total_loss']
+
+    def _weight_of(self, e: int) -> float:
+        # Each end node contributes half its transit loss, so a route's
+        # summed weight counts every intermediate node once in full
+        return self._loss[e] + 0.5 * (self._transit[self._a[e]] + self._transit[self._b[e]])
+
+    def _append_span(self, span_id, a: int, b: int, attrs: Dict, loss: float) -> int:
+        if span_id in self._span_index:
+            raise ValueError(f"Span already exists: {span_id}")
+        if a == b:
+            raise ValueError(f"Span {span_id} starts and ends at the same node")
+        e = len(self._span_ids)
+        self._span_ids.append(span_id)
+        self._span_index[span_id] = e
+        self._a.append(a)
+        self._b.append(b)
+        self._attrs.append(attrs)
+        self._loss.append(float(loss))
+        self._weight.append(0.0)
+        self._alive.append(True)
+        self._weight[e] = self._weight_of(e)
+        self._csr = None
+        return e
+
+    def add_span(self, span_id, a: str, b: str, length: float, **attributes) -> float:
+        """
+        Add a span between two nodes (unknown nodes are added as panels).
+
+        Args:
+            span_id: Unique span identifier
+            a, b: End node names
+            length: Fiber length (km)
+            **attributes: Any of ``connectors``, ``splices``,
+                ``connector_type``, ``splice_type``, ``connector_loss``,
+                ``splice_loss``, ``fiber_loss`` (dB/km), ``fiber_type``
+
+        Returns:
+            Span loss (dB)
+        """
+        unknown = set(attributes) - set(SPAN_ATTRIBUTES)
+        if unknown:
+            raise TypeError(f"Unknown span attribute(s): {', '.join(sorted(unknown))}")
+        attrs = dict(attributes, length=length)
+        loss = self._span_loss(attrs)
+        e = self._append_span(span_id, self._node(a), self._node(b), attrs, loss)
+        self._invalidate_new_route(self._loss[e])
+        return loss
+
+    def add_spans(self, frame) -> int:
+        """
+        Add many spans from a DataFrame, costed in one vectorized pass.
+
+        Columns follow ``SPAN_COLUMNS``; ``a``, ``b`` and ``length`` are
+        required and rows without a span ID are numbered.
+
+        Returns:
+            Number of spans added
+        """
+        import numpy as np
+
+        columns = resolve_columns(frame, SPAN_COLUMNS)
+        missing = [name for name in ('a', 'b', 'length') if name not in columns]
+        if missing:
+            raise ValueError(f"Missing span columns: {', '.join(missing)}")
+
+        def unit_loss(loss_name, type_name, lookup):
+            # An explicit loss wins over the component type's catalogue value
+            loss = columns.get(loss_name)
+            loss = np.full(len(frame), np.nan) if loss is None else loss.to_numpy(dtype=float)
+            if type_name in columns:
+                by_type = columns[type_name].map(lookup).to_numpy(dtype=float)
+                loss = np.where(np.isnan(loss) | (loss == 0), by_type, loss)
+            return loss
+
+        fiber_type = columns.get('fiber_type')
+        losses = LinkBudget.calculate_batch(
+            tx_power=0.0,
+            rx_sensitivity=0.0,
+            fiber_length=columns['length'].to_numpy(dtype=float),
+            wavelength=self.wavelength,
+            fiber_type=self.fiber_type if fiber_type is None
+            else fiber_type.fillna(self.fiber_type).to_numpy(dtype=str),
+            connector_count=columns['connectors'].fillna(0).to_numpy(dtype=float)
+            if 'connectors' in columns else 0,
+            splice_count=columns['splices'].fillna(0).to_numpy(dtype=float)
+            if 'splices' in columns else 0,
+            connector_loss=unit_loss('connector_loss', 'connector_type', _connector_unit_loss),
+            splice_loss=unit_loss('splice_loss', 'splice_type', _splice_unit_loss),
+            fiber_loss=columns['fiber_loss'].to_numpy(dtype=float)
+            if 'fiber_loss' in columns else None,
+        )['total_loss']
+
+        ids = columns['span_id'].tolist() if 'span_id' in columns else \
+            range(len(self._span_ids), len(self._span_ids) + len(frame))
+        attr_names = [name for name in SPAN_ATTRIBUTES if name in columns]
+        attr_values = zip(*(columns[name].tolist() for name in attr_names))
+        for span_id, a, b, values, loss in zip(ids, columns['a'].tolist(),
+                                               columns['b'].tolist(), attr_values, losses):
+            attrs = {name: value for name, value in zip(attr_names, values) if _present(value)}
+            self._append_span(span_id, self._node(a), self._node(b), attrs, loss)
+        if len(frame):
+            self._invalidate_new_route(float(losses.min()))
+        return len(frame)
+
+    def add_nodes(self, frame) -> int:
+        """Add panels and closures from a DataFrame (columns per ``NODE_COLUMNS``)."""
+        columns = resolve_columns(frame, NODE_COLUMNS)
+        if 'name' not in columns:
+            raise ValueError("Missing node column: name")
+        names = [name for name in NODE_COLUMNS if name in columns]
+        for values in zip(*(columns[name].tolist() for name in names)):
+            row = {name: value for name, value in zip(names, values) if _present(value)}
+            self.add_node(row.pop('name'), **row)
+        return len(frame)
+
+    @classmethod
+    def from_tables(cls, spans_path: str, nodes_path: str = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> 'FiberNetwork':
+        """
+        Build a network from CSV/Parquet span (and optional node) tables.
+
+        Args:
+            spans_path: Spans file, columns per ``SPAN_COLUMNS``
+            nodes_path: Nodes file, columns per ``NODE_COLUMNS``; nodes not
+                listed are panels
+            chunk_size: Rows read per chunk
+            **kwargs: ``FiberNetwork`` arguments
+        """
+        network = cls(**kwargs)
+        if nodes_path:
+            for chunk in iter_chunks(nodes_path, chunk_size):
+                network.add_nodes(chunk)
+        for chunk in iter_chunks(spans_path, chunk_size):
+            network.add_spans(chunk)
+        return network
+
+    # ------------------------------------------------------------------
+    # Editing
+
+    def span(self, span_id) -> Dict:
+        """Attributes and current loss of a span."""
+        e = self._span_index[span_id]
+        return dict(self._attrs[e], span_id=span_id, a=self._names[self._a[e]],
+                    b=self._names[self._b[e]], loss=self._loss[e])
+
+    def update_span(self, span_id, **attributes) -> float:
+        """
+        Change span attributes (length, connector counts, losses...).
+
+        Cached routes are dropped only if the change can affect them: a
+        loss increase invalidates routes through the span; a decrease also
+        invalidates routes whose worst cached path costs at least the new
+        span loss, since a path through the span might now undercut them.
+
+        Returns:
+            New span loss (dB)
+        """
+        unknown = set(attributes) - set(SPAN_ATTRIBUTES)
+        if unknown:
+            raise TypeError(f"Unknown span attribute(s): {', '.join(sorted(unknown))}")
+        e = self._span_index[span_id]
+        attrs = dict(self._attrs[e], **attributes)
+        old, new = self._loss[e], self._span_loss(attrs)
+        self._attrs[e] = attrs
+        self._loss[e] = new
+        self._weight[e] = self._weight_of(e)
+        if new > old:
+            self._drop_routes(set(self._span_routes.get(e, ())))
+        elif new < old:
+            self._drop_routes(set(self._span_routes.get(e, ())) | {
+                key for key, routes in self._cache.items()
+                if self._worst_loss(key, routes) >= new})
+        return new
+
+    def remove_span(self, span_id):
+        """Remove a span; only cached routes that used it are dropped."""
+        e = self._span_index.pop(span_id)
+        self._alive[e] = False
+        self._csr = None
+        self._drop_routes(set(self._span_routes.get(e, ())))
+
+    # ------------------------------------------------------------------
+    # Path cache
+
+    def _worst_loss(self, key: Tuple, routes: List[_Route]) -> float:
+        """Real loss of the worst cached path, or -inf for a complete empty result."""
+        if not routes:
+            return -INF
+        source, target, _ = key
+        return routes[-1][0] - 0.5 * (self._transit[source] + self._transit[target])
+
+    def _invalidate_new_route(self, loss: float):
+        # A new span can only create paths costing at least its own loss,
+        # or connect pairs that had fewer than k paths
+        stale = {key for key, routes in self._cache.items()
+                 if len(routes) < key[2] or self._worst_loss(key, routes) >= loss}
+        self._drop_routes(stale)
+
+    def _discard(self, key: Tuple) -> bool:
+        routes = self._cache.pop(key, None)
+        if routes is None:
+            return False
+        for _, _, edges in routes:
+            for e in edges:
+                self._span_routes[e].discard(key)
+        return True
+
+    def _drop_routes(self, keys: Set[Tuple]):
+        self.stats['invalidated'] += sum(self._discard(key) for key in keys)
+
+    def _store_routes(self, key: Tuple, routes: List[_Route]):
+        if self.cache_size <= 0:
+            return
+        while len(self._cache) >= self.cache_size:
+            self._discard(next(iter(self._cache)))  # least recently used
+        self._cache[key] = routes
+        for _, _, edges in routes:
+            for e in edges:
+                self._span_routes[e].add(key)
+
+    def cache_info(self) -> Dict:
+        """Path cache counters: hits, misses, invalidated routes and size."""
+        return dict(self.stats, size=len(self._cache))
+
+    # ------------------------------------------------------------------
+    # Search
+
+    def _adjacency(self) -> Tuple[List[int], List[int], List[int]]:
+        """CSR adjacency (indptr, neighbour, span index), rebuilt after topology edits."""
+        if self._csr is None:
+            import numpy as np
+
+            alive = np.flatnonzero(np.asarray(self._alive, dtype=bool))
+            a = np.asarray(self._a, dtype=np.intp)[alive]
+            b = np.asarray(self._b, dtype=np.intp)[alive]
+            ends = np.concatenate([a, b])
+            order = np.argsort(ends, kind='stable')
+            indptr = np.zeros(len(self._names) + 1, dtype=np.intp)
+            np.cumsum(np.bincount(ends, minlength=len(self._names)), out=indptr[1:])
+            self._csr = (indptr.tolist(),
+                         np.concatenate([b, a])[order].tolist(),
+                         np.concatenate([alive, alive])[order].tolist())
+        return self._csr
+
+    def _search(self, source: int, target: int, banned_edges: Set[int] = None,
+                banned_nodes: Set[int] = None,
+                tree: Tuple[List[float], List[int]] = None) -> Optional[_Route]:
+        """
+        Lowest-weight route, or None if unreachable.
+
+        With ``tree`` (the unbanned shortest-path tree towards ``target``,
+        from ``_tree``) this is A* with exact remaining distances as the
+        heuristic, and it stops at the first settled node whose tree path
+        to the target avoids every ban: with a consistent heuristic no
+        other completion can be cheaper. Yen's spur searches rely on this
+        to avoid re-walking the whole remaining route each time.
+        """
+        indptr, neighbours, spans = self._adjacency()
+        weight = self._weight
+        heuristic, toward = tree if tree is not None else (None, None)
+        # Sparse bookkeeping: guided spur searches touch few nodes
+        dist = {source: 0.0}
+        via = {}
+        done = set()
+        heap = [(0.0, 0.0, source)]
+        suffix, clear = None, {}
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            if u == target:
+                break
+            if tree is not None:
+                suffix = self._clear_suffix(u, target, toward, banned_edges,
+                                            banned_nodes, clear)
+                if suffix is not None:
+                    break
+            done.add(u)
+            for i in range(indptr[u], indptr[u + 1]):
+                v = neighbours[i]
+                if v in done or (banned_nodes and v in banned_nodes):
+                    continue
+                e = spans[i]
+                if banned_edges and e in banned_edges:
+                    continue
+                nd = d + weight[e]
+                if nd < dist.get(v, INF):
+                    if heuristic is None:
+                        priority = nd
+                    else:
+                        priority = nd + heuristic[v]
+                        if priority == INF:
+                            continue
+                    dist[v] = nd
+                    via[v] = e
+                    heapq.heappush(heap, (priority, nd, v))
+        else:
+            return None
+
+        cost, end = d, u
+        nodes, edges = [], []
+        if suffix is not None:
+            cost += heuristic[u]
+            nodes, edges = suffix
+        node = end
+        back_nodes, back_edges = [node], []
+        while node != source:
+            e = via[node]
+            back_edges.append(e)
+            node = self._a[e] if self._b[e] == node else self._b[e]
+            back_nodes.append(node)
+        return (cost, tuple(reversed(back_nodes)) + tuple(nodes),
+                tuple(reversed(back_edges)) + tuple(edges))
+
+    def _clear_suffix(self, node: int, target: int, toward: List[int],
+                      banned_edges: Optional[Set[int]], banned_nodes: Optional[Set[int]],
+                      clear: Dict[int, bool]) -> Optional[Tuple[List[int], List[int]]]:
+        """
+        Tree path from ``node`` to ``target`` (nodes after ``node``, spans) if unbanned.
+
+        Nodes on one tree path share its suffix, so every node walked is
+        recorded in ``clear`` and later walks stop at the first known one.
+        """
+        walked, current, ok = [], node, True
+        while current != target and current not in clear:
+            walked.append(current)
+            e = toward[current]
+            if e < 0 or (banned_edges and e in banned_edges):
+                ok = False
+                break
+            current = self._a[e] if self._b[e] == current else self._b[e]
+            if banned_nodes and current in banned_nodes:
+                ok = False
+                break
+        else:
+            ok = current == target or clear[current]
+        for visited in walked:
+            clear[visited] = ok
+        if not ok:
+            return None
+
+        nodes, edges = [], []
+        while node != target:
+            e = toward[node]
+            node = self._a[e] if self._b[e] == node else self._b[e]
+            nodes.append(node)
+            edges.append(e)
+        return nodes, edges
+
+    def _tree(self, root: int) -> Tuple[List[float], List[int]]:
+        """
+        Full shortest-path tree from ``root``.
+
+        Returns:
+            (weight to ``root``, span towards ``root``) per node, -1 where
+            there is none; spans are undirected, so distances from the
+            root are distances to it
+        """
+        indptr, neighbours, spans = self._adjacency()
+        weight = self._weight
+        dist = [INF] * len(self._names)
+        toward = [-1] * len(self._names)
+        dist[root] = 0.0
+        heap = [(0.0, root)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for i in range(indptr[u], indptr[u + 1]):
+                v = neighbours[i]
+                nd = d + weight[spans[i]]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    toward[v] = spans[i]
+                    heapq.heappush(heap, (nd, v))
+        return dist, toward
+
+    def _yen(self, source: int, target: int, k: int) -> List[_Route]:
+        """K lowest-weight loopless routes (Yen), spur searches guided by A*."""
+        tree = self._tree(target)
+        first = self._search(source, target, tree=tree)
+        if first is None:
+            return []
+        weight = self._weight
+        found = [first]
+        candidates, seen = [], {first[2]}
+        while len(found) < k:
+            _, nodes, edges = found[-1]
+            root_cost, root_nodes = 0.0, set()
+            for j in range(len(edges)):
+                spur, root_edges = nodes[j], edges[:j]
+                banned_edges = {route[2][j] for route in found
+                                if len(route[2]) > j and route[2][:j] == root_edges}
+                spur_route = self._search(spur, target, banned_edges, root_nodes, tree)
+                if spur_route is not None:
+                    route_edges = root_edges + spur_route[2]
+                    if route_edges not in seen:
+                        seen.add(route_edges)
+                        heapq.heappush(candidates, (
+                            root_cost + spur_route[0], nodes[:j] + spur_route[1],
+                            route_edges))
+                root_cost += weight[edges[j]]
+                root_nodes.add(spur)
+            if not candidates:
+                break
+            found.append(heapq.heappop(candidates))
+        return found
+
+    def _routes(self, source: str, target: str, k: int) -> List[_Route]:
+        key = (self._node_index[source], self._node_index[target], k)
+        routes = self._cache.get(key)
+        if routes is not None:
+            self.stats['hits'] += 1
+            profiling.count('route_cache.hits')
+            self._cache.move_to_end(key)
+            return routes
+        self.stats['misses'] += 1
+        profiling.count('route_cache.misses')
+        if key[0] == key[1]:
+            routes = [(self._transit[key[0]], (key[0],), ())]
+        elif k == 1:
+            route = self._search(key[0], key[1])
+            routes = [] if route is None else [route]
+        else:
+            routes = self._yen(key[0], key[1], k)
+        self._store_routes(key, routes)
+        return routes
+
+    def _describe(self, route: _Route) -> Dict:
+        cost, nodes, edges = route
+        ends = 0.5 * (self._transit[nodes[0]] + self._transit[nodes[-1]]) if edges else cost
+        span_loss = sum(self._loss[e] for e in edges)
+        return {
+            'nodes': [self._names[n] for n in nodes],
+            'spans': [self._span_ids[e] for e in edges],
+            'length': sum(self._attrs[e].get('length', 0.0) for e in edges),
+            'span_loss': span_loss,
+            'transit_loss': cost - ends - span_loss,
+            'loss': cost - ends,
+        }
+
+    def shortest_path(self, source: str, target: str) -> Optional[Dict]:
+        """
+        Lowest-loss path between two nodes.
+
+        Returns:
+            Dictionary with ``nodes``, ``spans``, ``length`` (km),
+            ``span_loss``, ``transit_loss`` (intermediate panels and
+            closures) and total ``loss`` (dB), or None if unreachable
+        """
+        routes = self._routes(source, target, 1)
+        return self._describe(routes[0]) if routes else None
+
+    def k_shortest_paths(self, source: str, target: str, k: int = 3) -> List[Dict]:
+        """Up to ``k`` loopless paths in order of increasing loss."""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        return [self._describe(route) for route in self._routes(source, target, k)]
+
+    @staticmethod
+    def path_budget(path: Dict, tx_power: float, rx_sensitivity: float,
+                    safety_margin: float = 3.0) -> Dict:
+        """SOM and status of a path, with the tiers ``LinkBudget`` uses."""
+        power_budget = tx_power - rx_sensitivity
+        som = power_budget - path['loss'] - safety_margin
+        code = LinkBudget.STATUS_FAIL - bisect.bisect_right(LinkBudget.STATUS_THRESHOLDS, som)
+        return {
+            'power_budget': power_budget,
+            'total_loss': path['loss'],
+            'safety_margin': safety_margin,
+            'som': som,
+            'status': LinkBudget.STATUS_TEXT[code],
+            'status_detail': LinkBudget.STATUS_DETAIL[code],
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._node_index
+
+    def __len__(self):
+        return len(self._span_index)
+
+
+@click.command()
+@click.option('--spans', 'spans_path', type=click.Path(exists=True, dir_okay=False),
+              required=True, help='Spans file (.csv or .parquet): a, b, length, ...')
+@click.option('--nodes', 'nodes_path', type=click.Path(exists=True, dir_okay=False),
+              help='Nodes file (.csv or .parquet): name, kind, ...')
+@click.option('--from', 'source', required=True, help='Start node')
+@click.option('--to', 'target', required=True, help='End node')
+@click.option('-k', '--paths', type=click.IntRange(min=1), default=1, show_default=True,
+              help='Number of lowest-loss paths')
+@click.option('--wavelength', type=int, default=1310, show_default=True, help='Wavelength (nm)')
+@click.option('--fiber-type', type=click.Choice(['SM', 'MM'], case_sensitive=False),
+              default='SM', help='Default fiber type')
+@click.option('--tx-power', type=float, help='Transmitter power (dBm), to grade each path')
+@click.option('--rx-sensitivity', type=float, help='Receiver sensitivity (dBm)')
+@click.option('--safety-margin', type=float, default=3.0, help='Safety margin (dB)')
+@format_option
+@profiling.profile_option
+def main(spans_path, nodes_path, source, target, paths, wavelength, fiber_type,
+         tx_power, rx_sensitivity, safety_margin, format):
+    """Find lowest-loss routes through a fiber network."""
+    if (tx_power is None) != (rx_sensitivity is None):
+        raise click.UsageError("--tx-power and --rx-sensitivity go together")
+    network = FiberNetwork.from_tables(spans_path, nodes_path, wavelength=wavelength,
+                                       fiber_type=fiber_type.upper())
+    for name in (source, target):
+        if name not in network:
+            raise click.BadParameter(f"Unknown node: {name}")
+
+    routes = network.k_shortest_paths(source, target, paths)
+    if tx_power is not None:
+        for route in routes:
+            route['budget'] = network.path_budget(route, tx_power, rx_sensitivity,
+                                                  safety_margin)
+
+    if format != 'table':
+        emit({'source': source, 'target': target, 'paths': routes}, format)
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    if not routes:
+        console.print(f"\n[red]No path from {source} to {target}[/red]\n")
+        return
+    table = Table(title=f"Lowest-loss paths: {source} -> {target}")
+    table.add_column("#", justify="right", style="cyan")
+    table.add_column("Loss", justify="right", style="red")
+    table.add_column("Length", justify="right", style="yellow")
+    table.add_column("Spans", justify="right")
+    table.add_column("Route", style="green")
+    if tx_power is not None:
+        table.add_column("SOM", justify="right")
+        table.add_column("Status")
+    colors = {'PASS': 'green', 'MARGINAL': 'yellow', 'FAIL': 'red'}
+    for rank, route in enumerate(routes, 1):
+        row = [str(rank), f"{route['loss']:.2f} dB", f"{route['length']:.2f} km",
+               str(len(route['spans'])), ' > '.join(map(str, route['nodes']))]
+        if tx_power is not None:
+            budget = route['budget']
+            color = colors[budget['status']]
+            row += [f"{budget['som']:.2f} dB", f"[{color}]{budget['status']}[/{color}]"]
+        table.add_row(*row)
+    console.print()
+    console.print(table)
+    console.print()
+
+
+if __name__ == '__main__':
+    main()
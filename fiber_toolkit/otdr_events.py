@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+OTDR Events
+Columnar event tables for OTDR traces.
+
+Events are held as a NumPy structured array (one row per event, with an
+integer ``EventType`` code) rather than a list of dicts, and summary
+statistics are computed for all event types in one vectorized pass.
+
+Author: David Osisek (CFOt)
+"""
+
+from enum import IntEnum
+from typing import Dict, Iterable, List, Mapping
+
+import numpy as np
+
+
+class EventType(IntEnum):
+    """Event type codes stored in the ``type`` column."""
+    START = 0
+    CONNECTOR = 1
+    SPLICE = 2
+    END = 3
+
+    @property
+    def label(self) -> str:
+        """Display name ('Connector', 'Splice', ...)."""
+        return self.name.title()
+
+    @classmethod
+    def from_label(cls, label: str) -> 'EventType':
+        return cls[label.upper()]
+
+
+EVENT_DTYPE = np.dtype([
+    ('number', '<u2'),
+    ('distance', '<f8'),       # km
+    ('type', 'u1'),            # EventType code
+    ('loss', '<f8'),           # dB
+    ('reflectance', '<f8'),    # dB, NaN for non-reflective events
+    ('slope', '<f4'),          # dB/km before the event
+    ('code', 'S6'),            # SR-4731 event code, e.g. b'1F9999'
+    ('technique', 'S2'),       # loss measurement technique
+])
+
+_LABELS = tuple(t.label for t in EventType)
+
+
+def empty_events(count: int = 0) -> np.ndarray:
+    """Zeroed event table with ``count`` rows."""
+    return np.zeros(count, dtype=EVENT_DTYPE)
+
+
+def from_records(records: Iterable[Mapping]) -> np.ndarray:
+    """Build an event table from dicts shaped like ``to_records`` output."""
+    records = list(records)
+    events = empty_events(len(records))
+    for row, record in zip(events, records):
+        reflectance = record.get('reflectance')
+        row['number'] = record.get('number', 0)
+        row['distance'] = record['distance']
+        row['type'] = EventType.from_label(record['type'])
+        row['loss'] = record.get('loss') or 0.0
+        row['reflectance'] = np.nan if reflectance is None else reflectance
+        row['slope'] = record.get('slope', 0.0)
+        row['code'] = record.get('code', '').encode('ascii')
+        row['technique'] = record.get('technique', '').encode('ascii')
+    return events
+
+
+def to_records(events: np.ndarray, comments: Mapping[int, str] = None) -> List[Dict]:
+    """
+    Expand an event table into JSON-ready dicts (for output and caching).
+
+    Args:
+        events: Event table
+        comments: Optional event comments keyed by event number
+    """
+    comments = comments or {}
+    records = []
+    for number, distance, kind, loss, refl, slope, code, technique in events.tolist():
+        records.append({
+            'number': number,
+            'distance': distance,
+            'type': _LABELS[kind],
+            'loss': loss,
+            'reflectance': None if refl != refl else refl,  # NaN -> None
+            'slope': round(slope, 6),
+            'code': code.decode('ascii', errors='replace'),
+            'technique': technique.decode('ascii', errors='replace'),
+            'comment': comments.get(number, ''),
+        })
+    return records
+
+
+def summarize(events: np.ndarray) -> Dict:
+    """
+    Summary statistics in one vectorized pass over the event table.
+
+    Per-type count, total, mean and worst loss (and worst reflectance)
+    come from ``np.bincount``/``ufunc.at`` grouped on the type code, so
+    the cost does not grow with the number of event types.
+
+    Returns:
+        Totals, connector/splice counts and averages, and ``by_type``
+        statistics for every type present
+    """
+    types = events['type'].astype(np.intp)
+    loss = events['loss']
+    bins = len(EventType)
+
+    counts = np.bincount(types, minlength=bins)
+    loss_sums = np.bincount(types, weights=loss, minlength=bins)
+    loss_max = np.full(bins, -np.inf)
+    np.maximum.at(loss_max, types, loss)
+    refl = events['reflectance']
+    reflective = ~np.isnan(refl)
+    refl_max = np.full(bins, -np.inf)
+    np.maximum.at(refl_max, types[reflective], refl[reflective])
+    means = np.divide(loss_sums, counts, out=np.zeros(bins), where=counts > 0)
+
+    total_loss = float(loss_sums.sum())
+    fiber_length = float(events['distance'].max())
+    by_type = {
+        _LABELS[code]: {
+            'count': int(counts[code]),
+            'total_loss': float(loss_sums[code]),
+            'avg_loss': float(means[code]),
+            'max_loss': float(loss_max[code]),
+            'max_reflectance': (float(refl_max[code])
+                                if np.isfinite(refl_max[code]) else None),
+        }
+        for code in np.flatnonzero(counts)
+    }
+
+    return {
+        'fiber_length': fiber_length,
+        'total_loss': total_loss,
+        'connector_count': int(counts[EventType.CONNECTOR]),
+        'splice_count': int(counts[EventType.SPLICE]),
+        'avg_connector_loss': float(means[EventType.CONNECTOR]),
+        'avg_splice_loss': float(means[EventType.SPLICE]),
+        'loss_per_km': total_loss / fiber_length if fiber_length > 0 else 0,
+        'by_type': by_type,
+    }
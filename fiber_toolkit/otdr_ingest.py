@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+OTDR Ingest
+Incremental directory ingest for OTDR trace files.
+
+A persistent manifest (SQLite) records each .sor file's mtime, size and
+content hash. After the first sweep, only new or modified files are parsed,
+and their results are appended to a running results table. Watch mode
+re-checks only directories whose mtime changed, with a periodic full stat
+sweep to catch files rewritten in place.
+
+Author: David Osisek (CFOt)
+"""
+
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .otdr_parser import analyze_file
+from .parallel import chunked, parallel_map
+from .result_cache import ResultCache, content_hash
+from .table_io import ChunkWriter
+
+MANIFEST_FILE = '.fiber-otdr-manifest.sqlite'
+RESULTS_FILE = 'otdr_results.csv'
+
+# Files parsed, written and committed together; a crash loses at most one batch
+BATCH_SIZE = 1024
+
+RESULT_COLUMNS = (
+    'filename', 'content_hash', 'cable_id', 'fiber_id', 'wavelength',
+    'fiber_length', 'total_loss', 'connector_count', 'splice_count',
+    'avg_connector_loss', 'avg_splice_loss', 'loss_per_km', 'error',
+)
+
+
+class IngestManifest:
+    """Persistent record of ingested files and scanned directories."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY,'
+            ' mtime_ns INTEGER NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' content_hash TEXT,'
+            ' ingested REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS dirs ('
+            ' path TEXT PRIMARY KEY,'
+            ' mtime_ns INTEGER NOT NULL);'
+        )
+
+    def files(self) -> Dict[str, Tuple[int, int, str]]:
+        """Known files: path -> (mtime_ns, size, content_hash)."""
+        rows = self._conn.execute('SELECT path, mtime_ns, size, content_hash FROM files')
+        return {path: (mtime, size, digest) for path, mtime, size, digest in rows}
+
+    def dirs(self) -> Dict[str, int]:
+        """Known directories: path -> mtime_ns at last scan."""
+        return dict(self._conn.execute('SELECT path, mtime_ns FROM dirs'))
+
+    def record_files(self, entries: List[Tuple[str, int, int, str]]):
+        """Record (path, mtime_ns, size, content_hash) for ingested files."""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                [entry + (now,) for entry in entries],
+            )
+
+    def record_dirs(self, entries: Dict[str, int]):
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO dirs VALUES (?, ?)',
+                                   entries.items())
+
+    def close(self):
+        self._conn.close()
+
+
+def _scan_tree(root: str, known_dirs: Optional[Dict[str, int]] = None
+               ) -> Tuple[Dict[str, os.stat_result], Dict[str, int]]:
+    """
+    Stat .sor files below ``root``.
+
+    With ``known_dirs``, directories whose mtime is unchanged are not
+    listed again (their subdirectories still are), so a poll costs one
+    stat per directory plus one per file in changed directories.
+
+    Returns:
+        (files: path -> stat, dirs: path -> mtime_ns)
+    """
+    files, dirs = {}, {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            dir_mtime = os.stat(directory).st_mtime_ns
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        dirs[directory] = dir_mtime
+        unchanged = known_dirs is not None and known_dirs.get(directory) == dir_mtime
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif (not unchanged and entry.name.lower().endswith('.sor')
+                  and entry.is_file()):
+                try:
+                    files[entry.path] = entry.stat()
+                except OSError:
+                    pass
+    return files, dirs
+
+
+def _hash_task(path: str) -> Optional[str]:
+    try:
+        return content_hash(path)
+    except OSError:
+        return None
+
+
+def _result_row(result: Dict, digest: str) -> Dict:
+    """Flatten an ``analyze_file`` result into one results-table row."""
+    analysis = result.get('analysis', {})
+    general = result.get('general', {})
+    error = result.get('error') or analysis.get('error', '')
+    row = {
+        'filename': result['filename'],
+        'content_hash': digest,
+        'cable_id': general.get('cable_id', ''),
+        'fiber_id': general.get('fiber_id', ''),
+        'wavelength': general.get('wavelength'),
+        'error': error,
+    }
+    for column in RESULT_COLUMNS[5:-1]:
+        row[column] = analysis.get(column)
+    return row
+
+
+class DirectoryIngest:
+    """Sweep a directory tree once, then ingest only new or changed traces."""
+
+    def __init__(self, directory: str, results_path: str = None,
+                 manifest_path: str = None, workers: int = 1,
+                 detect: bool = False, cache: ResultCache = None):
+        """
+        Args:
+            directory: Root of the trace tree
+            results_path: Running results table (.csv; appended to)
+            manifest_path: Manifest database (default: inside ``directory``)
+            workers: Worker processes (0 = one per CPU)
+            detect: Detect events from traces instead of KeyEvents
+            cache: Optional result cache shared with ``fiber-otdr``
+        """
+        self.directory = os.path.abspath(directory)
+        self.results_path = results_path or os.path.join(self.directory, RESULTS_FILE)
+        self.manifest = IngestManifest(
+            manifest_path or os.path.join(self.directory, MANIFEST_FILE))
+        self.workers = workers
+        self.detect = detect
+        self.cache = cache
+        self._scanned_dirs = {}
+
+    def pending(self, full: bool = True) -> List[Tuple[str, os.stat_result]]:
+        """
+        Files that are new or whose mtime/size changed since last ingest.
+
+        The scanned directories' mtimes are held back until ``ingest``
+        has committed the files found under them; recording them earlier
+        would let an interrupted run hide those files from the next
+        incremental poll.
+
+        Args:
+            full: Stat every file; otherwise skip unchanged directories
+        """
+        known_files = self.manifest.files()
+        files, dirs = _scan_tree(self.directory, None if full else self.manifest.dirs())
+        self._scanned_dirs = dirs
+        changed = []
+        for path in sorted(files):
+            stat = files[path]
+            known = known_files.get(path)
+            if known is None or known[:2] != (stat.st_mtime_ns, stat.st_size):
+                changed.append((path, stat))
+        return changed
+
+    def ingest(self, candidates: List[Tuple[str, os.stat_result]]) -> Dict:
+        """
+        Hash and parse candidate files, appending results in batches.
+
+        Files whose content hash is unchanged (touched, or copied back)
+        only have their manifest entry refreshed.
+
+        Returns:
+            Counts of files ingested, skipped as unchanged, and failed
+        """
+        known_files = self.manifest.files()
+        counts = {'ingested': 0, 'unchanged': 0, 'errors': 0}
+        task = _IngestTask(self.detect, self.cache)
+
+        with ChunkWriter(self.results_path, append=True) as writer:
+            for batch in chunked(candidates, BATCH_SIZE):
+                paths = [path for path, _ in batch]
+                digests = list(parallel_map(_hash_task, paths, self.workers))
+
+                todo, entries = [], []
+                for (path, stat), digest in zip(batch, digests):
+                    if digest is None:
+                        continue  # vanished mid-scan; next poll decides
+                    entries.append((path, stat.st_mtime_ns, stat.st_size, digest))
+                    known = known_files.get(path)
+                    if known is not None and known[2] == digest:
+                        counts['unchanged'] += 1
+                    else:
+                        todo.append((path, digest))
+
+                rows = list(parallel_map(task, todo, self.workers))
+                if rows:
+                    import pandas as pd
+                    writer.write(pd.DataFrame(rows, columns=RESULT_COLUMNS))
+                self.manifest.record_files(entries)
+                counts['ingested'] += len(rows)
+                counts['errors'] += sum(1 for row in rows if row['error'])
+        self._record_scan()
+        return counts
+
+    def _record_scan(self):
+        """Record the last scan's directory mtimes, once its files are in."""
+        self.manifest.record_dirs(self._scanned_dirs)
+        self._scanned_dirs = {}
+
+    def run(self, watch: bool = False, interval: float = 10.0,
+            full_rescan_every: int = 60) -> Iterator[Dict]:
+        """
+        Initial sweep, then (with ``watch``) poll for new or changed files.
+
+        Args:
+            watch: Keep polling until interrupted
+            interval: Seconds between polls
+            full_rescan_every: Polls between full stat sweeps
+
+        Yields:
+            Per-poll counts from ``ingest``, plus ``pending``
+        """
+        poll = 0
+        while True:
+            full = poll % max(1, full_rescan_every) == 0
+            candidates = self.pending(full=full)
+            if candidates:
+                counts = self.ingest(candidates)
+            else:
+                counts = {'ingested': 0, 'unchanged': 0, 'errors': 0}
+                self._record_scan()
+            counts['pending'] = len(candidates)
+            yield counts
+            if not watch:
+                return
+            poll += 1
+            time.sleep(interval)
+
+    def close(self):
+        self.manifest.close()
+
+
+class _IngestTask:
+    """Picklable per-file task: analyze and flatten to a results row."""
+
+    def __init__(self, detect: bool, cache: Optional[ResultCache]):
+        self.detect = detect
+        self.cache = cache
+
+    def __call__(self, item: Tuple[str, str]) -> Dict:
+        path, digest = item
+        result = analyze_file(path, detect=self.detect, cache=self.cache, digest=digest)
+        return _result_row(result, digest)
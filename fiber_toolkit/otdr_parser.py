@@ -8,103 +8,464 @@ Standards: Bellcore/Telcordia SR-4731, IEC 61280-4-1
 """
 
 import click
-import json
-from rich.console import Console
-from rich.table import Table
-from typing import Dict, List
+import mmap
+import os
+import time
+import numpy as np
+from typing import Dict, Iterator, List
 from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+from . import otdr_events, profiling, sor_format, trace_analysis
+from .cli_output import emit, format_option
+from .parallel import parallel_map
+from .result_cache import ResultCache, content_hash
+
+# Bump whenever decoding or analysis output changes, to retire cached results
+PARSER_VERSION = '4'
 
 class OTDRParser:
     """Parse OTDR trace files in Bellcore/Telcordia .sor format."""
     
+    # Decoders for the blocks this parser understands, by block name
+    BLOCK_DECODERS = {
+        'GenParams': ('general', sor_format.decode_general),
+        'SupParams': ('supplier', sor_format.decode_supplier),
+        'FxdParams': ('fixed', sor_format.decode_fixed),
+    }
+    
     def __init__(self, filename: str):
         self.filename = filename
         self.data = {}
-        self.events = []
+        self._buffer = None
+        self._revision = None
+        self._blocks = {}
+        self._events = None
+        self._trace = None
+        self.event_comments = {}
     
+    @profiling.timed('otdr.parse')
     def parse(self) -> Dict:
-        """Parse OTDR file."""
+        """
+        Parse OTDR file.
+        
+        The file is memory-mapped and only the block map and the small
+        header blocks are decoded here. KeyEvents and DataPts are decoded
+        on first access to ``events`` / ``trace``, so a headers-only scan
+        touches a few KB of each file.
+        
+        Returns:
+            Dictionary of file metadata and decoded header blocks
+        """
+        self.close()
         try:
             with open(self.filename, 'rb') as f:
-                content = f.read()
-                if len(content) < 100:
+                file_size = os.fstat(f.fileno()).st_size
+                if file_size < 100:
                     return {'error': 'File too small'}
-                
-                self.data = {
-                    'filename': self.filename,
-                    'file_size': len(content),
-                    'parsed_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'format': 'Bellcore/Telcordia SOR',
-                    'note': 'Full .sor parsing requires specialized libraries'
-                }
-                
-                # Simulated events for demonstration
-                self.events = [
-                    {'distance': 0.0, 'type': 'Start', 'loss': 0.0, 'reflectance': None},
-                    {'distance': 0.523, 'type': 'Connector', 'loss': 0.45, 'reflectance': -45.2},
-                    {'distance': 2.156, 'type': 'Splice', 'loss': 0.12, 'reflectance': None},
-                    {'distance': 4.892, 'type': 'Connector', 'loss': 0.52, 'reflectance': -43.8},
-                    {'distance': 5.234, 'type': 'End', 'loss': 0.0, 'reflectance': -18.5},
-                ]
-                
-                return self.data
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._buffer, 'madvise') and hasattr(mmap, 'MADV_RANDOM'):
+                # Blocks are read by offset; don't let readahead pull in DataPts
+                self._buffer.madvise(mmap.MADV_RANDOM)
+            self._decode_headers(file_size)
+            return self.data
         except FileNotFoundError:
             return {'error': f'File not found: {self.filename}'}
+        except sor_format.SORFormatError as e:
+            self.close()
+            return {'error': f'Invalid SOR file: {e}'}
         except Exception as e:
+            self.close()
             return {'error': f'Error: {str(e)}'}
     
-    def analyze(self) -> Dict:
-        """Analyze parsed OTDR data."""
-        if not self.events:
-            return {'error': 'No events'}
+    def _decode_headers(self, file_size: int):
+        """Walk the block map and decode the header blocks."""
+        self._revision, blocks = sor_format.read_block_map(self._buffer)
+        profiling.count('otdr.files')
+        profiling.count('otdr.bytes_read', blocks[0].offset if blocks else 0)
+        self._blocks = {block.name: block for block in blocks}
+        self.data = {
+            'filename': self.filename,
+            'file_size': file_size,
+            'parsed_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'format': 'Bellcore/Telcordia SOR',
+            'revision': self._revision,
+            'blocks': [block._asdict() for block in blocks],
+        }
+        
+        for name, (key, decoder) in self.BLOCK_DECODERS.items():
+            reader = self._block_reader(name)
+            if reader is not None:
+                self.data[key] = decoder(reader, self._revision)
         
-        total_loss = sum(e['loss'] for e in self.events if e['loss'])
-        connectors = len([e for e in self.events if e['type'] == 'Connector'])
-        splices = len([e for e in self.events if e['type'] == 'Splice'])
-        fiber_length = max(e['distance'] for e in self.events)
+        points = self.data.get('fixed', {}).get('points')
+        if points and 'DataPts' in self._blocks:
+            self.data['trace_points'] = points[0]
+    
+    def _block_reader(self, name: str):
+        """Reader for a named block, or None if absent or not parsed."""
+        if self._buffer is None or name not in self._blocks:
+            return None
+        profiling.count('otdr.bytes_read', self._blocks[name].size)
+        return sor_format.block_reader(self._buffer, self._blocks[name],
+                                       self._revision)
+    
+    @property
+    def events(self) -> np.ndarray:
+        """
+        Event table (``otdr_events.EVENT_DTYPE`` structured array).
         
-        avg_connector = 0
-        if connectors > 0:
-            conn_losses = [e['loss'] for e in self.events if e['type'] == 'Connector']
-            avg_connector = sum(conn_losses) / len(conn_losses)
+        Decoded from KeyEvents on first access. Assigning a list of event
+        dicts converts it to the columnar form.
+        """
+        if self._events is None:
+            reader = self._block_reader('KeyEvents')
+            if reader is None:
+                return otdr_events.empty_events()
+            group_index = self.data.get('fixed', {}).get('group_index', 0)
+            with profiling.stage('otdr.decode_events'):
+                self._events, self.data['summary'], self.event_comments = (
+                    sor_format.decode_key_events(reader, self._revision, group_index))
+        return self._events
+    
+    @events.setter
+    def events(self, events):
+        if not isinstance(events, np.ndarray):
+            events = otdr_events.from_records(events)
+        self._events = events
+    
+    def event_records(self) -> List[Dict]:
+        """Events as a list of dicts, for JSON output and display."""
+        return otdr_events.to_records(self.events, self.event_comments)
+    
+    @property
+    def trace(self):
+        """Backscatter trace (dB, NumPy array), decoded on first access."""
+        if self._trace is None:
+            reader = self._block_reader('DataPts')
+            if reader is None:
+                return None
+            # Scaling copies the samples out of the mapping, so the cached
+            # trace stays valid after close()
+            with profiling.stage('otdr.decode_trace'):
+                self._trace = sor_format.decode_data_points(reader, self._revision)
+        return self._trace
+    
+    @profiling.timed('otdr.detect')
+    def detect_events(self) -> np.ndarray:
+        """
+        Detect events from the backscatter trace instead of KeyEvents.
         
-        avg_splice = 0
-        if splices > 0:
-            splice_losses = [e['loss'] for e in self.events if e['type'] == 'Splice']
-            avg_splice = sum(splice_losses) / len(splice_losses)
+        Thresholds, pulse width and group index come from FxdParams, with
+        the ``trace_analysis`` defaults for any the file leaves at zero.
+        The result replaces ``self.events``.
         
-        return {
-            'fiber_length': fiber_length,
-            'total_loss': total_loss,
-            'connector_count': connectors,
-            'splice_count': splices,
-            'avg_connector_loss': avg_connector,
-            'avg_splice_loss': avg_splice,
-            'loss_per_km': total_loss / fiber_length if fiber_length > 0 else 0
-        }
+        Returns:
+            Detected event table, in the same form as decoded KeyEvents
+        """
+        trace = self.trace
+        if trace is None:
+            return otdr_events.empty_events()
+        fixed = self.data.get('fixed', {})
+        pulse_widths = fixed.get('pulse_widths') or [0]
+        self.event_comments = {}
+        self.events = trace_analysis.detect_events(
+            trace,
+            fixed.get('sample_spacing_km', 0.0),
+            pulse_width_ns=pulse_widths[0],
+            group_index=fixed.get('group_index') or 1.4682,
+            loss_threshold=fixed.get('loss_threshold') or trace_analysis.LOSS_THRESHOLD,
+            reflectance_threshold=(fixed.get('reflectance_threshold')
+                                   or trace_analysis.REFLECTANCE_THRESHOLD),
+            eof_threshold=fixed.get('eof_threshold') or trace_analysis.EOF_THRESHOLD,
+            backscatter=fixed.get('backscatter') or trace_analysis.BACKSCATTER_1NS,
+        )
+        return self.events
+    
+    def distances(self) -> np.ndarray:
+        """Distance (km) of every trace sample."""
+        trace = self.trace
+        if trace is None:
+            return np.empty(0)
+        spacing = self.data.get('fixed', {}).get('sample_spacing_km', 0.0)
+        return np.arange(len(trace)) * spacing
+    
+    def close(self):
+        """Release the file mapping; blocks not yet decoded become unavailable."""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+    
+    @profiling.timed('otdr.analyze')
+    def analyze(self, detect: bool = False) -> Dict:
+        """
+        Analyze parsed OTDR data.
+        
+        Args:
+            detect: Detect events from the trace rather than using the
+                KeyEvents table; files without KeyEvents always do
+        """
+        try:
+            if detect or not len(self.events):
+                self.detect_events()
+            if not len(self.events):
+                return {'error': 'No events'}
+        except sor_format.SORFormatError as e:
+            return {'error': f'Invalid SOR file: {e}'}
+        
+        return otdr_events.summarize(self.events)
+
+
+def analyze_file(filename: str, headers_only: bool = False,
+                 detect: bool = False, cache: ResultCache = None,
+                 digest: str = None) -> Dict:
+    """
+    Parse and analyze one trace file (the unit of work for directory ingest).
+    
+    Header-only reads skip the cache: they decode a few hundred bytes,
+    while the cache key would need a hash of the whole file.
+    
+    Args:
+        filename: Trace file (.sor)
+        headers_only: Decode only the header blocks, skipping KeyEvents
+            and DataPts entirely
+        detect: Detect events from the trace instead of KeyEvents
+        cache: Result cache; a hit on the file's content hash skips
+            decoding entirely
+        digest: The file's ``content_hash``, if the caller already has it
+    
+    Returns:
+        Parsed header data, plus ``analysis`` and ``events`` unless
+        ``headers_only``; ``{'filename', 'error'}`` on failure
+    """
+    key = None
+    if cache is not None and not headers_only:
+        try:
+            key = cache.make_key(digest or content_hash(filename), PARSER_VERSION,
+                                 'detect' if detect else 'keyevents')
+        except OSError:
+            key = None  # let the parser report the problem
+        else:
+            cached = cache.get(key)
+            if cached is not None:
+                cached['filename'] = filename
+                return cached
+    
+    with OTDRParser(filename) as parser:
+        data = parser.parse()
+        if 'error' in data:
+            return {'filename': filename, 'error': data['error']}
+        if headers_only:
+            result = data
+        else:
+            result = dict(data, analysis=parser.analyze(detect), events=parser.event_records())
+    
+    if key is not None:
+        cache.put(key, result)
+    return result
+
+
+def find_traces(directory: str) -> List[str]:
+    """Return every .sor file below ``directory``, in sorted order."""
+    return sorted(str(p) for p in Path(directory).rglob('*')
+                  if p.suffix.lower() == '.sor' and p.is_file())
+
+
+def analyze_directory(directory: str, workers: int = 1,
+                      headers_only: bool = False, detect: bool = False,
+                      cache: ResultCache = None) -> Iterator[Dict]:
+    """
+    Parse and analyze every .sor file in a directory tree.
+    
+    Args:
+        directory: Root directory to scan recursively
+        workers: Worker processes (0 = one per CPU)
+        headers_only: Read only the header blocks of each file
+        detect: Detect events from each trace instead of KeyEvents
+        cache: Result cache shared by all workers
+    
+    Yields:
+        ``analyze_file`` results in sorted filename order
+    """
+    task = partial(analyze_file, headers_only=headers_only, detect=detect,
+                   cache=cache)
+    return parallel_map(task, find_traces(directory), workers)
+
 
-@click.command()
-@click.option('--file', required=True, help='OTDR trace file (.sor)')
-@click.option('--format', type=click.Choice(['table', 'json']), default='table')
+@click.group(invoke_without_command=True)
+@click.option('--file', help='OTDR trace file (.sor)')
+@click.option('--dir', 'directory', type=click.Path(exists=True, file_okay=False),
+              help='Directory of .sor files to ingest (recursive)')
+@format_option
 @click.option('--analyze', is_flag=True, help='Show analysis')
-def main(file, format, analyze):
+@click.option('--workers', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Worker processes for --dir (0 = one per CPU)')
+@click.option('--headers-only', is_flag=True,
+              help='With --dir, read only header blocks (no events or trace)')
+@click.option('--detect', is_flag=True,
+              help='Detect events from the backscatter trace instead of KeyEvents')
+@click.option('--cache-dir', type=click.Path(file_okay=False),
+              help='Result cache directory (default: ~/.cache/fiber-toolkit); '
+                   'single files are cached only when this is given')
+@click.option('--no-cache', is_flag=True, help='Always re-parse; skip the result cache')
+@click.pass_context
+@profiling.profile_option
+def main(ctx, file, directory, format, analyze, workers, headers_only, detect,
+         cache_dir, no_cache):
     """Parse and analyze OTDR trace files."""
+    if ctx.invoked_subcommand is not None:
+        return
+    
+    if bool(file) == bool(directory):
+        raise click.UsageError("Specify exactly one of --file or --dir")
+    
+    # A one-off --file run shouldn't leave a cache database behind unasked
+    use_cache = not no_cache and (directory or cache_dir)
+    cache = ResultCache(cache_dir) if use_cache else None
+    
+    if directory:
+        results = analyze_directory(directory, workers, headers_only, detect, cache)
+        if format != 'table':
+            emit(list(results), format)
+            return
+        
+        from rich.console import Console
+        from rich.table import Table
+        console = Console()
+        
+        if headers_only:
+            table = Table(title="OTDR Trace Headers", show_header=True)
+            table.add_column("File", style="cyan")
+            table.add_column("Cable", style="green")
+            table.add_column("Fiber", style="green")
+            table.add_column("Wavelength (nm)", justify="right", style="yellow")
+            table.add_column("Points", justify="right")
+            for item in results:
+                if 'error' in item:
+                    table.add_row(item['filename'], "", "", "", f"[red]{item['error']}[/red]")
+                    continue
+                general = item.get('general', {})
+                table.add_row(
+                    item['filename'],
+                    general.get('cable_id', ''),
+                    general.get('fiber_id', ''),
+                    str(general.get('wavelength', '')),
+                    str(item.get('trace_points', '')),
+                )
+            console.print(table)
+            return
+        
+        table = Table(title="OTDR Directory Ingest", show_header=True)
+        table.add_column("File", style="cyan")
+        table.add_column("Length (km)", justify="right", style="green")
+        table.add_column("Total Loss (dB)", justify="right", style="yellow")
+        table.add_column("Events", justify="right")
+        for item in results:
+            if 'error' in item:
+                table.add_row(item['filename'], "", "", f"[red]{item['error']}[/red]")
+                continue
+            analysis = item['analysis']
+            table.add_row(
+                item['filename'],
+                f"{analysis.get('fiber_length', 0):.3f}",
+                f"{analysis.get('total_loss', 0):.2f}",
+                str(analysis.get('connector_count', 0) + analysis.get('splice_count', 0)),
+            )
+        console.print(table)
+        return
+    
+    result = analyze_file(file, headers_only=not analyze, detect=detect, cache=cache)
+    if format != 'table':
+        emit(result, format)
+        return
+    
+    from rich.console import Console
+    from rich.table import Table
     console = Console()
-    parser = OTDRParser(file)
-    result = parser.parse()
     
     if 'error' in result:
         console.print(f"[red]Error: {result['error']}[/red]")
         return
     
-    if format == 'json':
-        print(json.dumps(result, indent=2))
-    else:
-        console.print("\n[bold cyan]OTDR Trace Analysis[/bold cyan]")
-        if analyze:
-            analysis = parser.analyze()
-            console.print(f"Length: {analysis['fiber_length']:.3f} km")
-            console.print(f"Total Loss: {analysis['total_loss']:.2f} dB")
+    console.print("\n[bold cyan]OTDR Trace Analysis[/bold cyan]")
+    if analyze:
+        analysis = result['analysis']
+        if 'error' in analysis:
+            console.print(f"[red]Error: {analysis['error']}[/red]")
+            return
+        
+        events_table = Table(title="Events", show_header=True)
+        events_table.add_column("#", justify="right")
+        events_table.add_column("Type", style="cyan")
+        events_table.add_column("Distance (km)", justify="right", style="green")
+        events_table.add_column("Loss (dB)", justify="right", style="yellow")
+        events_table.add_column("Reflectance (dB)", justify="right", style="magenta")
+        for event in result['events']:
+            reflectance = event['reflectance']
+            events_table.add_row(
+                str(event['number']),
+                event['type'],
+                f"{event['distance']:.3f}",
+                f"{event['loss']:.2f}",
+                "" if reflectance is None else f"{reflectance:.1f}",
+            )
+        console.print(events_table)
+        
+        console.print(f"Length: {analysis['fiber_length']:.3f} km")
+        console.print(f"Total Loss: {analysis['total_loss']:.2f} dB")
+
+
+@main.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--watch', is_flag=True, help='Keep polling for new or modified files')
+@click.option('--interval', type=click.FloatRange(min=0.1), default=10.0, show_default=True,
+              help='Seconds between polls with --watch')
+@click.option('--full-rescan-every', type=click.IntRange(min=1), default=60, show_default=True,
+              help='Polls between full stat sweeps (others skip unchanged directories)')
+@click.option('--results', type=click.Path(dir_okay=False),
+              help='Running results table, appended to (default: DIRECTORY/otdr_results.csv)')
+@click.option('--manifest', type=click.Path(dir_okay=False),
+              help='Ingest manifest (default: DIRECTORY/.fiber-otdr-manifest.sqlite)')
+@click.option('--workers', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Worker processes (0 = one per CPU)')
+@click.option('--detect', is_flag=True,
+              help='Detect events from the backscatter trace instead of KeyEvents')
+@click.option('--cache-dir', type=click.Path(file_okay=False),
+              help='Result cache directory (default: ~/.cache/fiber-toolkit)')
+@click.option('--no-cache', is_flag=True, help='Always re-parse; skip the result cache')
+def ingest(directory, watch, interval, full_rescan_every, results, manifest,
+           workers, detect, cache_dir, no_cache):
+    """Ingest new or modified .sor files below DIRECTORY."""
+    from rich.console import Console
+    from .otdr_ingest import DirectoryIngest
+    
+    console = Console()
+    if results and not results.lower().endswith('.csv'):
+        raise click.UsageError("--results must be a .csv file (it is appended to)")
+    
+    cache = None if no_cache else ResultCache(cache_dir)
+    ingester = DirectoryIngest(directory, results, manifest, workers, detect, cache)
+    console.print(f"[cyan]Ingesting {ingester.directory} -> {ingester.results_path}[/cyan]")
+    try:
+        for counts in ingester.run(watch, interval, full_rescan_every):
+            if counts['pending'] or not watch:
+                console.print(
+                    f"{time.strftime('%H:%M:%S')} ingested {counts['ingested']}, "
+                    f"unchanged {counts['unchanged']}, errors {counts['errors']}"
+                )
+    except KeyboardInterrupt:
+        console.print("[yellow]Stopped[/yellow]")
+    finally:
+        ingester.close()
+
 
 if __name__ == '__main__':
     main()
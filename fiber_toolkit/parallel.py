@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Parallel Execution
+Shared process-pool layer for large link-budget and OTDR jobs.
+
+Author: David Osisek (CFOt)
+"""
+
+import os
+from collections import deque
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from . import profiling
+
+# Files per task when fanning out many small jobs (e.g. one .sor per item);
+# large enough that pickling and IPC are a small fraction of the work
+DEFAULT_ITEMS_PER_TASK = 64
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Return the worker count to use; 0 or None means one per CPU."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def imap_ordered(func: Callable, tasks: Iterable, workers: int = 1,
+                 max_pending: Optional[int] = None) -> Iterator:
+    """
+    Apply ``func`` to each task across a process pool, yielding in order.
+
+    Unlike ``Executor.map``, tasks are pulled from ``tasks`` lazily and at
+    most ``max_pending`` are in flight, so a streamed input (e.g. CSV
+    chunks) is never materialized in full.
+
+    Args:
+        func: Picklable (module-level) function of one argument
+        tasks: Iterable of task arguments
+        workers: Worker processes; 1 runs inline without a pool
+        max_pending: In-flight task limit (default: 2 per worker)
+
+    Yields:
+        ``func(task)`` results in input order
+    """
+    workers = resolve_workers(workers)
+    if workers == 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    # Deferred: the pool machinery is only needed with more than one worker
+    from concurrent.futures import ProcessPoolExecutor
+
+    profiled = profiling.enabled()
+    if profiled:
+        # Workers send back their stage and counter totals with each result
+        func = partial(profiling.call_profiled, func)
+
+    def result(future):
+        if not profiled:
+            return future.result()
+        value, totals = future.result()
+        profiling.merge(totals)
+        return value
+
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(func, task))
+            if len(pending) >= max_pending:
+                yield result(pending.popleft())
+        while pending:
+            yield result(pending.popleft())
+
+
+def _apply_chunk(func: Callable, items: List) -> List:
+    """Run ``func`` over one chunk of items inside a worker."""
+    return [func(item) for item in items]
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most ``size`` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parallel_map(func: Callable, items: Iterable, workers: int = 1,
+                 items_per_task: int = DEFAULT_ITEMS_PER_TASK) -> Iterator:
+    """
+    Map ``func`` over many small items, batching them per worker task.
+
+    Args:
+        func: Picklable (module-level) function of one item
+        items: Items to process
+        workers: Worker processes; 1 runs inline without a pool
+        items_per_task: Items sent to a worker per round trip
+
+    Yields:
+        ``func(item)`` results in input order
+    """
+    tasks = chunked(items, items_per_task)
+    for results in imap_ordered(partial(_apply_chunk, func), tasks, workers):
+        yield from results
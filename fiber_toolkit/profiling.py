@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Profiling
+Opt-in stage timers and counters for finding where a run spends its time.
+
+Hot paths mark their stages (parse, analysis, rendering, table I/O) with
+``stage()`` and tally items, bytes and cache hits with ``count()``. While
+profiling is off - the default - ``stage()`` hands back one shared no-op
+context and ``count()`` returns after a single flag check, so the
+instrumented code costs one function call per marked step.
+
+Every CLI takes ``--profile`` (or FIBER_TOOLKIT_PROFILE=1, json or
+prometheus) and prints per-stage wall and CPU time, counters and cache
+hit rates to stderr, or to FIBER_TOOLKIT_PROFILE_OUTPUT, when the command
+finishes; ``--profile-format prometheus`` (which implies ``--profile``)
+gives the Prometheus text format.
+``--profile-dump FILE`` (or FIBER_TOOLKIT_PROFILE_DUMP) also saves a
+cProfile of the command for ``pstats``/snakeviz. Stages and counters from
+``parallel`` worker processes are merged into the parent's report.
+
+Author: David Osisek (CFOt)
+"""
+
+import functools
+import json
+import os
+import time
+from typing import Callable, Dict
+
+import click
+
+PROFILE_FORMATS = ('json', 'prometheus')
+METRIC_PREFIX = 'fiber_toolkit'
+
+# stage name -> [calls, wall seconds, CPU seconds]; counter name -> total
+_stages: Dict[str, list] = {}
+_counters: Dict[str, float] = {}
+# Cache name -> callable returning (hits, misses), read at report time
+_cache_sources: Dict[str, Callable] = {}
+_enabled = False
+_started = (0.0, 0.0)
+
+
+class _NullStage:
+    """Context manager that does nothing; returned by stage() when disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'wall', 'cpu')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        totals = _stages.get(self.name)
+        if totals is None:
+            totals = _stages[self.name] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += time.perf_counter() - self.wall
+        totals[2] += time.process_time() - self.cpu
+        return False
+
+
+def stage(name: str):
+    """
+    Time a block as stage ``name`` (``with profiling.stage('otdr.parse'):``).
+
+    Stages may nest; each reports its own inclusive time.
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of ``stage()``, timing every call of a function."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, value: float = 1):
+    """Add ``value`` to counter ``name``; ``<cache>.hits``/``.misses`` pairs give hit rates."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def register_cache(name: str, info: Callable):
+    """
+    Report the hit rate of a cache that keeps its own statistics.
+
+    Args:
+        name: Cache name in the report
+        info: Callable returning an object with ``hits`` and ``misses``
+            (e.g. an ``lru_cache``'d function's ``cache_info``)
+    """
+    _cache_sources[name] = info
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable():
+    """Start collecting; totals from any earlier session are discarded."""
+    global _enabled, _started
+    reset()
+    _enabled = True
+    _started = (time.perf_counter(), time.process_time())
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    _stages.clear()
+    _counters.clear()
+
+
+def snapshot() -> Dict:
+    """Raw stage and counter totals, picklable, for merging across processes."""
+    return {'stages': {name: list(totals) for name, totals in _stages.items()},
+            'counters': dict(_counters)}
+
+
+def merge(totals: Dict):
+    """Add a ``snapshot()`` (e.g. from a worker process) to this process's totals."""
+    for name, (calls, wall, cpu) in totals['stages'].items():
+        own = _stages.setdefault(name, [0, 0.0, 0.0])
+        own[0] += calls
+        own[1] += wall
+        own[2] += cpu
+    for name, value in totals['counters'].items():
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def call_profiled(func: Callable, task):
+    """
+    Run ``func(task)`` in a worker with profiling on.
+
+    Returns:
+        (result, ``snapshot()`` of the stages and counters it recorded)
+    """
+    enable()
+    result = func(task)
+    return result, snapshot()
+
+
+def report(command: str = None) -> Dict:
+    """
+    Totals since ``enable()``.
+
+    Returns:
+        Dictionary with the run's wall and CPU time, ``stages`` (calls,
+        wall and CPU seconds per stage), ``counters`` and ``cache_hit_rate``
+    """
+    wall = time.perf_counter() - _started[0]
+    cpu = time.process_time() - _started[1]
+    caches = {}
+    for name in _counters:
+        cache, _, kind = name.rpartition('.')
+        if kind in ('hits', 'misses'):
+            caches[cache] = (_counters.get(f'{cache}.hits', 0),
+                             _counters.get(f'{cache}.misses', 0))
+    for name, info in _cache_sources.items():
+        stats = info()
+        if stats.hits or stats.misses:
+            caches[name] = (stats.hits, stats.misses)
+    return {
+        'command': command,
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'stages': {name: {'calls': calls, 'wall_s': stage_wall, 'cpu_s': stage_cpu}
+                   for name, (calls, stage_wall, stage_cpu) in sorted(_stages.items())},
+        'counters': dict(sorted(_counters.items())),
+        'cache_hit_rate': {name: hits / (hits + misses) if hits + misses else None
+                           for name, (hits, misses) in sorted(caches.items())},
+    }
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(data: Dict) -> str:
+    """Render a ``report()`` in the Prometheus text exposition format."""
+    command = f'command="{_label(data["command"] or "")}"'
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {METRIC_PREFIX}_{name} {help_text}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_{name} {kind}')
+        for labels, value in samples:
+            lines.append(f'{METRIC_PREFIX}_{name}{{{command}{labels}}} {float(value)!r}')
+
+    metric('run_wall_seconds', 'gauge', 'Wall time of the command.', [('', data['wall_s'])])
+    metric('run_cpu_seconds', 'gauge', 'CPU time of the command.', [('', data['cpu_s'])])
+    stages = data['stages'].items()
+    metric('stage_calls_total', 'counter', 'Times each stage ran.',
+           [(f',stage="{_label(name)}"', totals['calls']) for name, totals in stages])
+    metric('stage_wall_seconds_total', 'counter', 'Wall time spent in each stage.',
+           [(f',stage="{_label(name)}"', totals['wall_s']) for name, totals in stages])
+    metric('stage_cpu_seconds_total', 'counter', 'CPU time spent in each stage.',
+           [(f',stage="{_label(name)}"', totals['cpu_s']) for name, totals in stages])
+    metric('events_total', 'counter', 'Items, bytes and cache lookups counted by name.',
+           [(f',counter="{_label(name)}"', value) for name, value in data['counters'].items()])
+    metric('cache_hit_ratio', 'gauge', 'Cache hits over lookups.',
+           [(f',cache="{_label(name)}"', rate)
+            for name, rate in data['cache_hit_rate'].items() if rate is not None])
+    return '\n'.join(lines) + '\n'
+
+
+def _finish(command: str, format: str, profiler, dump_path: str):
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(dump_path)
+    data = report(command)
+    disable()
+    if format is None:
+        return
+    text = prometheus_text(data) if format == 'prometheus' else json.dumps(data, indent=2)
+    output = os.environ.get('FIBER_TOOLKIT_PROFILE_OUTPUT')
+    if output:
+        with open(output, 'w') as f:
+            f.write(text if text.endswith('\n') else text + '\n')
+    else:
+        click.echo(text, err=True)
+
+
+def profile_option(func: Callable) -> Callable:
+    """
+    Add ``--profile``, ``--profile-format`` and ``--profile-dump`` to a
+    click command.
+
+    The report is written when the command's context closes, so for a
+    group it covers the subcommand too.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, profile=False, profile_format=None, profile_dump=None, **kwargs):
+        setting = os.environ.get('FIBER_TOOLKIT_PROFILE', '').lower()
+        if setting in PROFILE_FORMATS:
+            profile_format = profile_format or setting
+        # Asking for a report format is asking for the report
+        profile = (profile or profile_format is not None
+                   or setting not in ('', '0', 'false', 'no'))
+        profile_dump = profile_dump or os.environ.get('FIBER_TOOLKIT_PROFILE_DUMP')
+        if not profile and not profile_dump:
+            return func(*args, **kwargs)
+
+        ctx = click.get_current_context()
+        report_format = (profile_format or 'json') if profile else None
+        enable()
+        profiler = None
+        if profile_dump:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        ctx.call_on_close(functools.partial(_finish, ctx.info_name, report_format,
+                                            profiler, profile_dump))
+        return func(*args, **kwargs)
+
+    for option in reversed((
+        click.option('--profile', is_flag=True,
+                     help='Print stage timings, counters and cache hit rates to stderr'),
+        click.option('--profile-format', type=click.Choice(PROFILE_FORMATS),
+                     help='Profile report format; implies --profile  [default: json]'),
+        click.option('--profile-dump', type=click.Path(dir_okay=False),
+                     help='Save a cProfile of the command (pstats format)'),
+    )):
+        wrapper = option(wrapper)
+    return wrapper
@@ -8,54 +8,338 @@ Author: David Osisek (CFOt)
 
 import click
 from datetime import datetime
-from rich.console import Console
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Sequence
+
+from . import profiling
+from .result_store import MemoryResultStore
+from .table_io import iter_chunks
+
+# Section for results added without one
+DEFAULT_SECTION = 'General'
+
+# Links evaluated (and expanded to row dicts) at a time when streaming a report
+LINK_CHUNK_SIZE = 2_000
 
 class FiberTestReport:
     """Generate professional PDF test reports."""
     
     def __init__(self, project_name: str, test_date: str = None, 
-                 technician: str = None):
+                 technician: str = None, store=None):
+        """
+        Args:
+            project_name: Project shown on every page
+            test_date: Test date (default: today)
+            technician: Technician name
+            store: Where added results are kept: a ``MemoryResultStore``
+                (default) or a ``SQLiteResultStore`` for projects too large
+                for RAM or spanning several sessions
+        """
         self.project_name = project_name
         self.test_date = test_date or datetime.now().strftime('%Y-%m-%d')
         self.technician = technician or 'Not specified'
-        self.test_results = []
+        self.store = store if store is not None else MemoryResultStore()
+        self.store.set_metadata({
+            'project_name': self.project_name,
+            'test_date': self.test_date,
+            'technician': self.technician,
+        })
+        self._writer = None
+        self._section = None
+    
+    @classmethod
+    def resume(cls, store) -> 'FiberTestReport':
+        """Reopen a report from a store session that recorded its metadata."""
+        metadata = store.metadata
+        if not metadata:
+            raise ValueError("Store session has no report metadata to resume")
+        return cls(metadata['project_name'], metadata.get('test_date'),
+                   metadata.get('technician'), store=store)
+    
+    @property
+    def test_results(self) -> Sequence[Dict]:
+        """
+        Every stored result, in the order added.
+        
+        With the default in-memory store this is the store's own list, so
+        appending to it adds a result as it always has. Other stores give
+        a read-only tuple; add results with ``add_link_budget`` and
+        ``add_otdr_test``.
+        """
+        if isinstance(self.store, MemoryResultStore):
+            return self.store.items
+        return tuple(self.store)
+    
+    def _add(self, item: Dict):
+        # While a PDF is open, results are rendered immediately; the
+        # in-memory store doesn't keep them, so memory stays bounded, but a
+        # persistent store does, so the session can be resumed later
+        if self._writer is None or not isinstance(self.store, MemoryResultStore):
+            self.store.append(item)
+        if self._writer is not None:
+            self._render(item)
     
-    def add_link_budget(self, results: dict):
-        """Add link budget results to report."""
-        self.test_results.append({
+    @profiling.timed('report.render')
+    def _render(self, item: Dict):
+        section = item.get('section')
+        if section is not None and section != self._section:
+            self._writer.section_title(section)
+            self._section = section
+        self._writer.add(item)
+    
+    def add_link_budget(self, results: dict, section: str = None):
+        """
+        Add link budget results to report.
+        
+        Args:
+            results: ``LinkBudget.calculate()`` output (optionally with
+                ``link_id`` and ``fiber_length``)
+            section: Report section (e.g. cable or building) to file it under
+        """
+        self._add({
             'type': 'link_budget',
+            'section': section,
             'data': results
         })
     
-    def add_otdr_test(self, results: dict):
-        """Add OTDR test results."""
-        self.test_results.append({
+    def add_otdr_test(self, results: dict, section: str = None):
+        """
+        Add OTDR test results.
+        
+        Args:
+            results: ``otdr_parser.analyze_file`` output
+            section: Report section (e.g. cable or building) to file it under
+        """
+        self._add({
             'type': 'otdr',
+            'section': section,
             'data': results
         })
     
-    def generate_pdf(self, output_file: str):
-        """Generate PDF report (requires reportlab)."""
-        # Placeholder - full implementation requires reportlab
-        print(f"PDF report would be generated: {output_file}")
-        print(f"Project: {self.project_name}")
-        print(f"Date: {self.test_date}")
-        print(f"Technician: {self.technician}")
-        print(f"Tests: {len(self.test_results)}")
+    def open(self, output_file: str) -> 'FiberTestReport':
+        """
+        Start streaming the report to ``output_file``.
+        
+        Until ``close()``, each ``add_*`` call renders its result straight
+        onto the current page; only the rendered pages are kept until the
+        PDF is saved (see ``report_pdf``). A persistent store such as
+        ``SQLiteResultStore`` also records the result, so ``resume()`` and
+        later renders see it; the default in-memory store does not.
+        Results already in the store are rendered first, one section at a
+        time.
+        
+        Returns:
+            The report, for use as a context manager
+        """
+        from .report_pdf import ReportWriter
+        
+        self._writer = ReportWriter(output_file, self.project_name,
+                                    self.test_date, self.technician)
+        self._section = None
+        for section in self.store.sections():
+            for item in self.store.iter(section=section):
+                self._render(item)
+        return self
+    
+    @profiling.timed('report.write')
+    def close(self) -> Dict:
+        """
+        Finish and write the streamed PDF, if one is open, and close the
+        store, committing any results it has not written yet.
+        
+        A SQLite store reopens on next use, so the report stays usable.
+        
+        Returns:
+            Dictionary with page count and per-type and per-status totals
+            (empty if no PDF was open)
+        """
+        summary = {}
+        if self._writer is not None:
+            summary = self._writer.close()
+            self._writer = None
+            profiling.count('report.pages', summary.get('pages', 0))
+        self.store.close()
+        return summary
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+    
+    def generate_pdf(self, output_file: str, results: Iterable[Dict] = None,
+                     workers: int = 1) -> Dict:
+        """
+        Generate the PDF report.
+        
+        Args:
+            output_file: PDF file to write
+            results: Optional stream of ``{'type': 'link_budget' | 'otdr',
+                'data': {...}}`` items (e.g. a generator), rendered after
+                any results already added and consumed one at a time
+            workers: With more than one (0 = one per CPU), sections are
+                rendered in parallel; see ``generate_sections``
+        
+        Returns:
+            Dictionary with page count and per-type and per-status totals
+        """
+        if workers != 1:
+            return self.generate_sections(output_file, results, workers)
+        
+        self.open(output_file)
+        try:
+            for item in results or ():
+                self._render(item)
+        finally:
+            summary = self.close()
+        return summary
+
+
+    def generate_sections(self, output_file: str, results: Iterable[Dict] = None,
+                          workers: int = 1) -> Dict:
+        """
+        Generate the PDF with each section rendered as a separate fragment.
+        
+        ``results`` are first added to the store. Stored results are then
+        grouped by their ``section`` (in order of first appearance; results
+        without one go under ``DEFAULT_SECTION``), rendered across
+        ``workers`` processes, and merged in order behind a contents page.
+        With a SQLite store each worker reads its own section from the
+        file. The output does not depend on the worker count. Needs pypdf
+        (``pip install fiber-optics-toolkit[merge]``).
+        
+        Returns:
+            Dictionary with page count, section count and totals
+        """
+        from .report_pdf import render_sections
+        
+        for item in results or ():
+            self.store.append(item)
+        sections = [(section or DEFAULT_SECTION, self.store.select(section=section))
+                    for section in self.store.sections()]
+        header = (self.project_name, self.test_date, self.technician)
+        profiling.count('report.sections', len(sections))
+        with profiling.stage('report.sections'):
+            return render_sections(output_file, header, sections, workers)
+
+
+def link_budget_items(input_path: str, chunk_size: int = LINK_CHUNK_SIZE,
+                      section_column: str = None) -> Iterator[Dict]:
+    """
+    Stream link budget report items from a links file (.csv or .parquet).
+    
+    Links are evaluated a chunk at a time with ``LinkBudget.calculate_batch``;
+    a ``link_id`` or ``name`` column, if present, labels each row.
+    
+    Args:
+        input_path: Links file
+        chunk_size: Rows evaluated at a time
+        section_column: Column whose value files each link under a report
+            section (e.g. ``building`` or ``cable``)
+    """
+    from .link_budget import LinkBudget
+    
+    for chunk in iter_chunks(input_path, chunk_size):
+        results = LinkBudget.calculate_batch(chunk)
+        for label in ('link_id', 'name'):
+            if label in chunk.columns:
+                results['link_id'] = chunk[label].astype(str)
+                break
+        for column in ('fiber_length', 'length'):
+            if column in chunk.columns:
+                results['fiber_length'] = chunk[column]
+                break
+        sections = (chunk[section_column].astype(str).tolist() if section_column
+                    else [None] * len(chunk))
+        for section, record in zip(sections, results.to_dict('records')):
+            yield {'type': 'link_budget', 'section': section, 'data': record}
+
+
+def otdr_items(directory: str, workers: int = 1, by_cable: bool = False) -> Iterator[Dict]:
+    """
+    Stream OTDR report items for every trace below ``directory``.
+    
+    Args:
+        directory: Trace directory (searched recursively)
+        workers: Worker processes for parsing (0 = one per CPU)
+        by_cable: File each trace under a section named for its cable ID
+    """
+    from .otdr_parser import analyze_directory
+    
+    for result in analyze_directory(directory, workers):
+        section = None
+        if by_cable:
+            section = f"Cable {result.get('general', {}).get('cable_id') or 'unknown'}"
+        yield {'type': 'otdr', 'section': section, 'data': result}
+
 
 @click.command()
-@click.option('--project', required=True, help='Project name')
+@click.option('--project', help='Project name (optional when resuming a --store session)')
 @click.option('--date', help='Test date (YYYY-MM-DD)')
 @click.option('--tech', help='Technician name')
-@click.option('--output', required=True, help='Output PDF file')
-def main(project, date, tech, output):
+@click.option('--output', help='Output PDF file (omit with --store to only collect results)')
+@click.option('--links', 'links_path', type=click.Path(exists=True, dir_okay=False),
+              help='Links file (.csv or .parquet) to evaluate and tabulate')
+@click.option('--otdr-dir', type=click.Path(exists=True, file_okay=False),
+              help='Directory of .sor traces to include (recursive)')
+@click.option('--section-by', help='Links column to section the report by (e.g. building); '
+              'OTDR traces are then sectioned by cable ID')
+@click.option('--workers', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Worker processes for --otdr-dir parsing and, with --section-by, '
+                   'for rendering sections (0 = one per CPU)')
+@click.option('--store', 'store_path', type=click.Path(dir_okay=False),
+              help='Append results to this SQLite result store and report from it')
+@click.option('--session', default='default', show_default=True,
+              help='Result store session (resumed if it exists)')
+@profiling.profile_option
+def main(project, date, tech, output, links_path, otdr_dir, section_by, workers,
+         store_path, session):
     """Generate professional fiber test report."""
+    from rich.console import Console
     console = Console()
     
-    report = FiberTestReport(project, date, tech)
-    report.generate_pdf(output)
+    items = []
+    if links_path:
+        items.append(link_budget_items(links_path, section_column=section_by))
+    if otdr_dir:
+        items.append(otdr_items(otdr_dir, workers, by_cable=bool(section_by)))
+    results = chain.from_iterable(items)
+    
+    store = None
+    if store_path:
+        from .result_store import SQLiteResultStore
+        store = SQLiteResultStore(store_path, session)
+    elif not output:
+        raise click.UsageError("--output is required without --store")
+    
+    if project:
+        report = FiberTestReport(project, date, tech, store=store)
+    elif store is not None and store.metadata:
+        report = FiberTestReport.resume(store)
+    else:
+        raise click.UsageError("--project is required for a new report")
+    
+    if store is not None:
+        for item in results:
+            store.append(item)
+        results = None
+        if not output:
+            console.print(f"\n[green]Stored results: {len(store)} in session "
+                          f"'{session}' of {store_path}[/green]")
+            store.close()
+            return
+    
+    if section_by or (store is not None and workers != 1):
+        summary = report.generate_sections(output, results, workers)
+    else:
+        summary = report.generate_pdf(output, results)
+    if store is not None:
+        store.close()
     
-    console.print(f"\n[green]Report generated: {output}[/green]")
+    console.print(f"\n[green]Report generated: {output}[/green] "
+                  f"({summary['pages']} pages, {summary['link_budget']} links, "
+                  f"{summary['otdr']} traces)")
 
 if __name__ == '__main__':
     main()
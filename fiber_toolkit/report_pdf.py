@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Report PDF
+Streaming reportlab renderer for fiber test reports.
+
+Results are drawn onto the current page as they arrive and never kept.
+Anything that repeats (the page frame, the link table header, each trace
+figure) is drawn once as a PDF form XObject and referenced wherever it
+is needed.
+
+reportlab builds the whole document in memory until ``save()``, so
+memory still grows with the report, just far slower than with the
+results held: about 20 KB per finished table page and 25-30 KB per
+distinct trace figure (a 20k-link report holds about 10 MB). Sectioned
+reports (``render_sections``) bound each worker by its largest section.
+
+Author: David Osisek (CFOt)
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen.canvas import Canvas
+
+from . import profiling
+from .parallel import imap_ordered
+
+PAGE_SIZE = letter
+MARGIN = 0.6 * inch
+HEADER_HEIGHT = 54
+FOOTER_HEIGHT = 24
+ROW_HEIGHT = 13
+FONT = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+
+# Trace figures: size on the page, raster resolution, and the number of
+# min/max envelope points a trace is reduced to before plotting
+FIGURE_SIZE = (7.3, 2.1)  # inches
+FIGURE_DPI = 110
+PLOT_BINS = 800
+OTDR_EVENT_ROWS = 8
+
+STATUS_COLORS = {
+    'PASS': colors.HexColor('#1b7f3b'),
+    'MARGINAL': colors.HexColor('#b7791f'),
+    'FAIL': colors.HexColor('#c53030'),
+}
+
+# Link budget table: (title, right edge from the left margin in pt, result key, format)
+LINK_COLUMNS = (
+    ('#', 28, None, None),
+    ('Link', 170, 'link_id', '{}'),
+    ('Length (km)', 240, 'fiber_length', '{:.2f}'),
+    ('Budget (dB)', 305, 'power_budget', '{:.2f}'),
+    ('Loss (dB)', 365, 'total_loss', '{:.2f}'),
+    ('Margin (dB)', 430, 'safety_margin', '{:.2f}'),
+    ('SOM (dB)', 485, 'som', '{:.2f}'),
+    ('Status', 540, 'status', '{}'),
+)
+
+EVENT_COLUMNS = (
+    ('#', 28, 'number', '{}'),
+    ('Type', 110, 'type', '{}'),
+    ('Distance (km)', 200, 'distance', '{:.3f}'),
+    ('Loss (dB)', 270, 'loss', '{:.2f}'),
+    ('Reflectance (dB)', 370, 'reflectance', '{:.1f}'),
+)
+
+
+def _cell(value, fmt: str) -> str:
+    if value is None or value != value:  # None or NaN
+        return ''
+    try:
+        return fmt.format(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def trace_envelope(trace: np.ndarray, spacing_km: float,
+                   bins: int = PLOT_BINS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a trace to a min/max envelope of ``2 * bins`` points.
+
+    Keeps every reflective spike visible at plot resolution while making
+    figure rendering cost independent of the trace length.
+    """
+    trace = np.asarray(trace, dtype=np.float32)
+    per_bin = max(1, len(trace) // bins)
+    usable = len(trace) // per_bin * per_bin
+    if per_bin == 1:
+        return np.arange(len(trace)) * spacing_km, trace
+    blocks = trace[:usable].reshape(-1, per_bin)
+    x = np.repeat(np.arange(len(blocks)) * per_bin * spacing_km, 2)
+    y = np.empty(2 * len(blocks), dtype=np.float32)
+    y[0::2] = blocks.max(axis=1)
+    y[1::2] = blocks.min(axis=1)
+    return x, y
+
+
+def _trace_data(data: Dict) -> Tuple[Optional[np.ndarray], float]:
+    """Trace samples and spacing for an OTDR result, read from its file if needed."""
+    spacing = data.get('sample_spacing_km') or \
+        data.get('fixed', {}).get('sample_spacing_km', 0.0)
+    if data.get('trace') is not None:
+        return np.asarray(data['trace']), spacing
+    filename = data.get('filename')
+    if not filename or not os.path.exists(filename):
+        return None, spacing
+    from .otdr_parser import OTDRParser
+    with OTDRParser(filename) as parser:
+        if 'error' in parser.parse():
+            return None, spacing
+        trace = parser.trace
+        spacing = parser.data['fixed'].get('sample_spacing_km', spacing)
+        return (None if trace is None else np.array(trace)), spacing
+
+
+class TraceFigure:
+    """One reusable Agg figure for OTDR trace plots (no pyplot state)."""
+
+    def __init__(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=FIGURE_SIZE, dpi=FIGURE_DPI)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_axes((0.07, 0.2, 0.91, 0.75))
+        self.axes.set_xlabel('Distance (km)', fontsize=8)
+        self.axes.set_ylabel('dB', fontsize=8)
+        self.axes.tick_params(labelsize=7)
+        self.axes.grid(True, linewidth=0.3)
+        (self.line,) = self.axes.plot([], [], linewidth=0.6, color='#1f4e79')
+        self.markers = None
+
+    def render(self, x: np.ndarray, y: np.ndarray, event_distances) -> ImageReader:
+        """Plot one trace with event markers and return it as an image."""
+        from PIL import Image
+
+        self.line.set_data(x, y)
+        if self.markers is not None:
+            self.markers.remove()
+        low, high = (float(y.min()), float(y.max())) if len(y) else (0.0, 1.0)
+        self.markers = self.axes.vlines(event_distances, low, high, colors='#c53030',
+                                        linewidth=0.5, linestyles='dashed')
+        right = max([float(x[-1]) if len(x) else 0.0] + list(event_distances))
+        self.axes.set_xlim(0, right if right > 0 else 1)
+        self.axes.set_ylim(low - 1, high + 1)
+        self.canvas.draw()
+        rgba = np.asarray(self.canvas.buffer_rgba())
+        return ImageReader(Image.fromarray(rgba[..., :3]))
+
+
+class ReportWriter:
+    """Render test results page by page into one PDF."""
+
+    def __init__(self, output_file: str, project_name: str, test_date: str,
+                 technician: str, page_label: str = 'Page', invariant: bool = False):
+        """
+        Args:
+            output_file: PDF path (or writable binary file object)
+            project_name: Shown in the page header
+            test_date: Shown in the page header
+            technician: Shown in the page header
+            page_label: Footer text before each page number
+            invariant: Fixed timestamps and document ID, so equal input
+                gives byte-identical output
+        """
+        self.project_name = project_name
+        self.test_date = test_date
+        self.technician = technician
+        self.page_label = page_label
+        self.width, self.height = PAGE_SIZE
+        self.canvas = Canvas(output_file, pagesize=PAGE_SIZE, pageCompression=1,
+                             invariant=1 if invariant else None)
+        self.canvas.setTitle(f"Fiber Test Report - {project_name}")
+        self.canvas.setAuthor(technician)
+        self.page = 0
+        self.pages = 0
+        self.counts = {'link_budget': 0, 'otdr': 0}
+        self.status_counts = {status: 0 for status in STATUS_COLORS}
+        self._section = None
+        self._figure = None
+        self._define_forms()
+        self._new_page()
+
+    # -- shared forms ------------------------------------------------------
+
+    def _define_forms(self):
+        c = self.canvas
+        top = self.height - MARGIN
+
+        c.beginForm('page_frame')
+        c.setFont(FONT_BOLD, 14)
+        c.drawString(MARGIN, top - 14, "Fiber Test Report")
+        c.setFont(FONT, 9)
+        c.drawString(MARGIN, top - 30, f"Project: {self.project_name}")
+        c.drawString(MARGIN + 260, top - 30, f"Date: {self.test_date}")
+        c.drawString(MARGIN + 380, top - 30, f"Technician: {self.technician}")
+        c.setLineWidth(0.8)
+        c.line(MARGIN, top - 38, self.width - MARGIN, top - 38)
+        c.setLineWidth(0.4)
+        c.line(MARGIN, MARGIN + 12, self.width - MARGIN, MARGIN + 12)
+        c.setFont(FONT, 7)
+        c.drawString(MARGIN, MARGIN, "FOA-compliant test report - Fiber Optics Toolkit")
+        c.endForm()
+
+        # Column titles drawn with their baseline at the form origin
+        for name, columns in (('link_header', LINK_COLUMNS), ('event_header', EVENT_COLUMNS)):
+            c.beginForm(name, 0, -6, self.width, 12)
+            c.setFont(FONT_BOLD, 8)
+            for title, right, _, _ in columns:
+                c.drawRightString(MARGIN + right, 0, title)
+            c.setLineWidth(0.4)
+            c.line(MARGIN, -3, MARGIN + columns[-1][1], -3)
+            c.endForm()
+
+    def _draw_form(self, name: str, y: float):
+        self.canvas.saveState()
+        self.canvas.translate(0, y)
+        self.canvas.doForm(name)
+        self.canvas.restoreState()
+
+    # -- page flow ---------------------------------------------------------
+
+    def _finish_page(self):
+        self.canvas.showPage()
+
+    def _new_page(self):
+        if self.pages:
+            self._finish_page()
+        self.page += 1
+        self.pages += 1
+        self.canvas.doForm('page_frame')
+        self.canvas.setFont(FONT, 7)
+        self.canvas.drawRightString(self.width - MARGIN, MARGIN,
+                                    f"{self.page_label} {self.page}")
+        self.y = self.height - MARGIN - HEADER_HEIGHT
+        self._section = None
+
+    def _reserve(self, height: float):
+        """Start a new page unless ``height`` points fit above the footer."""
+        if self.y - height < MARGIN + FOOTER_HEIGHT:
+            self._new_page()
+
+    def section_title(self, title: str):
+        """Start a titled section (e.g. one cable or building)."""
+        self._reserve(3 * ROW_HEIGHT)
+        self.canvas.setFont(FONT_BOLD, 11)
+        self.canvas.drawString(MARGIN, self.y - 11, title)
+        self.y -= 22
+        self._section = None
+
+    def contents_entry(self, title: str, page: int):
+        """One table-of-contents line: title and its first page number."""
+        self._reserve(ROW_HEIGHT)
+        self.canvas.setFont(FONT, 9)
+        self.canvas.drawString(MARGIN + 12, self.y - 9, title)
+        self.canvas.drawRightString(self.width - MARGIN, self.y - 9, str(page))
+        self.y -= ROW_HEIGHT
+
+    def add(self, item: Dict):
+        """Render one ``{'type': ..., 'data': ...}`` test result."""
+        kind = item['type']
+        render = getattr(self, f'_add_{kind}', None)
+        if render is None:
+            raise ValueError(f"Unknown test type: {kind}")
+        render(item['data'])
+        self.counts[kind] += 1
+
+    # -- link budgets ------------------------------------------------------
+
+    def _add_link_budget(self, data: Dict):
+        if self._section != 'link_budget':
+            self._reserve(3 * ROW_HEIGHT)
+            self._draw_form('link_header', self.y - 10)
+            self.y -= 16
+            self._section = 'link_budget'
+        elif self.y - ROW_HEIGHT < MARGIN + FOOTER_HEIGHT:
+            self._new_page()
+            self._draw_form('link_header', self.y - 10)
+            self.y -= 16
+            self._section = 'link_budget'
+
+        c = self.canvas
+        baseline = self.y - 9
+        number = self.counts['link_budget'] + 1
+        c.setFont(FONT, 8)
+        c.drawRightString(MARGIN + LINK_COLUMNS[0][1], baseline, str(number))
+        row = dict(data, link_id=data.get('link_id', data.get('name')))
+        for _, right, key, fmt in LINK_COLUMNS[1:-1]:
+            c.drawRightString(MARGIN + right, baseline, _cell(row.get(key), fmt))
+
+        status = str(data.get('status', ''))
+        if status in self.status_counts:
+            self.status_counts[status] += 1
+        c.setFillColor(STATUS_COLORS.get(status, colors.black))
+        c.drawRightString(MARGIN + LINK_COLUMNS[-1][1], baseline, status)
+        c.setFillColor(colors.black)
+        self.y -= ROW_HEIGHT
+
+    # -- OTDR traces -------------------------------------------------------
+
+    def _trace_form(self, data: Dict) -> Optional[str]:
+        """Name of the form holding this result's trace figure, drawing it once."""
+        trace, spacing = _trace_data(data)
+        if trace is None or not len(trace):
+            return None
+        x, y = trace_envelope(trace, spacing or 1.0)
+        distances = [event['distance'] for event in data.get('events', ())]
+        digest = hashlib.blake2b(y.tobytes(), digest_size=10)
+        digest.update(np.asarray(distances, dtype=float).tobytes())
+        name = f"trace_{digest.hexdigest()}"
+        if not self.canvas.hasForm(name):
+            if self._figure is None:
+                self._figure = TraceFigure()
+            image = self._figure.render(x, y, distances)
+            width, height = FIGURE_SIZE[0] * inch, FIGURE_SIZE[1] * inch
+            self.canvas.beginForm(name, 0, 0, width, height)
+            self.canvas.drawImage(image, 0, 0, width, height)
+            self.canvas.endForm()
+        return name
+
+    def _add_otdr(self, data: Dict):
+        events = data.get('events') or []
+        shown = events[:OTDR_EVENT_ROWS]
+        figure_height = FIGURE_SIZE[1] * inch
+        self._reserve(44 + figure_height + 18 + ROW_HEIGHT * (len(shown) + 1))
+        self._section = 'otdr'
+        c = self.canvas
+
+        general = data.get('general', {})
+        analysis = data.get('analysis', {})
+        c.setFont(FONT_BOLD, 10)
+        c.drawString(MARGIN, self.y - 10, os.path.basename(str(data.get('filename', 'OTDR trace'))))
+        c.setFont(FONT, 8)
+        header = (f"Cable {general.get('cable_id', '')}   Fiber {general.get('fiber_id', '')}   "
+                  f"{general.get('wavelength', '')} nm")
+        c.drawString(MARGIN, self.y - 22, header)
+        if 'error' in data or 'error' in analysis:
+            c.setFillColor(STATUS_COLORS['FAIL'])
+            c.drawString(MARGIN, self.y - 34, f"Error: {data.get('error') or analysis['error']}")
+            c.setFillColor(colors.black)
+            self.y -= 44
+            return
+        c.drawString(MARGIN, self.y - 34,
+                     f"Length {analysis.get('fiber_length', 0):.3f} km   "
+                     f"Total loss {analysis.get('total_loss', 0):.2f} dB   "
+                     f"{analysis.get('loss_per_km', 0):.3f} dB/km   "
+                     f"{len(events)} events")
+        self.y -= 44
+
+        name = self._trace_form(data)
+        if name is not None:
+            self._draw_form(name, self.y - figure_height)
+            self.y -= figure_height + 6
+
+        if shown:
+            self._draw_form('event_header', self.y - 10)
+            self.y -= 16
+            c.setFont(FONT, 8)
+            for event in shown:
+                for _, right, key, fmt in EVENT_COLUMNS:
+                    c.drawRightString(MARGIN + right, self.y - 9, _cell(event.get(key), fmt))
+                self.y -= ROW_HEIGHT
+            if len(events) > len(shown):
+                c.drawString(MARGIN, self.y - 9, f"... {len(events) - len(shown)} more events")
+                self.y -= ROW_HEIGHT
+        self.y -= 12
+
+    # -- finish ------------------------------------------------------------
+
+    def summary(self) -> Dict:
+        """Counts rendered so far."""
+        return dict(self.counts, pages=self.pages, **self.status_counts)
+
+    def close(self, draw_summary: bool = True) -> Dict:
+        """
+        Finish the document and write it out.
+
+        Args:
+            draw_summary: End with a totals block
+        """
+        if draw_summary:
+            self.section_title("Summary")
+            lines = [f"Link budgets: {self.counts['link_budget']}"]
+            lines += [f"    {status}: {count}" for status, count in self.status_counts.items()]
+            lines.append(f"OTDR traces: {self.counts['otdr']}")
+            for line in lines:
+                self._reserve(ROW_HEIGHT)
+                self.canvas.setFont(FONT, 9)
+                self.canvas.drawString(MARGIN, self.y - 9, line)
+                self.y -= ROW_HEIGHT
+        self._finish_page()
+        self.canvas.save()
+        return self.summary()
+
+
+def _require_pypdf():
+    """Import pypdf, explaining how to get it if missing."""
+    try:
+        import pypdf
+    except ImportError:
+        raise ImportError(
+            "Sectioned reports require pypdf: pip install pypdf"
+        ) from None
+    return pypdf
+
+
+def render_fragment(task: Tuple) -> Dict:
+    """
+    Render one report section to its own PDF file (the per-worker task).
+
+    Args:
+        task: (fragment path, (project, date, technician), section title,
+            result items)
+
+    Returns:
+        The fragment's ``ReportWriter.summary()``
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # workers never have a display
+
+    path, header, title, items = task
+    with profiling.stage('report.render_section'):
+        writer = ReportWriter(path, *header, page_label=f"{title} - page", invariant=True)
+        writer.section_title(title)
+        for item in items:
+            writer.add(item)
+        return writer.close(draw_summary=False)
+
+
+def _render_contents(path: str, header: Tuple, titles: List[str],
+                     starts: List[int]) -> int:
+    """Render the contents fragment; returns its page count."""
+    writer = ReportWriter(path, *header, page_label='Contents', invariant=True)
+    writer.section_title("Contents")
+    for title, start in zip(titles, starts):
+        writer.contents_entry(title, start)
+    return writer.close(draw_summary=False)['pages']
+
+
+def render_sections(output_file: str, header: Tuple,
+                    sections: Iterable[Tuple[str, List[Dict]]],
+                    workers: int = 1) -> Dict:
+    """
+    Render sections to PDF fragments in parallel and merge them in order.
+
+    Every section becomes its own fragment, rendered by
+    ``render_fragment`` across ``workers`` processes; fragments are then
+    concatenated behind a contents page, with a bookmark per section and a
+    closing summary. ``workers=1`` runs the same pipeline inline, and all
+    fragments are rendered with fixed metadata, so the output is the same
+    byte for byte whatever the worker count.
+
+    Args:
+        output_file: Final PDF path
+        header: (project name, test date, technician)
+        sections: (title, result items) in report order; items may be a
+            list or a ``result_store.StoreQuery``
+        workers: Worker processes (0 = one per CPU)
+
+    Returns:
+        Totals over all sections, with the final page count
+    """
+    pypdf = _require_pypdf()
+    sections = list(sections)
+    titles = [title for title, _ in sections]
+
+    with tempfile.TemporaryDirectory(prefix='fiber-report-') as tmp:
+        # Lists and store queries go to the workers as they are; one-shot
+        # iterators are materialized so they can be pickled
+        tasks = [(os.path.join(tmp, f'section_{index:05d}.pdf'), header, title,
+                  list(items) if isinstance(items, Iterator) else items)
+                 for index, (title, items) in enumerate(sections)]
+        summaries = list(imap_ordered(render_fragment, tasks, workers))
+
+        # Contents page numbers depend on the contents' own length
+        contents = os.path.join(tmp, 'contents.pdf')
+        contents_pages = 1
+        while True:
+            starts, page = [], contents_pages + 1
+            for summary in summaries:
+                starts.append(page)
+                page += summary['pages']
+            rendered = _render_contents(contents, header, titles, starts)
+            if rendered == contents_pages:
+                break
+            contents_pages = rendered
+
+        closing_path = os.path.join(tmp, 'summary.pdf')
+        closing = ReportWriter(closing_path, *header, page_label='Summary', invariant=True)
+        for summary in summaries:
+            for key in closing.counts:
+                closing.counts[key] += summary[key]
+            for key in closing.status_counts:
+                closing.status_counts[key] += summary[key]
+        totals = closing.close()
+
+        with profiling.stage('report.merge'):
+            merged = pypdf.PdfWriter()
+            merged.append(contents)
+            for (path, _, title, _), start in zip(tasks, starts):
+                merged.append(path)
+                merged.add_outline_item(title, start - 1)
+            summary_page = len(merged.pages)
+            merged.append(closing_path)
+            merged.add_outline_item("Summary", summary_page)
+            merged.write(output_file)
+        totals['pages'] = len(merged.pages)
+        totals['sections'] = len(sections)
+    return totals
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Result Cache
+Persistent, content-addressed cache for OTDR parse and analysis results.
+
+Entries live in a local SQLite file, keyed by the BLAKE2 hash of the trace
+file's content plus the parser version and analysis mode, so renamed or
+copied files still hit and a parser upgrade never serves stale results.
+The store is size-bounded with least-recently-used eviction.
+
+Author: David Osisek (CFOt)
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import profiling
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE = 'otdr_cache.sqlite'
+
+# Eviction scans the table, so it runs once per this many stores
+EVICT_INTERVAL = 64
+
+# A hit only rewrites its access time once it is this stale, so parallel
+# readers of a warm cache don't queue behind the write lock on every hit
+TOUCH_SECONDS = 300.0
+
+
+def default_cache_dir() -> str:
+    """Cache directory: $FIBER_TOOLKIT_CACHE, else the XDG user cache."""
+    configured = os.environ.get('FIBER_TOOLKIT_CACHE')
+    if configured:
+        return configured
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(Path.home(), '.cache')
+    return os.path.join(base, 'fiber-toolkit')
+
+
+def content_hash(filename: str) -> str:
+    """BLAKE2b digest of a file's content, hashed from a memory map."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            digest.update(buffer)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of JSON results in SQLite."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Open (or create) a cache.
+
+        Args:
+            cache_dir: Directory holding the cache file (default:
+                ``default_cache_dir()``)
+            max_bytes: Size bound for stored results
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._stores = 0
+
+    def __getstate__(self):
+        # Connections don't cross process boundaries; workers reopen lazily
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.cache_dir, CACHE_FILE)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' key TEXT PRIMARY KEY,'
+                ' size INTEGER NOT NULL,'
+                ' accessed REAL NOT NULL,'
+                ' value TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(digest: str, version: str, mode: str) -> str:
+        """Cache key for a content digest, parser version and analysis mode."""
+        return f"{digest}:{version}:{mode}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return the cached result for ``key``, or None.
+
+        The entry's LRU age is refreshed only when it is older than
+        ``TOUCH_SECONDS``; eviction order is therefore approximate to
+        within that interval.
+        """
+        conn = self._connect()
+        row = conn.execute(
+            'SELECT value, accessed FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            profiling.count('result_cache.misses')
+            return None
+        now = time.time()
+        if now - row[1] >= TOUCH_SECONDS:
+            conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        profiling.count('result_cache.hits')
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict):
+        """Store a JSON-serializable result, evicting old entries if needed."""
+        payload = json.dumps(value)
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (key, size, accessed, value) VALUES (?, ?, ?, ?)',
+            (key, len(payload), time.time(), payload),
+        )
+        self._stores += 1
+        if self._stores % EVICT_INTERVAL == 1:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Drop least-recently-used entries until the cache fits ``max_bytes``.
+
+        Returns:
+            Number of entries removed
+        """
+        conn = self._connect()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        doomed = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM entries WHERE key = ?', doomed)
+        return len(doomed)
+
+    def clear(self):
+        """Remove every entry."""
+        self._connect().execute('DELETE FROM entries')
+
+    def stats(self) -> Dict:
+        """Entry count, stored bytes and this process's hit/miss counts."""
+        count, size = self._connect().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {
+            'entries': count,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Result Store
+Pluggable storage for test results collected into a FiberTestReport.
+
+``MemoryResultStore`` keeps results in a list (the default).
+``SQLiteResultStore`` appends them to an on-disk SQLite file instead, so
+projects can accumulate hundreds of thousands of results across many
+sessions and processes without holding them in RAM; results are read back
+by streaming cursor, optionally filtered by type or section.
+
+Author: David Osisek (CFOt)
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_SESSION = 'default'
+
+# Appends are committed in batches of this many rows, or once this many
+# seconds have passed since the last commit; reads and close() flush first
+COMMIT_INTERVAL = 1000
+COMMIT_SECONDS = 2.0
+
+_ANY = object()
+
+
+def _json_default(value):
+    # NumPy scalars from batch results
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class MemoryResultStore:
+    """Results held in a list, in the order they were added."""
+
+    def __init__(self):
+        self.items = []
+        self.metadata = {}
+
+    def set_metadata(self, metadata: Dict):
+        self.metadata = dict(metadata)
+
+    def append(self, item: Dict):
+        """Add one ``{'type', 'section', 'data'}`` result."""
+        self.items.append(item)
+
+    def iter(self, type: str = None, section=_ANY) -> Iterator[Dict]:
+        """
+        Iterate results in insertion order.
+
+        Args:
+            type: Only results of this type ('link_budget' or 'otdr')
+            section: Only results filed under this section (None selects
+                results without one)
+        """
+        for item in self.items:
+            if type is not None and item['type'] != type:
+                continue
+            if section is not _ANY and item.get('section') != section:
+                continue
+            yield item
+
+    def select(self, type: str = None, section=_ANY) -> List[Dict]:
+        """Results matching the filters, as a list."""
+        return list(self.iter(type, section))
+
+    def sections(self) -> List[Optional[str]]:
+        """Distinct sections in order of first appearance."""
+        return list(dict.fromkeys(item.get('section') for item in self.items))
+
+    def __iter__(self):
+        return self.iter()
+
+    def __len__(self):
+        return len(self.items)
+
+    def close(self):
+        pass
+
+
+class StoreQuery:
+    """Picklable, re-iterable query over a ``SQLiteResultStore``."""
+
+    def __init__(self, store: 'SQLiteResultStore', type: str = None, section=_ANY):
+        self.store = store
+        self.type = type
+        self.section = section
+
+    def __iter__(self):
+        return self.store.iter(self.type, self.section)
+
+
+class SQLiteResultStore:
+    """Append-only result store in a SQLite file, organised by session."""
+
+    def __init__(self, path: str, session: str = DEFAULT_SESSION):
+        """
+        Open (or create) a store; reopening a session resumes it.
+
+        Args:
+            path: SQLite file
+            session: Session name; results and report metadata are kept
+                per session
+        """
+        self.path = os.path.abspath(path)
+        self.session = session
+        self._conn = None
+        self._pending = 0
+        self._committed = time.monotonic()
+
+    def __getstate__(self):
+        # Connections don't cross process boundaries; workers reopen lazily
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_pending'] = 0
+        return state
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' id INTEGER PRIMARY KEY,'
+                ' session TEXT NOT NULL,'
+                ' type TEXT NOT NULL,'
+                ' section TEXT,'
+                ' added REAL NOT NULL,'
+                ' data TEXT NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS results_type ON results (session, type, id);'
+                'CREATE INDEX IF NOT EXISTS results_section ON results (session, section, id);'
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                ' name TEXT PRIMARY KEY,'
+                ' created REAL NOT NULL,'
+                ' metadata TEXT NOT NULL);'
+            )
+            self._conn = conn
+        return self._conn
+
+    @property
+    def metadata(self) -> Dict:
+        """Report metadata stored for this session (empty if none yet)."""
+        row = self._connect().execute(
+            'SELECT metadata FROM sessions WHERE name = ?', (self.session,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def set_metadata(self, metadata: Dict):
+        """Record report metadata (project, date, technician) for this session."""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'INSERT INTO sessions (name, created, metadata) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET metadata = excluded.metadata',
+                (self.session, time.time(), json.dumps(metadata)),
+            )
+
+    def append(self, item: Dict):
+        """Add one ``{'type', 'section', 'data'}`` result."""
+        self._connect().execute(
+            'INSERT INTO results (session, type, section, added, data) VALUES (?, ?, ?, ?, ?)',
+            (self.session, item['type'], item.get('section'), time.time(),
+             json.dumps(item['data'], default=_json_default)),
+        )
+        self._pending += 1
+        if (self._pending >= COMMIT_INTERVAL
+                or time.monotonic() - self._committed >= COMMIT_SECONDS):
+            self.flush()
+
+    def flush(self):
+        """Commit pending appends."""
+        if self._conn is not None and self._pending:
+            self._conn.commit()
+            self._pending = 0
+        self._committed = time.monotonic()
+
+    def _where(self, type: str, section) -> tuple:
+        clauses, params = ['session = ?'], [self.session]
+        if type is not None:
+            clauses.append('type = ?')
+            params.append(type)
+        if section is not _ANY:
+            if section is None:
+                clauses.append('section IS NULL')
+            else:
+                clauses.append('section = ?')
+                params.append(section)
+        return ' AND '.join(clauses), params
+
+    def iter(self, type: str = None, section=_ANY) -> Iterator[Dict]:
+        """
+        Stream results in insertion order.
+
+        Args:
+            type: Only results of this type ('link_budget' or 'otdr')
+            section: Only results filed under this section (None selects
+                results without one)
+        """
+        self.flush()
+        where, params = self._where(type, section)
+        cursor = self._connect().execute(
+            f'SELECT type, section, data FROM results WHERE {where} ORDER BY id', params)
+        for kind, section_name, data in cursor:
+            yield {'type': kind, 'section': section_name, 'data': json.loads(data)}
+
+    def select(self, type: str = None, section=_ANY) -> StoreQuery:
+        """Lazy query for results matching the filters (safe to send to workers)."""
+        return StoreQuery(self, type, section)
+
+    def sections(self) -> List[Optional[str]]:
+        """Distinct sections in order of first appearance."""
+        self.flush()
+        rows = self._connect().execute(
+            'SELECT section FROM results WHERE session = ? '
+            'GROUP BY section ORDER BY MIN(id)', (self.session,))
+        return [section for (section,) in rows]
+
+    def sessions(self) -> Dict[str, int]:
+        """Result count of every session in the file."""
+        self.flush()
+        rows = self._connect().execute(
+            'SELECT session, COUNT(*) FROM results GROUP BY session ORDER BY MIN(id)')
+        return dict(rows)
+
+    def __iter__(self):
+        return self.iter()
+
+    def __len__(self):
+        self.flush()
+        where, params = self._where(None, _ANY)
+        return self._connect().execute(
+            f'SELECT COUNT(*) FROM results WHERE {where}', params).fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+
+def open_store(path: str = None, session: str = DEFAULT_SESSION):
+    """In-memory store when ``path`` is None, otherwise a SQLite store."""
+    if path is None:
+        return MemoryResultStore()
+    return SQLiteResultStore(path, session)
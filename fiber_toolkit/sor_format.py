@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+SOR Format
+Block-level decoding of Bellcore/Telcordia SR-4731 OTDR files (.sor).
+
+Decoders work directly on a read-only buffer (an ``mmap`` or ``memoryview``)
+with ``struct.unpack_from`` and ``np.frombuffer``, so nothing is copied
+except the short header strings.
+
+Author: David Osisek (CFOt)
+Standards: Bellcore/Telcordia SR-4731 issue 1 and 2
+"""
+
+import struct
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from .otdr_events import EventType, empty_events
+
+SPEED_OF_LIGHT = 299792.458  # km/s in vacuum
+
+_U16 = struct.Struct('<H')
+_I16 = struct.Struct('<h')
+_U32 = struct.Struct('<I')
+_I32 = struct.Struct('<i')
+
+# Event code, first character: reflectance class
+EVENT_NON_REFLECTIVE = '0'
+EVENT_REFLECTIVE = '1'
+EVENT_SATURATED = '2'
+# Event code, second character: how the event was placed
+EVENT_END_OF_FIBER = 'E'
+
+
+class SORFormatError(ValueError):
+    """Raised when a file is not a readable SR-4731 .sor file."""
+
+
+class Block(NamedTuple):
+    """One entry of the .sor block map."""
+    name: str
+    version: int
+    size: int
+    offset: int
+
+
+class FieldReader:
+    """Sequential little-endian field reader over a buffer region."""
+
+    __slots__ = ('buffer', 'pos', 'end')
+
+    def __init__(self, buffer, start: int = 0, end: int = None):
+        self.buffer = buffer
+        self.pos = start
+        self.end = len(buffer) if end is None else end
+
+    def _unpack(self, fmt: struct.Struct):
+        if self.pos + fmt.size > self.end:
+            raise SORFormatError(f"Block truncated at byte {self.pos}")
+        value = fmt.unpack_from(self.buffer, self.pos)[0]
+        self.pos += fmt.size
+        return value
+
+    def u16(self) -> int:
+        return self._unpack(_U16)
+
+    def i16(self) -> int:
+        return self._unpack(_I16)
+
+    def u32(self) -> int:
+        return self._unpack(_U32)
+
+    def i32(self) -> int:
+        return self._unpack(_I32)
+
+    def chars(self, count: int) -> str:
+        """Fixed-width ASCII field."""
+        if self.pos + count > self.end:
+            raise SORFormatError(f"Block truncated at byte {self.pos}")
+        value = bytes(self.buffer[self.pos:self.pos + count])
+        self.pos += count
+        return value.decode('ascii', errors='replace')
+
+    def string(self) -> str:
+        """Null-terminated string."""
+        if hasattr(self.buffer, 'find'):  # mmap, bytes
+            stop = self.buffer.find(b'\0', self.pos, self.end)
+        else:  # memoryview has no find
+            stop = bytes(self.buffer[self.pos:self.end]).find(b'\0')
+            stop = stop if stop < 0 else self.pos + stop
+        if stop < 0:
+            stop = self.end
+        value = bytes(self.buffer[self.pos:stop])
+        self.pos = stop + 1
+        return value.decode('latin-1').strip()
+
+    def array(self, dtype: str, count: int) -> np.ndarray:
+        """View ``count`` values in place with ``np.frombuffer`` (no copy)."""
+        nbytes = np.dtype(dtype).itemsize * count
+        if self.pos + nbytes > self.end:
+            raise SORFormatError(f"Block truncated at byte {self.pos}")
+        values = np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.pos)
+        self.pos += nbytes
+        return values
+
+
+def read_block_map(buffer) -> Tuple[int, List[Block]]:
+    """
+    Decode the Map block at the start of a .sor file.
+
+    Args:
+        buffer: Whole-file buffer
+
+    Returns:
+        (format revision, blocks in file order); revision is 1 or 2
+    """
+    if len(buffer) < 8:
+        raise SORFormatError("File too small for a block map")
+
+    reader = FieldReader(buffer)
+    revision = 1
+    if bytes(buffer[:4]) == b'Map\x00':
+        revision = 2
+        reader.pos = 4
+
+    reader.u16()  # map version
+    map_size = reader.u32()
+    block_count = reader.u16()
+    if map_size > len(buffer) or block_count == 0:
+        raise SORFormatError("Not an SR-4731 file (bad block map)")
+
+    blocks = []
+    offset = map_size
+    for _ in range(block_count - 1):  # count includes the map itself
+        name = reader.string()
+        version = reader.u16()
+        size = reader.u32()
+        blocks.append(Block(name, version, size, offset))
+        offset += size
+    return revision, blocks
+
+
+def block_reader(buffer, block: Block, revision: int) -> FieldReader:
+    """Reader positioned at the first field of ``block``."""
+    end = min(block.offset + block.size, len(buffer))
+    start = block.offset
+    if revision == 2:
+        start += len(block.name) + 1  # issue 2 repeats the block name
+    return FieldReader(buffer, start, end)
+
+
+def decode_general(reader: FieldReader, revision: int) -> Dict:
+    """Decode the GenParams block."""
+    data = {
+        'language': reader.chars(2),
+        'cable_id': reader.string(),
+        'fiber_id': reader.string(),
+    }
+    if revision == 2:
+        data['fiber_type'] = f"G.{reader.u16()}"
+    data['wavelength'] = reader.u16()
+    data['location_a'] = reader.string()
+    data['location_b'] = reader.string()
+    data['cable_code'] = reader.string()
+    data['build_condition'] = reader.chars(2)
+    data['user_offset'] = reader.i32()
+    if revision == 2:
+        data['user_offset_distance'] = reader.i32()
+    data['operator'] = reader.string()
+    data['comments'] = reader.string()
+    return data
+
+
+def decode_supplier(reader: FieldReader, revision: int) -> Dict:
+    """Decode the SupParams block."""
+    fields = ('supplier', 'otdr', 'otdr_serial', 'module', 'module_serial',
+              'software', 'other')
+    return {name: reader.string() for name in fields}
+
+
+def decode_fixed(reader: FieldReader, revision: int) -> Dict:
+    """
+    Decode the FxdParams block.
+
+    Times are converted to one-way distances with the group index, giving
+    ``sample_spacing_km`` for the DataPts samples.
+    """
+    timestamp = reader.u32()
+    data = {
+        'date_time': datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+        'units': reader.chars(2),
+        'wavelength': reader.u16() / 10.0,
+        'acquisition_offset': reader.i32(),
+    }
+    if revision == 2:
+        data['acquisition_offset_distance'] = reader.i32()
+
+    pulse_count = reader.u16()
+    data['pulse_widths'] = [reader.u16() for _ in range(pulse_count)]
+    spacing = [reader.u32() for _ in range(pulse_count)]
+    data['points'] = [reader.u32() for _ in range(pulse_count)]
+    data['group_index'] = reader.u32() / 100000.0
+    data['backscatter'] = reader.u16() * -0.1
+    data['averages'] = reader.u32()
+    if revision == 2:
+        data['averaging_time'] = reader.u16() / 10.0
+    data['range'] = reader.u32()
+    if revision == 2:
+        data['range_distance'] = reader.i32()
+    data['front_panel_offset'] = reader.i32()
+    data['noise_floor'] = reader.u16() / 1000.0
+    data['noise_floor_scale'] = reader.i16()
+    data['power_offset'] = reader.u16()
+    data['loss_threshold'] = reader.u16() / 1000.0
+    data['reflectance_threshold'] = reader.u16() * -0.001
+    data['eof_threshold'] = reader.u16() / 1000.0
+    if revision == 2:
+        data['trace_type'] = reader.chars(2)
+
+    # Spacing is the time for 10,000 points in 100 ps units (one way)
+    km_per_time_unit = time_to_distance(data['group_index'])
+    data['sample_spacing_km'] = (spacing[0] / 10000.0 * km_per_time_unit
+                                 if spacing else 0.0)
+    return data
+
+
+def time_to_distance(group_index: float) -> float:
+    """Kilometres per 100 ps of one-way travel time at ``group_index``."""
+    if group_index <= 0:
+        return 0.0
+    return 1e-10 * SPEED_OF_LIGHT / group_index
+
+
+def decode_key_events(reader: FieldReader, revision: int,
+                      group_index: float) -> Tuple[np.ndarray, Dict, Dict[int, str]]:
+    """
+    Decode the KeyEvents block into a columnar event table.
+
+    Returns:
+        (events, summary, comments): the ``otdr_events.EVENT_DTYPE`` table,
+        end-to-end loss and ORL, and non-empty comments by event number
+    """
+    factor = time_to_distance(group_index)
+    count = reader.u16()
+    events = empty_events(count)
+    comments = {}
+    for row in range(count):
+        number = reader.u16()
+        distance = reader.u32() * factor
+        slope = reader.i16() * 0.001
+        loss = reader.i16() * 0.001
+        reflectance = reader.i32() * 0.001
+        code = reader.chars(6)
+        technique = reader.chars(2)
+        if revision == 2:
+            for _ in range(5):  # event marker locations
+                reader.u32()
+        comment = reader.string()
+
+        reflective = code[:1] in (EVENT_REFLECTIVE, EVENT_SATURATED)
+        if code[1:2] == EVENT_END_OF_FIBER:
+            kind = EventType.END
+        elif distance == 0 and row == 0:
+            kind = EventType.START
+        elif reflective:
+            kind = EventType.CONNECTOR
+        else:
+            kind = EventType.SPLICE
+
+        events[row] = (number, distance, kind, loss,
+                       reflectance if reflective else np.nan, slope,
+                       code.encode('ascii', errors='replace'),
+                       technique.encode('ascii', errors='replace'))
+        if comment:
+            comments[number] = comment
+
+    summary = {
+        'total_loss': reader.i32() * 0.001,
+        'loss_start': reader.i32() * factor,
+        'loss_end': reader.u32() * factor,
+        'orl': reader.u16() * 0.001,
+        'orl_start': reader.i32() * factor,
+        'orl_end': reader.u32() * factor,
+    }
+    return events, summary, comments
+
+
+def decode_data_points(reader: FieldReader, revision: int) -> np.ndarray:
+    """
+    Decode the DataPts block into a trace in dB.
+
+    Samples are read in place with ``np.frombuffer`` and scaled in one
+    vectorized step; only the first trace of a multi-trace block is used.
+    """
+    reader.u32()  # total data points
+    trace_count = reader.u16()
+    if trace_count == 0:
+        return np.empty(0, dtype=np.float32)
+    count = reader.u32()
+    scale = reader.u16() / 1000.0
+    raw = reader.array('<u2', count)
+    return raw * np.float32(-0.001 * scale)
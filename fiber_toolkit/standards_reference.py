@@ -7,8 +7,9 @@ Author: David Osisek (CFOt)
 """
 
 import click
-from rich.console import Console
-from rich.table import Table
+
+from . import profiling
+from .cli_output import emit, format_option
 
 class StandardsReference:
     """Quick reference for fiber optic standards."""
@@ -32,6 +33,7 @@ class StandardsReference:
     @classmethod
     def show_foa_standards(cls):
         """Display FOA standards."""
+        from rich.console import Console
         console = Console()
         console.print("\n[bold cyan]FOA Standard Loss Values[/bold cyan]")
         for component, values in cls.FOA_STANDARDS.items():
@@ -42,6 +44,7 @@ class StandardsReference:
     @classmethod
     def show_fiber_types(cls):
         """Display fiber types."""
+        from rich.console import Console
         console = Console()
         console.print("\n[bold cyan]Fiber Type Specifications[/bold cyan]")
         for fiber, specs in cls.FIBER_TYPES.items():
@@ -51,8 +54,19 @@ class StandardsReference:
 
 @click.command()
 @click.option('--show', type=click.Choice(['foa', 'fibers', 'all']), default='all')
-def main(show):
+@format_option
+@profiling.profile_option
+def main(show, format):
     """Fiber optics standards quick reference."""
+    if format != 'table':
+        result = {}
+        if show in ['foa', 'all']:
+            result['foa'] = StandardsReference.FOA_STANDARDS
+        if show in ['fibers', 'all']:
+            result['fibers'] = StandardsReference.FIBER_TYPES
+        emit(result, format)
+        return
+    
     if show in ['foa', 'all']:
         StandardsReference.show_foa_standards()
     if show in ['fibers', 'all']:
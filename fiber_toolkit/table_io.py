@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Table I/O
+Chunked CSV/Parquet reading and incremental writing for batch tools.
+
+Author: David Osisek (CFOt)
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterator
+
+from . import profiling
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def _require_pyarrow():
+    """Import pyarrow.parquet, explaining how to get it if missing."""
+    try:
+        import pyarrow
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Parquet support requires pyarrow: pip install pyarrow"
+        ) from None
+    return pyarrow, pq
+
+
+def table_format(path: str) -> str:
+    """Return 'parquet' or 'csv' based on the file extension."""
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.parquet', '.pq'):
+        return 'parquet'
+    return 'csv'
+
+
+def iter_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator:
+    """
+    Stream a CSV or Parquet file as pandas DataFrames.
+
+    Only one chunk is held in memory at a time, so memory use depends on
+    ``chunk_size`` rather than on the file size.
+
+    Args:
+        path: Input file (.csv or .parquet)
+        chunk_size: Rows per chunk
+
+    Yields:
+        DataFrames of at most ``chunk_size`` rows. A Parquet file with no
+        rows gives one empty chunk carrying its columns, as a header-only
+        CSV does; a 0-byte CSV gives nothing
+    """
+    profiling.count('table.bytes_read', os.path.getsize(path))
+    if table_format(path) == 'parquet':
+        _, pq = _require_pyarrow()
+        parquet_file = pq.ParquetFile(path)
+        if parquet_file.metadata.num_rows == 0:
+            yield parquet_file.schema_arrow.empty_table().to_pandas()
+            return
+        batches = parquet_file.iter_batches(batch_size=chunk_size)
+        yield from _timed_reads(batch.to_pandas() for batch in batches)
+    else:
+        import pandas as pd
+        try:
+            reader = pd.read_csv(path, chunksize=chunk_size)
+        except pd.errors.EmptyDataError:
+            # A 0-byte file has no header either: no chunks, like an empty Parquet file
+            return
+        with reader:
+            yield from _timed_reads(iter(reader))
+
+
+def read_table(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Read a whole CSV or Parquet file into one DataFrame.
+
+    For inputs that are used as a whole (trees, graphs, lookup tables);
+    row-wise batch tools should stream with ``iter_chunks`` instead.
+
+    Returns:
+        DataFrame, empty (no columns) for a file with no chunks
+    """
+    import pandas as pd
+
+    frames = list(iter_chunks(path, chunk_size))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def resolve_columns(frame, columns: Dict) -> Dict:
+    """
+    Map canonical names to the first matching column of ``frame``.
+
+    Args:
+        frame: DataFrame or mapping of columns
+        columns: {canonical name: (accepted aliases, in order of preference)}
+
+    Returns:
+        {canonical name: column} for the names found; missing ones are left out
+    """
+    found = {}
+    for name, aliases in columns.items():
+        for alias in aliases:
+            if alias in frame:
+                found[name] = frame[alias]
+                break
+    return found
+
+
+def _timed_reads(chunks: Iterator) -> Iterator:
+    """Pass chunks through, timing each read as the 'table.read' stage."""
+    while True:
+        with profiling.stage('table.read'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        profiling.count('table.rows_read', len(chunk))
+        yield chunk
+
+
+class ChunkWriter:
+    """Append DataFrame chunks to a CSV or Parquet file as they arrive."""
+
+    def __init__(self, path: str, append: bool = False):
+        """
+        Open a chunked writer.
+
+        Args:
+            path: Output file (.csv or .parquet)
+            append: Add to an existing CSV instead of replacing it
+        """
+        self.path = path
+        self.format = table_format(path)
+        self.rows_written = 0
+        self._writer = None
+        self._header = True
+
+        if self.format == 'parquet':
+            if append:
+                raise ValueError("Appending is only supported for CSV output")
+            self._pyarrow, self._pq = _require_pyarrow()
+        else:
+            exists = Path(path).exists() and Path(path).stat().st_size > 0
+            self._header = not (append and exists)
+            self._file = open(path, 'a' if append else 'w', newline='')
+
+    def write(self, frame):
+        """Write one DataFrame chunk."""
+        with profiling.stage('table.write'):
+            if self.format == 'parquet':
+                table = self._pyarrow.Table.from_pandas(frame, preserve_index=False)
+                if self._writer is None:
+                    self._schema = self._file_schema(table.schema)
+                    self._writer = self._pq.ParquetWriter(self.path, self._schema)
+                if not table.schema.equals(self._schema):
+                    table = self._conform(table)
+                self._writer.write_table(table)
+            else:
+                frame.to_csv(self._file, header=self._header, index=False)
+                self._file.flush()
+                self._header = False
+        self.rows_written += len(frame)
+        profiling.count('table.rows_written', len(frame))
+
+    def _file_schema(self, schema):
+        """
+        Schema the Parquet file is created with, from the first chunk.
+
+        Columns that are all blank in the first chunk infer as the null
+        type, which no later values fit; they are stored as strings.
+        """
+        pa = self._pyarrow
+        for i, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(pa.string()))
+        return schema
+
+    def _conform(self, table):
+        """
+        Cast a later chunk to the file's schema.
+
+        Chunks infer their own dtypes: one blank cell turns an integer
+        column into float64, an all-blank column into null. Such chunks
+        are cast back; values that do not fit (2.5 in an integer column)
+        raise ``ValueError`` naming the column.
+        """
+        pa = self._pyarrow
+        if table.schema.names != self._schema.names:
+            raise ValueError(f"Chunk columns {table.schema.names} do not match "
+                             f"{self._schema.names} in {self.path}")
+        columns = []
+        for column, field in zip(table.columns, self._schema):
+            try:
+                columns.append(column.cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as error:
+                raise ValueError(f"Column '{field.name}' no longer fits {field.type} "
+                                 f"in {self.path}: {error}") from error
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def close(self):
+        """
+        Finish the file.
+
+        A Parquet file that was never written to is still created, with
+        no columns, as an unwritten CSV is left empty.
+        """
+        if self.format == 'parquet':
+            if self._writer is None:
+                self._pq.write_table(self._pyarrow.table({}), self.path)
+            else:
+                self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
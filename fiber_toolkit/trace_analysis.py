@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Trace Analysis
+Vectorized event detection on raw OTDR backscatter traces.
+
+Every per-sample step is a NumPy array operation: least-squares line fits
+over sliding windows come from running sums, and events are found by
+thresholding the fitted step and peak profiles. Python only loops over the
+handful of detected events.
+
+Author: David Osisek (CFOt)
+Standards: IEC 61280-4-1, IEC 61746
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .otdr_events import from_records
+from .sor_format import SPEED_OF_LIGHT
+
+# Detection defaults (dB); OTDRParser overrides them from FxdParams
+LOSS_THRESHOLD = 0.05
+REFLECTANCE_THRESHOLD = -65.0
+EOF_THRESHOLD = 3.0
+BACKSCATTER_1NS = -79.0  # backscatter coefficient for a 1 ns pulse
+
+MIN_WINDOW = 16    # samples in each least-squares fit
+NOISE_SIGMAS = 6.0  # detection thresholds never sit below this many sigma
+
+
+def sliding_line_fits(trace: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Least-squares line fits over every window of ``window`` samples.
+
+    Uses running sums of y and j*y, so the cost is O(n) for any window.
+
+    Args:
+        trace: Trace samples (dB)
+        window: Samples per fit
+
+    Returns:
+        (slope, intercept) arrays of length ``n - window + 1``; the fit for
+        window start ``a`` is ``intercept[a] + slope[a] * (p - a)``
+    """
+    y = np.asarray(trace, dtype=np.float64)
+    n = len(y)
+    count = n - window + 1
+
+    # Running sums of y and j*y; operations below reuse buffers in place,
+    # which matters more than the arithmetic for 100k+ point traces
+    sum_y = np.empty(n + 1)
+    sum_y[0] = 0.0
+    np.cumsum(y, out=sum_y[1:])
+    scratch = np.arange(n, dtype=np.float64)
+    scratch *= y
+    sum_jy = np.empty(n + 1)
+    sum_jy[0] = 0.0
+    np.cumsum(scratch, out=sum_jy[1:])
+
+    sk = window * (window - 1) / 2.0
+    skk = (window - 1) * window * (2 * window - 1) / 6.0
+    sy = sum_y[window:] - sum_y[:-window]
+    slope = sum_jy[window:] - sum_jy[:-window]
+    temp = scratch[:count]
+    temp[:] = np.arange(count)
+    temp *= sy
+    slope -= temp  # sum of k*y with k local to the window
+    slope *= window
+    np.multiply(sy, sk, out=temp)
+    slope -= temp
+    slope /= window * skk - sk * sk
+
+    intercept = sy
+    np.multiply(slope, sk, out=temp)
+    intercept -= temp
+    intercept /= window
+    return slope, intercept
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """(start, stop) index pairs of the True runs in a boolean mask."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.column_stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def _moving_average(y: np.ndarray, width: int) -> np.ndarray:
+    """Centred moving average; the ends repeat the first/last full window."""
+    if width <= 1 or len(y) < width:
+        return y
+    csum = np.empty(len(y) + 1)
+    csum[0] = 0.0
+    np.cumsum(y, out=csum[1:])
+    core = csum[width:]
+    core -= csum[:-width]
+    core /= width
+    out = np.empty(len(y))
+    head = width // 2
+    out[head:head + len(core)] = core
+    out[:head] = core[0]
+    out[head + len(core):] = core[-1]
+    return out
+
+
+def _robust_sigma(values: np.ndarray) -> float:
+    """Noise estimate from the median absolute deviation."""
+    if len(values) == 0:
+        return 0.0
+    return float(1.4826 * np.median(np.abs(values - np.median(values))))
+
+
+def reflectance(height: float, pulse_width_ns: float,
+                backscatter: float = BACKSCATTER_1NS) -> float:
+    """
+    Reflectance (dB) of a peak ``height`` dB above the backscatter level.
+
+    Args:
+        height: Peak height above the preceding backscatter (dB)
+        pulse_width_ns: OTDR pulse width (ns)
+        backscatter: Backscatter coefficient for a 1 ns pulse (dB)
+    """
+    excess = 10 ** (height / 5.0) - 1.0
+    if excess <= 0 or pulse_width_ns <= 0:
+        return float('-inf')
+    return backscatter + 10 * math.log10(excess * pulse_width_ns)
+
+
+def detect_events(trace: np.ndarray, spacing_km: float,
+                  pulse_width_ns: float = 0.0,
+                  group_index: float = 1.4682,
+                  loss_threshold: float = LOSS_THRESHOLD,
+                  reflectance_threshold: float = REFLECTANCE_THRESHOLD,
+                  eof_threshold: float = EOF_THRESHOLD,
+                  backscatter: float = BACKSCATTER_1NS,
+                  window: int = None) -> np.ndarray:
+    """
+    Find reflective and non-reflective events and the end of fiber.
+
+    Each sample ``i`` gets a backward fit (window ending a guard gap before
+    ``i``) and a forward fit (window starting a guard gap after ``i``),
+    both extrapolated to ``i``. Their difference is the step loss at ``i``;
+    the height of the trace above both fits marks reflective peaks.
+    Runs above threshold become events, strongest first, and weaker
+    detections inside an accepted event's fit windows are suppressed. The
+    step profile is blanked within a fit's reach of every reflective peak,
+    whose spike would otherwise bend the fits into phantom steps, and
+    only positive steps (losses) are reported as non-reflective events.
+
+    Args:
+        trace: Trace samples (dB, decreasing with distance)
+        spacing_km: Distance between samples (km)
+        pulse_width_ns: Pulse width (ns); sizes the guard gap and is
+            needed for reflectance
+        group_index: Fiber group index (sizes the pulse in samples)
+        loss_threshold: Minimum event loss reported (dB)
+        reflectance_threshold: Peaks weaker than this are non-reflective (dB)
+        eof_threshold: Drop into the noise floor marking end of fiber (dB)
+        backscatter: Backscatter coefficient for a 1 ns pulse (dB)
+        window: Samples per line fit (default: derived from the pulse)
+
+    Returns:
+        Event table (``otdr_events.EVENT_DTYPE``) in distance order,
+        starting with the launch ('Start') and ending with 'End'
+    """
+    y = np.asarray(trace, dtype=np.float64)
+    n = len(y)
+    if n == 0 or spacing_km <= 0:
+        return from_records([])
+
+    # Pulse extent in samples sets the guard gap around each event
+    pulse_km = pulse_width_ns * 1e-9 * SPEED_OF_LIGHT / group_index / 2.0
+    guard = max(2, int(math.ceil(pulse_km / spacing_km)))
+    window = window or max(MIN_WINDOW, 4 * guard)
+    radius = 2 * (window + guard)  # events closer than this share fit windows
+
+    events = [_event(0.0, 'Start', 0.0, None, 0.0, '0F9999')]
+    if n < 2 * radius:
+        return _numbered(events)
+
+    # Noise: robust sigma of sample-to-sample differences (subsampled)
+    stride = max(1, n // 16384)
+    sample_sigma = _robust_sigma(np.diff(y)[::stride]) / math.sqrt(2.0)
+    smooth = _moving_average(y, guard)
+
+    # End of fiber: last point standing eof_threshold above the noise floor
+    noise_floor = float(np.median(y[-max(window, n // 50):]))
+    level = noise_floor + max(eof_threshold, NOISE_SIGMAS * sample_sigma)
+    above = np.flatnonzero(smooth > level)
+    end_index = int(above[-1]) if len(above) else n - 1
+
+    # Skip the launch dead zone: everything up to the front-panel peak
+    first = int(np.argmax(smooth[:radius])) + 2 * guard
+
+    # Backward/forward fits extrapolated to every sample i; nothing past
+    # the end of fiber needs fitting
+    lo = first + guard + window
+    hi = min(n - guard - window, end_index + window)
+    if hi <= lo:
+        events.append(_event(end_index * spacing_km, 'End', 0.0, None, 0.0, '0E9999'))
+        return _numbered(events)
+    slope, intercept = sliding_line_fits(y[:hi + guard + window], window)
+    valid = np.arange(lo, hi + 1)
+    back_range = slice(lo - guard - window, hi - guard - window + 1)
+    fwd_range = slice(lo + guard, hi + guard + 1)
+    back = intercept[back_range] + slope[back_range] * (guard + window)
+    fwd = intercept[fwd_range] - slope[fwd_range] * guard
+    step = back - fwd
+    # A reflection stands above both fits; a step only above one of them
+    peak = y[lo:hi + 1] - np.maximum(back, fwd)
+    peak[max(0, end_index + 1 - lo):] = 0.0
+
+    loss_limit = max(loss_threshold, NOISE_SIGMAS * _robust_sigma(step[::stride]))
+    peak_limit = max(loss_threshold, NOISE_SIGMAS * sample_sigma)
+
+    def fit_at(start: int, position: int) -> float:
+        return intercept[start] + slope[start] * (position - start)
+
+    # Reflective peaks: rising edge, height, and the loss measured with
+    # fits clear of the peak on both sides. With a known pulse width,
+    # bumps too weak to be reflections (fit noise where steps sit close
+    # together) are left to the step pass rather than merged into a peak
+    reach = window + guard
+    end_zone = end_index - radius
+    candidates = []
+    for start, stop in _runs(peak > peak_limit):
+        edge, tail = int(valid[start]), int(valid[stop - 1])
+        height = float(peak[start:stop].max())
+        if (pulse_width_ns > 0 and edge < end_zone
+                and reflectance(height, pulse_width_ns, backscatter) < reflectance_threshold):
+            continue
+        if candidates and edge - candidates[-1][3] <= radius:
+            prev = candidates[-1]
+            candidates[-1] = (prev[0], prev[1], max(prev[2], height), tail)
+            continue
+        candidates.append((edge, 0.0, height, tail))
+    for i, (edge, _, height, tail) in enumerate(candidates):
+        b0, f0 = edge - reach, tail + guard
+        loss = 0.0
+        if b0 >= 0 and f0 < len(slope):
+            loss = fit_at(b0, edge) - fit_at(f0, edge)
+        candidates[i] = (edge, loss, height, tail)
+
+    # A fit window that takes in a reflective spike is pulled up by it, so
+    # the step profile within a fit's reach of a reflection is meaningless
+    for edge, _, _, tail in candidates:
+        step[max(0, edge - reach - lo):max(0, tail + reach + 1 - lo)] = 0.0
+
+    # Non-reflective steps: the step profile plateaus at the loss around
+    # the event, so the weighted centre of each run is the event position,
+    # and fits clear of the whole run give the loss of everything in it
+    # (splices closer together than a fit window merge into one event).
+    # Only losses count; a gain away from any reflection is fit noise
+    steps = []
+    for start, stop in _runs(step > loss_limit):
+        weights = step[start:stop]
+        centre = start + int(round(np.dot(np.arange(stop - start), weights) / weights.sum()))
+        position = int(valid[centre])
+        b0, f0 = int(valid[start]) - reach, int(valid[stop - 1]) + guard
+        loss = float(step[centre])
+        if b0 >= 0 and f0 < len(slope):
+            loss = max(loss, fit_at(b0, position) - fit_at(f0, position))
+        steps.append((position, loss, None, position))
+    steps.sort(key=lambda c: -c[1])
+
+    # Steps already keep clear of reflections by ``reach``; two steps
+    # closer than ``radius`` share fit windows and count once
+    accepted = list(candidates)
+    for cand in steps:
+        if all(cand[0] < a[0] - gap or cand[0] > a[3] + gap
+               for a in accepted for gap in [radius if a[2] is None else reach]):
+            accepted.append(cand)
+    accepted.sort()
+
+    for position, loss, height, tail in accepted:
+        is_end = position >= end_zone
+        refl = None
+        if height is not None:
+            refl = reflectance(height, pulse_width_ns, backscatter)
+            if refl < reflectance_threshold and not is_end:
+                refl = None
+        attenuation = -slope[max(0, position - guard - window)] / spacing_km
+        code = '1' if refl is not None else '0'
+        if is_end:
+            # The drop into the noise is not a splice loss
+            events.append(_event(position * spacing_km, 'End', 0.0, refl,
+                                 attenuation, code + 'E9999'))
+            break
+        if abs(loss) < loss_threshold and refl is None:
+            continue
+        events.append(_event(position * spacing_km,
+                             'Connector' if refl is not None else 'Splice',
+                             loss, refl, attenuation, code + 'F9999'))
+    else:
+        attenuation = -slope[max(0, end_index - guard - window)] / spacing_km
+        events.append(_event(end_index * spacing_km, 'End', 0.0, None,
+                             attenuation, '0E9999'))
+
+    return _numbered(events)
+
+
+def _numbered(events: List[Dict]) -> np.ndarray:
+    """Number events 1..n in distance order and build the event table."""
+    for number, event in enumerate(events, 1):
+        event['number'] = number
+    return from_records(events)
+
+
+def _event(distance: float, kind: str, loss: float, refl, slope: float,
+           code: str) -> Dict:
+    """Event record, as accepted by ``otdr_events.from_records``."""
+    return {
+        'number': 0,
+        'distance': float(distance),
+        'type': kind,
+        'loss': float(loss),
+        'reflectance': None if refl is None else float(refl),
+        'slope': float(slope),
+        'code': code,
+        'technique': 'LS',
+        'comment': '',
+    }
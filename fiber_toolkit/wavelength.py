@@ -1,23 +1,72 @@
 #!/usr/bin/env python3
 """
 Wavelength Calculator
-Wavelength-specific attenuation, dispersion, and CWDM channels.
+Wavelength-specific attenuation, dispersion, and CWDM/DWDM channels.
+
+The channel sweep evaluates the full link budget and chromatic dispersion
+of every link on every channel of a CWDM or ITU DWDM grid as one
+links x channels array, and reports each link's worst channel.
+
+The reach solver gives the dispersion-limited length of many
+transceiver/fiber combinations at once: the ITU-T G.957 spectral-width
+limit B * |D| * L * sigma <= epsilon, capped by the chirp-free limit
+16 * |beta2| * B^2 * L <= 1 for narrow-line sources.
 
 Author: David Osisek (CFOt)
+Standards: ITU-T G.694.1, G.694.2, G.652, G.957
 """
 
 import click
-from rich.console import Console
-from rich.table import Table
+from functools import partial
+from typing import Dict
+
+from . import profiling
+from .cli_output import emit, format_option
+from .link_budget import LinkBudget
+from .parallel import imap_ordered
+from .spectral import attenuation, check_fiber_types, dispersion
+from .table_io import DEFAULT_CHUNK_SIZE, ChunkWriter, iter_chunks
+
+SPEED_OF_LIGHT = 299792.458  # nm * THz
+
+# CWDM grid (nm) as listed by list_cwdm_channels
+CWDM_WAVELENGTHS = tuple(range(1270, 1620, 20))
+
+# ITU-T G.694.1 DWDM grid: 193.1 THz anchor, C-band span (THz)
+DWDM_ANCHOR = 193.1
+DWDM_BAND = (191.3, 196.6)
+CHANNEL_GRIDS = {
+    'cwdm': None,
+    'dwdm-100': 0.1,  # spacing (THz)
+    'dwdm-50': 0.05,
+}
+
+# Reach solver source types: G.957 epsilon for a 1 dB dispersion penalty
+SOURCE_EPSILON = {
+    'led': 0.306,
+    'mlm': 0.115,  # multi-longitudinal-mode (Fabry-Perot) laser
+}
+
 
 class WavelengthCalculator:
     """Wavelength-specific calculations."""
     
     WAVELENGTHS = {
-        850: {'window': 'First', 'fiber': 'MM', 'disp': 0, 'atten_mm': 3.0},
-        1300: {'window': 'Second', 'fiber': 'MM/SM', 'disp': 0, 'atten_mm': 1.0, 'atten_sm': 0.35},
-        1310: {'window': 'O-band', 'fiber': 'SM', 'disp': 0, 'atten_sm': 0.35},
-        1550: {'window': 'C-band', 'fiber': 'SM', 'disp': 17, 'atten_sm': 0.25},
+        850: {'window': 'First', 'fiber': 'MM', 'atten_mm': 3.0},
+        1300: {'window': 'Second', 'fiber': 'MM/SM', 'atten_mm': 1.0, 'atten_sm': 0.35},
+        1310: {'window': 'O-band', 'fiber': 'SM', 'atten_sm': 0.35},
+        1550: {'window': 'C-band', 'fiber': 'SM', 'atten_sm': 0.25},
+    }
+    
+    # Reach solver columns and the input names accepted for them
+    REACH_COLUMNS = {
+        'bit_rate': ('bit_rate', 'rate'),
+        'spectral_width': ('spectral_width', 'width'),
+        'wavelength': ('wavelength',),
+        'fiber_type': ('fiber_type',),
+        'source': ('source',),
+        'epsilon': ('epsilon',),
+        'fiber_length': ('fiber_length', 'length'),
     }
     
     @classmethod
@@ -26,19 +75,391 @@ class WavelengthCalculator:
         return cls.WAVELENGTHS.get(wavelength, {})
     
     @classmethod
-    def calculate_dispersion(cls, wavelength: int, length: float) -> float:
-        """Calculate chromatic dispersion."""
-        info = cls.get_wavelength_info(wavelength)
-        disp_coeff = info.get('disp', 17)
-        return disp_coeff * length
+    def calculate_dispersion(cls, wavelength, length, fiber_type: str = 'SM'):
+        """
+        Accumulated chromatic dispersion D(lambda) * L.
+        
+        Args:
+            wavelength: Wavelength (nm), scalar or NumPy array
+            length: Fiber length (km), scalar or NumPy array
+            fiber_type: Fiber type for the D(lambda) model
+        
+        Returns:
+            Dispersion in ps/nm (broadcast array for array inputs)
+        
+        Raises:
+            ValueError: If the fiber type has no dispersion model
+        """
+        return cls.dispersion_coefficient(wavelength, fiber_type) * length
     
     @classmethod
     def list_cwdm_channels(cls):
         """List CWDM wavelength channels."""
         channels = []
-        for i, wl in enumerate(range(1270, 1620, 20), 1):
+        for i, wl in enumerate(CWDM_WAVELENGTHS, 1):
             channels.append({'channel': i, 'wavelength': wl})
         return channels
+    
+    @classmethod
+    def dispersion_coefficient(cls, wavelengths, fiber_type: str = 'SM'):
+        """
+        Chromatic dispersion D(lambda) in ps/(nm*km) (see ``spectral.dispersion``).
+        
+        Args:
+            wavelengths: Wavelength (nm), scalar or NumPy array
+            fiber_type: 'SM', 'MM' or 'MM-OM1'..'MM-OM5'
+        
+        Raises:
+            ValueError: If the fiber type has no dispersion model
+        """
+        check_fiber_types((fiber_type,))
+        return dispersion(fiber_type, wavelengths)
+    
+    @classmethod
+    def channel_grid(cls, grid: str = 'cwdm') -> Dict:
+        """
+        Channels of a CWDM or ITU DWDM grid.
+        
+        Args:
+            grid: 'cwdm' (18 channels, 1270-1610 nm), 'dwdm-100' or
+                'dwdm-50' (C-band at 100/50 GHz spacing)
+        
+        Returns:
+            Dictionary with ``label`` (list of str; ITU channel numbers
+            such as 'C31' for DWDM), ``wavelength`` (nm) and
+            ``frequency`` (THz) arrays
+        """
+        import numpy as np
+        
+        if grid not in CHANNEL_GRIDS:
+            raise ValueError(f"Unknown channel grid: {grid}")
+        spacing = CHANNEL_GRIDS[grid]
+        if spacing is None:
+            wavelength = np.array(CWDM_WAVELENGTHS, dtype=float)
+            frequency = SPEED_OF_LIGHT / wavelength
+            labels = [str(wl) for wl in CWDM_WAVELENGTHS]
+        else:
+            low = int(np.ceil(round((DWDM_BAND[0] - DWDM_ANCHOR) / spacing, 6)))
+            high = int(np.floor(round((DWDM_BAND[1] - DWDM_ANCHOR) / spacing, 6)))
+            # Highest frequency first, so wavelengths ascend
+            frequency = DWDM_ANCHOR + spacing * np.arange(high, low - 1, -1)
+            wavelength = SPEED_OF_LIGHT / frequency
+            labels = [f"C{round((f - 190.0) * 10, 1):g}" for f in frequency]
+        return {'label': labels, 'wavelength': wavelength, 'frequency': frequency}
+    
+    @classmethod
+    @profiling.timed('wavelength.channel_sweep')
+    def channel_sweep(cls, data=None, grid: str = 'cwdm', mux_loss=0.0,
+                      max_dispersion=None, **columns) -> Dict:
+        """
+        Link budget and dispersion of every link on every channel of a grid.
+        
+        Fiber attenuation follows each link's spectral curve per channel
+        (a custom ``fiber_loss`` applies to all channels); connector,
+        splice and mux/demux losses are wavelength-flat. Everything is one
+        broadcast over a links x channels array.
+        
+        Args:
+            data: Optional DataFrame or mapping of link columns, as for
+                ``LinkBudget.calculate_batch`` (``wavelength`` is ignored)
+            grid: Channel grid name (see ``channel_grid``)
+            mux_loss: Mux + demux insertion loss (dB), scalar or per link
+            max_dispersion: Transceiver dispersion tolerance (ps/nm),
+                scalar or per link; channels beyond it FAIL regardless of SOM
+            **columns: Link columns, overriding ``data``
+        
+        Returns:
+            Dictionary with ``channels`` (from ``channel_grid``),
+            links x channels arrays ``fiber_loss``, ``total_loss``,
+            ``som``, ``dispersion`` (ps/nm) and ``status_code``, and per
+            link ``worst_channel`` (column index), ``worst_som``,
+            ``worst_status`` and ``failing_channels``
+        
+        Raises:
+            ValueError: If a fiber type has no attenuation or dispersion
+                model; blank fiber types are SM
+        """
+        import numpy as np
+        
+        channels = cls.channel_grid(grid)
+        wavelength = channels['wavelength']
+        inputs = LinkBudget._batch_inputs(data, columns)
+        length = inputs['fiber_length']
+        
+        # One spectral row per distinct fiber type, gathered per link
+        types, inverse = np.unique(inputs['fiber_type'], return_inverse=True)
+        check_fiber_types(types)
+        # Shaped explicitly so a chunk with no links gives (0, channels)
+        shape = (len(types), len(wavelength))
+        curves = np.array([attenuation(name, wavelength) for name in types]).reshape(shape)
+        per_km = curves[inverse.reshape(-1)]
+        custom = inputs['custom_fiber_loss']
+        has_custom = ~np.isnan(custom)
+        per_km[has_custom] = custom[has_custom, None]
+        
+        fiber_loss = length[:, None] * per_km
+        fixed_loss = (inputs['connector_count'] * inputs['connector_loss']
+                      + inputs['splice_count'] * inputs['splice_loss']
+                      + np.broadcast_to(np.asarray(mux_loss, dtype=float), length.shape))
+        total_loss = fiber_loss + fixed_loss[:, None]
+        headroom = inputs['tx_power'] - inputs['rx_sensitivity'] - inputs['safety_margin']
+        som = headroom[:, None] - total_loss
+        coefficients = np.array([dispersion(name, wavelength) for name in types]).reshape(shape)
+        link_dispersion = length[:, None] * coefficients[inverse.reshape(-1)]
+        
+        status_code = LinkBudget.status_codes(som)
+        rank = som
+        if max_dispersion is not None:
+            limit = np.broadcast_to(np.asarray(max_dispersion, dtype=float), length.shape)
+            too_dispersed = np.abs(link_dispersion) > limit[:, None]
+            status_code[too_dispersed] = LinkBudget.STATUS_FAIL
+            rank = np.where(too_dispersed, -np.inf, som)
+        
+        rows = np.arange(len(length))
+        worst = rank.argmin(axis=1)
+        worst_code = status_code[rows, worst]
+        return {
+            'channels': channels,
+            'fiber_loss': fiber_loss,
+            'total_loss': total_loss,
+            'som': som,
+            'dispersion': link_dispersion,
+            'status_code': status_code,
+            'worst_channel': worst,
+            'worst_som': som[rows, worst],
+            'worst_status': np.asarray(LinkBudget.STATUS_TEXT)[worst_code],
+            'failing_channels': (status_code == LinkBudget.STATUS_FAIL).sum(axis=1),
+        }
+    
+    @classmethod
+    @profiling.timed('wavelength.dispersion_reach')
+    def dispersion_reach(cls, data=None, **columns) -> Dict:
+        """
+        Dispersion-limited reach of many transceiver/fiber combinations.
+        
+        The spectral-width limit is the ITU-T G.957 rule
+        L = epsilon * 1e6 / (B * |D| * sigma) (B in Mb/s); it is capped by
+        the chirp-free limit L = 1 / (16 * |beta2| * B^2), which governs
+        narrow-line (DFB) sources. Reach is infinite at the zero-dispersion
+        wavelength.
+        
+        Args:
+            data: Optional DataFrame or mapping of columns (aliases in
+                ``REACH_COLUMNS``)
+            **columns: Columns as arrays or scalars, overriding ``data``:
+                ``bit_rate`` (Gb/s) and ``spectral_width`` (nm RMS) are
+                required; ``wavelength`` (default 1310), ``fiber_type``
+                (default 'SM'), ``source`` ('led' or 'mlm', default 'mlm')
+                or an explicit ``epsilon``, and optional ``fiber_length``
+                (km) to check links against their reach
+        
+        Returns:
+            Dictionary of arrays: ``dispersion_coefficient`` (ps/(nm*km)),
+            ``reach`` (km), ``max_dispersion`` (ps/nm tolerated), and
+            ``limit`` ('spectral' or 'chirp'); with lengths also
+            ``dispersion`` (ps/nm), ``reach_margin`` (km) and ``within_reach``
+        
+        Raises:
+            ValueError: On unknown source or fiber types; blank fiber
+                types are SM
+        """
+        import numpy as np
+        
+        source = {}
+        if data is not None:
+            for name, aliases in cls.REACH_COLUMNS.items():
+                for alias in aliases:
+                    if alias in data:
+                        source[name] = data[alias]
+                        break
+        for name, value in columns.items():
+            if name not in cls.REACH_COLUMNS:
+                raise TypeError(f"Unknown reach column: {name}")
+            source[name] = value
+        missing = [n for n in ('bit_rate', 'spectral_width') if source.get(n) is None]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        
+        def column(name, default):
+            value = source.get(name)
+            return np.atleast_1d(np.asarray(default if value is None else value, dtype=float))
+        
+        bit_rate, width, wavelength, length = np.broadcast_arrays(
+            column('bit_rate', None), column('spectral_width', None),
+            column('wavelength', 1310), column('fiber_length', np.nan))
+        shape = bit_rate.shape
+        
+        # Explicit epsilon wins; otherwise the source type's G.957 value
+        kinds = np.char.lower(np.broadcast_to(
+            np.asarray(source.get('source', 'mlm'), dtype=object), shape).astype(str))
+        unknown = set(np.unique(kinds)) - set(SOURCE_EPSILON)
+        if unknown:
+            raise ValueError(f"Unknown source type(s): {', '.join(sorted(unknown))}")
+        epsilon = np.zeros(shape)
+        for kind, value in SOURCE_EPSILON.items():
+            epsilon[kinds == kind] = value
+        explicit = np.broadcast_to(column('epsilon', np.nan), shape)
+        epsilon = np.where(np.isnan(explicit), epsilon, explicit)
+        
+        fiber_type = np.broadcast_to(
+            np.asarray(source.get('fiber_type', 'SM'), dtype=object), shape)
+        blank = np.equal(fiber_type, None) | (fiber_type != fiber_type) | (fiber_type == '')
+        fiber_type = np.where(blank, 'SM', fiber_type).astype(str)
+        names = np.unique(fiber_type)
+        check_fiber_types(names)
+        coefficient = np.empty(shape)
+        for name in names:
+            selected = fiber_type == name
+            coefficient[selected] = dispersion(name, wavelength[selected])
+        magnitude = np.abs(coefficient)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spectral_reach = epsilon * 1e6 / (bit_rate * 1e3 * magnitude * width)
+            # |beta2| (ps^2/km) = |D| * lambda^2 / (2 pi c), c in nm/ps, B in 1/ps
+            beta2 = magnitude * wavelength ** 2 / (2 * np.pi * SPEED_OF_LIGHT)
+            chirp_reach = 1.0 / (16 * beta2 * (bit_rate * 1e-3) ** 2)
+            reach = np.minimum(spectral_reach, chirp_reach)
+            max_dispersion = np.where(magnitude > 0, magnitude * reach, np.inf)
+        results = {
+            'dispersion_coefficient': coefficient,
+            'reach': reach,
+            'max_dispersion': max_dispersion,
+            'limit': np.where(spectral_reach <= chirp_reach, 'spectral', 'chirp'),
+        }
+        if source.get('fiber_length') is not None:
+            results['dispersion'] = coefficient * length
+            results['reach_margin'] = reach - length
+            results['within_reach'] = length <= reach
+        return results
+
+
+def _sweep_chunk(chunk, grid: str, mux_loss: float, max_dispersion: float,
+                 per_channel: bool):
+    """Sweep one chunk of links; returns one row per link, inputs passed through."""
+    if 'max_dispersion' in chunk:
+        max_dispersion = chunk['max_dispersion'].fillna(
+            float('inf') if max_dispersion is None else max_dispersion).to_numpy()
+    results = WavelengthCalculator.channel_sweep(
+        chunk, grid=grid, mux_loss=mux_loss, max_dispersion=max_dispersion)
+    labels = results['channels']['label']
+    worst = results['worst_channel']
+    
+    output = chunk.copy()
+    output['worst_channel'] = [labels[i] for i in worst]
+    output['worst_wavelength'] = results['channels']['wavelength'][worst]
+    output['worst_som'] = results['worst_som']
+    output['worst_status'] = results['worst_status']
+    output['failing_channels'] = results['failing_channels']
+    output['max_abs_dispersion'] = abs(results['dispersion']).max(axis=1)
+    if per_channel:
+        import pandas as pd
+
+        som = pd.DataFrame(results['som'], index=output.index,
+                           columns=[f'som_{label}' for label in labels])
+        output = pd.concat([output, som], axis=1)
+    return output
+
+
+def run_sweep(input_path: str, output_path: str, grid: str = 'cwdm',
+              mux_loss: float = 0.0, max_dispersion: float = None,
+              per_channel: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              workers: int = 1) -> Dict:
+    """
+    Sweep every link in a CSV/Parquet file across a channel grid.
+    
+    Streams chunk by chunk like ``link_budget.run_batch``. Each output row
+    is the input link plus its worst channel; ``per_channel`` adds one SOM
+    column per channel.
+    
+    Returns:
+        Dictionary with link and channel counts and per-status totals of
+        the worst channels
+    """
+    evaluate = partial(_sweep_chunk, grid=grid, mux_loss=mux_loss,
+                       max_dispersion=max_dispersion, per_channel=per_channel)
+    summary = {'links': 0,
+               'channels': len(WavelengthCalculator.channel_grid(grid)['label'])}
+    summary.update({status: 0 for status in LinkBudget.STATUS_TEXT})
+    with ChunkWriter(output_path) as writer:
+        for results in imap_ordered(evaluate, iter_chunks(input_path, chunk_size), workers):
+            writer.write(results)
+            summary['links'] += len(results)
+            for status, count in results['worst_status'].value_counts().items():
+                summary[status] += int(count)
+    return summary
+
+
+def _reach_chunk(chunk):
+    """Solve one chunk of transceiver/fiber rows, inputs passed through."""
+    results = WavelengthCalculator.dispersion_reach(chunk)
+    output = chunk.copy()
+    for name, values in results.items():
+        output[name] = values
+    return output
+
+
+def run_reach(input_path: str, output_path: str,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1) -> Dict:
+    """
+    Dispersion-limited reach of every row in a CSV/Parquet file.
+    
+    Streams chunk by chunk like ``link_budget.run_batch``; rows need
+    ``bit_rate`` and ``spectral_width`` plus any of the optional
+    ``dispersion_reach`` columns.
+    
+    Returns:
+        Dictionary with row count, rows per limiting mechanism and, when
+        the file has lengths, the number of links beyond their reach
+    """
+    summary = {'rows': 0, 'spectral': 0, 'chirp': 0}
+    with ChunkWriter(output_path) as writer:
+        for results in imap_ordered(_reach_chunk, iter_chunks(input_path, chunk_size), workers):
+            writer.write(results)
+            summary['rows'] += len(results)
+            for limit, count in results['limit'].value_counts().items():
+                summary[limit] += int(count)
+            if 'within_reach' in results:
+                summary['beyond_reach'] = (summary.get('beyond_reach', 0)
+                                           + int((~results['within_reach']).sum()))
+    return summary
+
+
+def _print_sweep(results: Dict, grid: str):
+    """Render a single-link sweep as a channel table."""
+    from rich.console import Console
+    from rich.table import Table
+    
+    channels = results['channels']
+    worst = int(results['worst_channel'][0])
+    colors = {'PASS': 'green', 'MARGINAL': 'yellow', 'FAIL': 'red'}
+    
+    table = Table(title=f"Channel Sweep ({grid.upper()})")
+    table.add_column("Channel", style="cyan")
+    table.add_column("nm", justify="right")
+    table.add_column("Fiber dB", justify="right")
+    table.add_column("Total dB", justify="right", style="red")
+    table.add_column("SOM dB", justify="right")
+    table.add_column("ps/nm", justify="right", style="magenta")
+    table.add_column("Status")
+    for i, label in enumerate(channels['label']):
+        status = LinkBudget.STATUS_TEXT[results['status_code'][0, i]]
+        marker = " *" if i == worst else ""
+        table.add_row(
+            f"{label}{marker}",
+            f"{channels['wavelength'][i]:.2f}",
+            f"{results['fiber_loss'][0, i]:.2f}",
+            f"{results['total_loss'][0, i]:.2f}",
+            f"{results['som'][0, i]:.2f}",
+            f"{results['dispersion'][0, i]:.1f}",
+            f"[{colors[status]}]{status}[/{colors[status]}]",
+        )
+    console = Console()
+    console.print()
+    console.print(table)
+    console.print(f"Worst channel: {channels['label'][worst]} "
+                  f"(SOM {results['worst_som'][0]:.2f} dB), "
+                  f"{int(results['failing_channels'][0])} failing\n")
+
 
 @click.command()
 @click.option('--wavelength', type=int, help='Wavelength (nm)')
@@ -46,8 +467,76 @@ class WavelengthCalculator:
 @click.option('--dispersion', is_flag=True, help='Calculate dispersion')
 @click.option('--length', type=float, help='Fiber length (km) for dispersion')
 @click.option('--list-cwdm', is_flag=True, help='List CWDM channels')
-def main(wavelength, info, dispersion, length, list_cwdm):
+@click.option('--sweep', type=click.Choice(list(CHANNEL_GRIDS)),
+              help='Evaluate a link on every channel of a CWDM/DWDM grid')
+@click.option('--tx-power', type=float, help='Sweep: transmitter power (dBm)')
+@click.option('--rx-sensitivity', type=float, help='Sweep: receiver sensitivity (dBm)')
+@click.option('--fiber-type', default='SM', show_default=True,
+              help='Fiber type (dispersion, sweep and reach)')
+@click.option('--connectors', type=int, default=0, help='Sweep: number of connectors')
+@click.option('--splices', type=int, default=0, help='Sweep: number of splices')
+@click.option('--safety-margin', type=float, default=3.0, help='Sweep: safety margin (dB)')
+@click.option('--mux-loss', type=float, default=0.0, show_default=True,
+              help='Sweep: mux + demux insertion loss (dB)')
+@click.option('--max-dispersion', type=float,
+              help='Sweep: transceiver dispersion tolerance (ps/nm)')
+@click.option('--reach', is_flag=True,
+              help='Solve the dispersion-limited reach (single row or --input file)')
+@click.option('--bit-rate', type=float, help='Reach: bit rate (Gb/s)')
+@click.option('--spectral-width', type=float, help='Reach: source RMS spectral width (nm)')
+@click.option('--source', type=click.Choice(list(SOURCE_EPSILON), case_sensitive=False),
+              default='mlm', show_default=True, help='Reach: source type (sets epsilon)')
+@click.option('--epsilon', type=float, help='Reach: G.957 epsilon, overriding --source')
+@click.option('--input', 'input_path', type=click.Path(exists=True, dir_okay=False),
+              help='Sweep/reach: input file (.csv or .parquet)')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False),
+              help='Sweep/reach: results file (.csv or .parquet)')
+@click.option('--per-channel', is_flag=True, help='Sweep: add one SOM column per channel')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE,
+              show_default=True, help='Sweep/reach: rows per chunk')
+@click.option('--workers', type=click.IntRange(min=0), default=1, show_default=True,
+              help='Sweep/reach: worker processes (0 = one per CPU)')
+@format_option
+@profiling.profile_option
+def main(wavelength, info, dispersion, length, list_cwdm, sweep, tx_power,
+         rx_sensitivity, fiber_type, connectors, splices, safety_margin, mux_loss,
+         max_dispersion, reach, bit_rate, spectral_width, source, epsilon,
+         input_path, output_path, per_channel, chunk_size, workers, format):
     """Wavelength calculator and CWDM channel reference."""
+    if dispersion or ((reach or sweep) and not input_path):
+        try:
+            check_fiber_types((fiber_type,))
+        except ValueError as exc:
+            raise click.UsageError(str(exc))
+    if reach:
+        _run_reach_command(wavelength, length, fiber_type, bit_rate, spectral_width,
+                           source, epsilon, input_path, output_path, chunk_size,
+                           workers, format)
+        return
+    if sweep:
+        _run_sweep_command(sweep, length, tx_power, rx_sensitivity, fiber_type,
+                           connectors, splices, safety_margin, mux_loss,
+                           max_dispersion, input_path, output_path, per_channel,
+                           chunk_size, workers, format)
+        return
+    
+    if format != 'table':
+        result = {}
+        if list_cwdm:
+            result['cwdm_channels'] = WavelengthCalculator.list_cwdm_channels()
+        else:
+            if info and wavelength:
+                result['wavelength'] = wavelength
+                result['info'] = WavelengthCalculator.get_wavelength_info(wavelength)
+            if dispersion and wavelength and length:
+                result['dispersion_coefficient'] = \
+                    WavelengthCalculator.dispersion_coefficient(wavelength, fiber_type)
+                result['dispersion'] = WavelengthCalculator.calculate_dispersion(
+                    wavelength, length, fiber_type)
+        emit(result, format)
+        return
+    
+    from rich.console import Console
     console = Console()
     
     if list_cwdm:
@@ -64,8 +553,121 @@ def main(wavelength, info, dispersion, length, list_cwdm):
         console.print(f"Fiber: {wl_info.get('fiber', 'N/A')}")
     
     if dispersion and wavelength and length:
-        disp = WavelengthCalculator.calculate_dispersion(wavelength, length)
-        console.print(f"\nDispersion: {disp:.2f} ps/(nm·km)")
+        coeff = WavelengthCalculator.dispersion_coefficient(wavelength, fiber_type)
+        disp = WavelengthCalculator.calculate_dispersion(wavelength, length, fiber_type)
+        console.print(f"\nDispersion coefficient ({fiber_type.upper()}): {coeff:.2f} ps/(nm·km)")
+        console.print(f"Dispersion over {length} km: {disp:.2f} ps/nm")
+
+
+def _run_reach_command(wavelength, length, fiber_type, bit_rate, spectral_width,
+                       source, epsilon, input_path, output_path, chunk_size,
+                       workers, format):
+    if input_path:
+        if not output_path:
+            raise click.UsageError("--input requires --output")
+        summary = run_reach(input_path, output_path, chunk_size, workers)
+        if format != 'table':
+            emit(dict(summary, output=output_path), format)
+            return
+        from rich.console import Console
+        console = Console()
+        console.print(f"\n[bold cyan]Solved reach for {summary['rows']} rows[/bold cyan] "
+                      f"-> {output_path}")
+        console.print(f"Limited by spectral width: {summary['spectral']}  "
+                      f"chirp-free limit: {summary['chirp']}")
+        if 'beyond_reach' in summary:
+            console.print(f"[red]Beyond reach: {summary['beyond_reach']}[/red]")
+        console.print()
+        return
+    
+    missing = [name for name, value in (('--wavelength', wavelength),
+                                        ('--bit-rate', bit_rate),
+                                        ('--spectral-width', spectral_width))
+               if value is None]
+    if missing:
+        raise click.UsageError(f"Missing option(s): {', '.join(missing)}")
+    results = WavelengthCalculator.dispersion_reach(
+        bit_rate=bit_rate, spectral_width=spectral_width, wavelength=wavelength,
+        fiber_type=fiber_type.upper(), source=source, epsilon=epsilon,
+        fiber_length=length)
+    result = {name: values[0].item() for name, values in results.items()}
+    
+    if format != 'table':
+        emit(dict(result, wavelength=wavelength, fiber_type=fiber_type.upper(),
+                  bit_rate=bit_rate, spectral_width=spectral_width), format)
+        return
+    
+    from rich.console import Console
+    console = Console()
+    console.print(f"\n[bold cyan]Dispersion-limited reach[/bold cyan] "
+                  f"({bit_rate:g} Gb/s, {spectral_width:g} nm, {wavelength} nm "
+                  f"{fiber_type.upper()})")
+    console.print(f"D: {result['dispersion_coefficient']:.2f} ps/(nm·km)")
+    console.print(f"Reach: {result['reach']:.2f} km ({result['limit']} limit), "
+                  f"max dispersion {result['max_dispersion']:.1f} ps/nm")
+    if length is not None:
+        color = 'green' if result['within_reach'] else 'red'
+        console.print(f"[{color}]{length:g} km link: margin "
+                      f"{result['reach_margin']:.2f} km[/{color}]")
+    console.print()
+
+def _run_sweep_command(grid, length, tx_power, rx_sensitivity, fiber_type,
+                       connectors, splices, safety_margin, mux_loss, max_dispersion,
+                       input_path, output_path, per_channel, chunk_size, workers,
+                       format):
+    if input_path:
+        if not output_path:
+            raise click.UsageError("--input requires --output")
+        summary = run_sweep(input_path, output_path, grid, mux_loss, max_dispersion,
+                            per_channel, chunk_size, workers)
+        if format != 'table':
+            emit(dict(summary, output=output_path), format)
+            return
+        from rich.console import Console
+        console = Console()
+        console.print(f"\n[bold cyan]Swept {summary['links']} links x "
+                      f"{summary['channels']} channels[/bold cyan] -> {output_path}")
+        console.print(f"Worst channel  [green]PASS: {summary['PASS']}[/green]  "
+                      f"[yellow]MARGINAL: {summary['MARGINAL']}[/yellow]  "
+                      f"[red]FAIL: {summary['FAIL']}[/red]\n")
+        return
+    
+    missing = [name for name, value in (('--tx-power', tx_power),
+                                        ('--rx-sensitivity', rx_sensitivity),
+                                        ('--length', length))
+               if value is None]
+    if missing:
+        raise click.UsageError(f"Missing option(s): {', '.join(missing)}")
+    results = WavelengthCalculator.channel_sweep(
+        grid=grid, mux_loss=mux_loss, max_dispersion=max_dispersion,
+        tx_power=tx_power, rx_sensitivity=rx_sensitivity, fiber_length=length,
+        fiber_type=fiber_type.upper(), connector_count=connectors,
+        splice_count=splices, safety_margin=safety_margin)
+    
+    if format != 'table':
+        channels = results['channels']
+        worst = int(results['worst_channel'][0])
+        emit({
+            'grid': grid,
+            'worst_channel': channels['label'][worst],
+            'worst_som': float(results['worst_som'][0]),
+            'failing_channels': int(results['failing_channels'][0]),
+            'channels': [
+                {
+                    'channel': label,
+                    'wavelength': float(channels['wavelength'][i]),
+                    'fiber_loss': float(results['fiber_loss'][0, i]),
+                    'total_loss': float(results['total_loss'][0, i]),
+                    'som': float(results['som'][0, i]),
+                    'dispersion': float(results['dispersion'][0, i]),
+                    'status': LinkBudget.STATUS_TEXT[results['status_code'][0, i]],
+                }
+                for i, label in enumerate(channels['label'])
+            ],
+        }, format)
+        return
+    _print_sweep(results, grid)
+
 
 if __name__ == '__main__':
     main()
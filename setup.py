@@ -51,8 +51,13 @@ setup(
         'openpyxl>=3.1.0',
         'xlsxwriter>=3.1.0',
     ],
+    extras_require={
+        'parquet': ['pyarrow>=12.0.0'],
+        'merge': ['pypdf>=3.0.0'],
+    },
     entry_points={
         'console_scripts': [
+            'fiber=fiber_toolkit.__main__:cli',
             'fiber-link-budget=fiber_toolkit.link_budget:main',
             'fiber-loss-calc=fiber_toolkit.loss_calculator:main',
             'fiber-wavelength=fiber_toolkit.wavelength:main',
@@ -60,6 +65,8 @@ setup(
             'fiber-report=fiber_toolkit.report_generator:main',
             'fiber-capacity=fiber_toolkit.capacity_planner:main',
             'fiber-standards=fiber_toolkit.standards_reference:main',
+            'fiber-route=fiber_toolkit.network:main',
+            'fiber-fleet=fiber_toolkit.fleet:main',
         ],
     },
     project_urls={
@@ -0,0 +1,133 @@
+"""Campus planning must allocate every strand and size cables at least cost."""
+
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fiber_toolkit.capacity_planner import CapacityPlanner
+
+
+def _cheapest(required, weights):
+    """Cheapest cost covering ``required`` strands, by plain recursion."""
+    @functools.lru_cache(maxsize=None)
+    def cover(need):
+        if need <= 0:
+            return 0.0
+        return min(weight + cover(need - count) for count, weight in weights.items())
+    return cover(int(required))
+
+
+@pytest.mark.parametrize('costs', [
+    CapacityPlanner.CABLE_COSTS,
+    {12: (1.0, 400.0), 30: (2.2, 300.0), 96: (6.5, 350.0)},
+])
+def test_size_segments_matches_brute_force(costs):
+    rng = np.random.default_rng(11)
+    required = rng.integers(1, 700, 60)
+    length = rng.uniform(5, 2000, 60)
+    sizing = CapacityPlanner._size_segments(required, length, costs)
+
+    assert (sizing['capacity'] >= required).all()
+    np.testing.assert_allclose(sizing['cables'] @ sizing['counts'], sizing['capacity'])
+    for need, metres, cost in zip(required, length, sizing['cost']):
+        weights = {count: metres * per_m + fixed for count, (per_m, fixed) in costs.items()}
+        assert cost == pytest.approx(_cheapest(need, weights))
+
+
+def _campus():
+    return pd.DataFrame({
+        'node': ['MDF', 'B1', 'B2', 'B3', 'B4', 'B5'],
+        'parent': ['', 'MDF', 'MDF', 'B1', 'B1', 'B3'],
+        'length': [0, 300, 450, 120, 80, 60],
+        'strands': [0, 24, 12, 48, 6, 30],
+    })
+
+
+def test_plan_campus_allocation():
+    plan = CapacityPlanner.plan_campus(_campus())
+    nodes = plan['nodes'].set_index('node')
+
+    assert plan['total_strands'] == 120
+    assert nodes.loc['B1', 'subtree_strands'] == 24 + 48 + 6 + 30
+    assert nodes.loc['B3', 'subtree_strands'] == 48 + 30
+    # Every building gets its own contiguous range and ranges never overlap
+    ranges = sorted((row.strand_first, row.strand_last) for row in nodes.itertuples()
+                    if row.strands)
+    assert ranges[0][0] == 1 and ranges[-1][1] == 120
+    assert all(b[0] == a[1] + 1 for a, b in zip(ranges, ranges[1:]))
+    # A node's range lies inside its parent's subtree range
+    b1_first = nodes.loc['B1', 'strand_first']
+    for child in ('B3', 'B4', 'B5'):
+        assert b1_first <= nodes.loc[child, 'strand_first']
+        assert nodes.loc[child, 'strand_last'] < b1_first + nodes.loc['B1', 'subtree_strands']
+
+    segments = nodes.drop(index='MDF')
+    assert (segments['capacity'] >= segments['subtree_strands']).all()
+    assert (segments['spare'] == segments['capacity'] - segments['subtree_strands']).all()
+    assert plan['total_cost'] == pytest.approx(segments['cost'].sum())
+    assert plan['segment_count'] == 5
+
+
+def test_plan_campus_endpoints_and_errors():
+    campus = _campus().drop(columns='strands').assign(endpoints=[0, 10, 4, 0, 1, 2])
+    plan = CapacityPlanner.plan_campus(campus, redundancy=1.5, future_growth=1.3)
+    strands = plan['nodes'].set_index('node')['strands']
+    # Duplex endpoints, as calculate_strand_count: 10 -> ceil(39.0)
+    assert strands['B1'] == 39 and strands['B5'] == 8
+
+    with pytest.raises(ValueError, match='Unknown parent'):
+        CapacityPlanner.plan_campus(_campus().replace({'parent': {'B3': 'B9'}}))
+    looped = _campus()
+    looped.loc[0, 'parent'] = 'B5'
+    with pytest.raises(ValueError, match='cycle'):
+        CapacityPlanner.plan_campus(looped)
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 3, 5])
+def test_conduit_fill_keeps_legacy_limits(count):
+    result = CapacityPlanner.conduit_fill(26.6, 9.5, count)
+    assert result['max_fill_percent'] == {1: 53, 2: 31}.get(count, 40)
+    assert result['fill_percent'] == pytest.approx(count * 9.5 ** 2 / 26.6 ** 2 * 100)
+
+
+def test_conduit_fill_batch_matches_scalar():
+    rng = np.random.default_rng(4)
+    conduit = rng.integers(0, 40, 150)
+    cables = pd.DataFrame({'conduit': [f'C{i}' for i in conduit],
+                           'cable_diameter': rng.choice([6.0, 9.5, 14.0, 18.5], 150)})
+    conduits = pd.DataFrame({'conduit': [f'C{i}' for i in range(42)],
+                             'conduit_diameter': rng.choice([35.1, 40.9, 52.5], 42)})
+    batch = CapacityPlanner.conduit_fill_batch(cables, conduits).set_index('conduit')
+
+    for name, row in batch.iterrows():
+        diameters = cables.loc[cables['conduit'] == name, 'cable_diameter'].tolist()
+        scalar = CapacityPlanner.conduit_fill_mixed(row['conduit_diameter'], diameters)
+        assert row['cable_count'] == len(diameters)
+        assert row['fill_percent'] == pytest.approx(scalar['fill_percent'])
+        assert row['max_fill_percent'] == scalar['max_fill_percent']
+        assert row['jam_risk'] == scalar['jam_risk']
+        assert row['compliant'] == scalar['compliant']
+        if diameters:
+            smallest = CapacityPlanner.smallest_conduit(diameters)['trade_size']
+            assert row['smallest_trade_size'] == (smallest or '')
+    # Listed conduits without cables are reported empty and compliant
+    assert batch.loc['C41', 'cable_count'] == 0 and batch.loc['C41', 'compliant']
+
+
+def test_assign_ducts():
+    diameters = [18.5, 14.0, 14.0, 9.5, 9.5, 9.5, 6.0, 6.0]
+    plan = CapacityPlanner.assign_ducts(diameters, 40.9, ducts=4)
+    assert plan['unplaced'] == []
+    placed = sorted(i for duct in plan['ducts'] for i in duct['cables'])
+    assert placed == list(range(len(diameters)))
+    assert all(duct['compliant'] for duct in plan['ducts'])
+    assert plan['ducts_used'] == len(plan['ducts']) <= 4
+
+    # Too few ducts: what doesn't fit is reported, never overfilled
+    tight = CapacityPlanner.assign_ducts(diameters, 40.9, ducts=1)
+    assert tight['ducts_used'] == 1 and tight['ducts'][0]['compliant']
+    assert len(tight['unplaced']) + len(tight['ducts'][0]['cables']) == len(diameters)
+    # A cable larger than the duct allows is never placed
+    assert CapacityPlanner.assign_ducts([40.0], 40.9, ducts=2)['unplaced'] == [0]
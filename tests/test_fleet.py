@@ -0,0 +1,53 @@
+"""Fleet delta updates must match a full batch recompute."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fiber_toolkit.fleet import LinkFleet
+from fiber_toolkit.link_budget import LinkBudget
+
+
+def _links(n=8):
+    return pd.DataFrame({
+        'link_id': [f'L{i}' for i in range(n)],
+        'tx_power': 0.0,
+        'rx_sensitivity': -28.0,
+        'fiber_length': np.linspace(1, 40, n),
+        'connector_count': 2,
+        'splice_count': 4,
+    })
+
+
+@pytest.mark.parametrize('rows', [[5, 3], ['L5', 'L3']])
+def test_update_unsorted_rows(rows):
+    fleet = LinkFleet(_links())
+    links = fleet.index(rows) if isinstance(rows[0], str) else rows
+    fleet.update(links, fiber_length=[50.0, 1.0])
+    lengths = fleet.columns['fiber_length']
+    assert lengths[5] == 50.0 and lengths[3] == 1.0
+
+    expected = _links()
+    expected.loc[[5, 3], 'fiber_length'] = [50.0, 1.0]
+    np.testing.assert_allclose(fleet.som, LinkBudget.calculate_batch(expected)['som'])
+
+
+def test_update_repeated_row_keeps_last_value():
+    fleet = LinkFleet(_links())
+    fleet.update([2, 6, 2], splice_count=[1, 9, 7])
+    assert fleet.columns['splice_count'][[2, 6]].tolist() == [7, 9]
+
+
+def test_update_rejects_wrong_length():
+    fleet = LinkFleet(_links())
+    with pytest.raises(ValueError):
+        fleet.update([4, 1], fiber_length=[1.0, 2.0, 3.0])
+
+
+def test_frame_reads_back_as_links():
+    fleet = LinkFleet(_links())
+    frame = fleet.to_frame()
+    assert not {'fiber_loss', 'connector_loss', 'splice_loss'} & set(frame.columns)
+    totals = frame[['fiber_loss_total', 'connector_loss_total', 'splice_loss_total']]
+    np.testing.assert_allclose(totals.sum(axis=1), frame['total_loss'])
+    np.testing.assert_allclose(LinkFleet(frame).som, fleet.som)
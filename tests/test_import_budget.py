@@ -0,0 +1,20 @@
+"""CLI start-up must stay within its import budget and skip heavy modules."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks'))
+
+import import_budget  # noqa: E402
+
+
+@pytest.mark.parametrize('name, args, forbidden', import_budget.CASES,
+                         ids=[case[0] for case in import_budget.CASES])
+def test_import_budget(name, args, forbidden):
+    # Each run is a fresh interpreter under -X importtime
+    result = import_budget.check_case(name, args, forbidden,
+                                      import_budget.DEFAULT_BUDGET_MS, repeat=3)
+    assert not result['forbidden'], f"{name} imports {', '.join(result['forbidden'])}"
+    assert result['ms'] <= import_budget.DEFAULT_BUDGET_MS, f"{name}: {result['ms']:.1f} ms"
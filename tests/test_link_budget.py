@@ -0,0 +1,184 @@
+"""Batch link budgets must grade every row the way calculate() grades it."""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fiber_toolkit.link_budget import LinkBudget, run_batch, run_solve
+
+
+def test_batch_matches_scalar():
+    links = pd.DataFrame({
+        'tx_power': [0.0, -3.0, 2.0, 0.0],
+        'rx_sensitivity': [-28.0, -18.0, -24.0, -20.0],
+        'fiber_length': [10.0, 40.0, 0.3, 30.0],
+        'wavelength': [1310, 1550, 850, 1550],
+        'fiber_type': ['SM', 'SM', 'MM', 'SM'],
+        'connector_count': [2, 4, 2, 6],
+        'splice_count': [2, 10, 0, 3],
+    })
+    batch = LinkBudget.calculate_batch(links)
+    for row, result in zip(links.to_dict('records'), batch.to_dict('records')):
+        expected = LinkBudget(**row).calculate()
+        assert result['som'] == pytest.approx(expected['som'])
+        assert result['status'] == expected['status']
+        assert result['status_detail'] == expected['status_detail']
+
+
+def test_nan_som_is_fail():
+    codes = LinkBudget.status_codes(np.array([10.0, np.nan, 1.0, -1.0]))
+    assert codes.tolist() == [LinkBudget.STATUS_EXCELLENT, LinkBudget.STATUS_FAIL,
+                              LinkBudget.STATUS_MARGINAL, LinkBudget.STATUS_FAIL]
+
+    scalar = LinkBudget(tx_power=math.nan, rx_sensitivity=-28, fiber_length=10).calculate()
+    batch = LinkBudget.calculate_batch(tx_power=[math.nan], rx_sensitivity=-28,
+                                       fiber_length=10)
+    assert scalar['status'] == batch['status'][0] == 'FAIL'
+
+
+def test_blank_cells(tmp_path):
+    source = tmp_path / 'links.csv'
+    source.write_text(
+        'link_id,tx_power,rx_sensitivity,length,connectors,splices,fiber_type,wavelength\n'
+        'A,0,-28,10,,2,SM,1310\n'
+        'B,0,-28,10,2,2,,\n'
+        'C,0,,10,2,2,SM,1550\n')
+    output = tmp_path / 'results.csv'
+    run_batch(str(source), str(output))
+    results = pd.read_csv(output).set_index('link_id')
+
+    # Blank counts, fiber type and wavelength take the constructor defaults
+    a = LinkBudget(0, -28, 10, connector_count=0, splice_count=2).calculate()
+    b = LinkBudget(0, -28, 10, connector_count=2, splice_count=2).calculate()
+    assert results.loc['A', 'som'] == pytest.approx(a['som'])
+    assert results.loc['B', 'som'] == pytest.approx(b['som'])
+    # A blank power leaves nothing to grade: FAIL, never PASS
+    assert math.isnan(results.loc['C', 'som'])
+    assert results.loc['C', 'status'] == 'FAIL'
+
+
+def test_monte_carlo_bucketed_losses(monkeypatch):
+    rng = np.random.default_rng(3)
+    links = {
+        'tx_power': 0.0, 'rx_sensitivity': -28.0,
+        'fiber_length': rng.uniform(1, 40, 60),
+        'connector_count': rng.integers(2, 9, 60),
+        'splice_count': rng.integers(0, 12, 60),
+        'connector_loss': rng.uniform(0.2, 0.75, 60),
+        'splice_loss': rng.uniform(0.02, 0.3, 60),
+    }
+    for distribution in LinkBudget.MC_DISTRIBUTIONS:
+        exact = LinkBudget.monte_carlo_batch(draws=20000, distribution=distribution,
+                                             seed=1, **links)
+        monkeypatch.setattr(LinkBudget, 'MC_MAX_LOSS_MIXES', 16)
+        bucketed = LinkBudget.monte_carlo_batch(draws=20000, distribution=distribution,
+                                                seed=1, **links)
+        monkeypatch.undo()
+        # Bucketing keeps each link's mean and only coarsens the spread
+        assert np.abs(bucketed['som_mean'] - exact['som_mean']).max() < 0.03
+        assert np.abs(bucketed['som_std'] / exact['som_std'] - 1).max() < 0.3
+
+
+def _solve_links(n=200, seed=5):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'tx_power': rng.uniform(-5, 5, n),
+        'rx_sensitivity': rng.uniform(-30, -15, n),
+        'fiber_length': rng.uniform(0.1, 60, n),
+        'wavelength': rng.choice([850, 1310, 1550], n),
+        'fiber_type': 'SM',
+        'connector_count': rng.integers(0, 10, n),
+        'splice_count': rng.integers(0, 20, n),
+        'connector_loss': rng.choice([0.0, 0.3, 0.5], n),
+    })
+
+
+@pytest.mark.parametrize('solve', list(LinkBudget.SOLVE_TARGETS))
+@pytest.mark.parametrize('target', [0.0, 3.0, 6.0])
+def test_solve_round_trip(solve, target):
+    links = _solve_links()
+    name, column = LinkBudget.SOLVE_TARGETS[solve]
+    solved = LinkBudget.solve_batch(solve, links, target_som=target)
+    feasible = solved['feasible'].to_numpy()
+    assert np.isnan(solved[name][~feasible]).all()
+
+    check = links[feasible].copy()
+    check[column] = solved[name][feasible]
+    som = LinkBudget.calculate_batch(check)['som']
+    assert (som >= target - 1e-9).all()
+    np.testing.assert_allclose(som, solved['som'][feasible], atol=1e-9)
+    if solve in ('length', 'tx-power'):
+        np.testing.assert_allclose(som, target, atol=1e-9)
+    else:
+        # One more component would miss the target
+        check[column] += 1
+        assert (LinkBudget.calculate_batch(check)['som'] < target).all()
+
+
+def test_solve_exact_fit_and_infeasible():
+    # 0.3 dB of room at 0.1 dB per splice comes out as 2.9999999999999982 splices
+    solved = LinkBudget.solve_batch(
+        'splices', tx_power=[0.0, 0.0, np.nan], rx_sensitivity=-10.0,
+        fiber_length=[0.0, 40.0, 1.0], safety_margin=6.7, splice_loss=0.1,
+        target_som=3.0)
+    assert solved['max_splices'][0] == 3
+    assert solved['som'][0] == pytest.approx(3.0)
+    # Fiber alone misses the target; a blank power can't be solved
+    assert not solved['feasible'][1] and not solved['feasible'][2]
+    assert np.isnan(solved['max_splices'][1:]).all()
+
+
+def test_run_solve_target_column(tmp_path):
+    source = tmp_path / 'links.csv'
+    source.write_text('link_id,tx_power,rx_sensitivity,length,target_som\n'
+                      'A,0,-28,10,\n'
+                      'B,0,-28,10,6\n'
+                      'C,-20,-28,90,\n')
+    output = tmp_path / 'solved.csv'
+    summary = run_solve(str(source), str(output), 'connectors')
+    results = pd.read_csv(output).set_index('link_id')
+    assert summary == {'links': 3, 'infeasible': 1}
+    # Blank target cells take the default (lowest PASS), others their own
+    assert results.loc['A', 'som'] >= LinkBudget.STATUS_THRESHOLDS[1]
+    assert results.loc['B', 'som'] >= 6.0
+    assert results.loc['A', 'max_connectors'] > results.loc['B', 'max_connectors']
+    assert not results.loc['C', 'feasible']
+
+
+def test_batch_output_reads_back_as_input(tmp_path):
+    source = tmp_path / 'links.csv'
+    source.write_text(
+        'link_id,tx_power,rx_sensitivity,fiber_length,connector_count,connector_loss,'
+        'splice_count,splice_loss,fiber_loss\n'
+        'A,0,-28,10,4,0.5,6,0.2,0.3\n')
+    first, second = tmp_path / 'first.csv', tmp_path / 'second.csv'
+    run_batch(str(source), str(first))
+    run_batch(str(first), str(second))
+
+    results = pd.read_csv(second)
+    assert results.loc[0, 'connector_loss'] == 0.5  # the unit loss, not the 2 dB total
+    assert results.loc[0, 'connector_loss_total'] == pytest.approx(2.0)
+    assert results.loc[0, 'splice_loss_total'] == pytest.approx(1.2)
+    assert results.loc[0, 'fiber_loss_total'] == pytest.approx(3.0)
+    pd.testing.assert_frame_equal(results, pd.read_csv(first))
+
+
+@pytest.mark.parametrize('name', ['empty.csv', 'empty.parquet'])
+def test_run_batch_empty_input(tmp_path, name):
+    pytest.importorskip('pyarrow')
+    source = tmp_path / name
+    if name.endswith('.parquet'):
+        columns = ('tx_power', 'rx_sensitivity', 'fiber_length')
+        frame = pd.DataFrame({name: pd.Series([], dtype=float) for name in columns})
+        frame.insert(0, 'link_id', pd.Series([], dtype=str))
+        frame.to_parquet(source)
+    else:
+        source.write_text('')
+    output = tmp_path / 'results.parquet'
+    assert run_batch(str(source), str(output))['links'] == 0
+    results = pd.read_parquet(output)
+    assert results.empty
+    if name.endswith('.parquet'):
+        assert {'link_id', 'som', 'connector_loss_total'} <= set(results.columns)
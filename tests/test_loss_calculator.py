@@ -0,0 +1,53 @@
+"""BOM totals must stream any file, including one with no rows."""
+
+import pandas as pd
+import pytest
+
+from fiber_toolkit.loss_calculator import LossCalculator, run_bom
+
+
+def test_run_bom_matches_single_pass(tmp_path):
+    components = pd.DataFrame({
+        'link_id': ['A', 'A', 'B', 'B', 'B'],
+        'type': ['SC-UPC', 'fusion', 'LC-APC', 'bogus', 'fusion'],
+        'count': [2, 4, 2, 1, 6],
+    })
+    source = tmp_path / 'bom.csv'
+    components.to_csv(source, index=False)
+    merged = run_bom(str(source), chunk_size=2)
+    single = LossCalculator.bom_losses(components)
+    pd.testing.assert_frame_equal(merged['links'], single['links'], check_dtype=False)
+    assert merged['unrecognized'].index.tolist() == [3]
+
+
+@pytest.mark.parametrize('name', ['empty.csv', 'empty.parquet'])
+def test_run_bom_empty_file(tmp_path, name):
+    source = tmp_path / name
+    if name.endswith('.parquet'):
+        pd.DataFrame({'link_id': pd.Series([], dtype=str),
+                      'type': pd.Series([], dtype=str)}).to_parquet(source)
+    else:
+        source.write_text('')
+    output = tmp_path / 'links.csv'
+    merged = run_bom(str(source), str(output))
+    assert merged['rows'] == 0
+    assert merged['links'].empty and merged['unrecognized'].empty
+    assert merged['categories']['total_loss'].sum() == 0
+    assert 'total_loss' in pd.read_csv(output).columns
+
+
+def test_bom_blank_fiber_count():
+    # Connector rows carry counts; fiber rows leave the cell blank
+    components = pd.DataFrame({
+        'link_id': ['A', 'A', 'A', 'B'],
+        'type': ['SC-UPC', 'SM', 'SM', 'fusion'],
+        'count': [2, None, 2, None],
+        'wavelength': [None, 1310, 1550, None],
+        'length': [None, 2.0, 1.0, None],
+    })
+    result = LossCalculator.bom_losses(components)
+    links = result['links']
+    assert links.loc['A', 'fiber_loss'] == pytest.approx(2.0 * 0.35 + 2 * 1.0 * 0.25)
+    assert links.loc['A', 'fiber_count'] == 3
+    # Connectors and splices still need a count
+    assert result['unrecognized']['reason'].tolist() == ['missing count']
@@ -0,0 +1,111 @@
+"""Routing must match brute force, and cached routes must survive edits."""
+
+import random
+
+import pytest
+
+from fiber_toolkit.network import FiberNetwork
+
+
+def _grid(cache_size=256, seed=0):
+    """3x4 grid of panels and closures with random span losses."""
+    rng = random.Random(seed)
+    network = FiberNetwork(cache_size=cache_size)
+    names = [f'N{r}{c}' for r in range(3) for c in range(4)]
+    for i, name in enumerate(names):
+        network.add_node(name, kind='closure' if i % 3 else 'panel',
+                         transit_loss=rng.choice([0.1, 0.3, 0.75]))
+    spans = 0
+    for r in range(3):
+        for c in range(4):
+            for dr, dc in ((0, 1), (1, 0), (1, 1)):
+                if r + dr < 3 and c + dc < 4:
+                    network.add_span(f'S{spans}', f'N{r}{c}', f'N{r + dr}{c + dc}',
+                                     rng.uniform(0.5, 8.0), fiber_loss=0.35)
+                    spans += 1
+    return network, names
+
+
+def _all_paths(network, source, target):
+    """Loss of every loopless path, by depth-first enumeration."""
+    spans = [network.span(span_id) for span_id in network._span_index]
+    losses = []
+
+    def walk(node, seen, loss):
+        if node == target:
+            losses.append(loss)
+            return
+        for span in spans:
+            for a, b in ((span['a'], span['b']), (span['b'], span['a'])):
+                if a == node and b not in seen:
+                    transit = 0.0 if b == target else network._transit[network._node_index[b]]
+                    walk(b, seen | {b}, loss + span['loss'] + transit)
+
+    walk(source, {source}, 0.0)
+    return sorted(losses)
+
+
+def test_shortest_path_by_hand():
+    network = FiberNetwork()
+    network.add_node('A', transit_loss=0.75)
+    network.add_node('C', kind='closure', transit_loss=0.1)
+    network.add_node('P', transit_loss=0.75)
+    network.add_node('B', transit_loss=0.75)
+    network.add_span('direct', 'A', 'B', 10.0, fiber_loss=0.35)  # 3.5 dB
+    network.add_span('a-c', 'A', 'C', 4.0, fiber_loss=0.35)      # 1.4 dB
+    network.add_span('c-b', 'C', 'B', 4.0, fiber_loss=0.35)      # + 0.1 + 1.4
+    network.add_span('a-p', 'A', 'P', 4.0, fiber_loss=0.35)
+    network.add_span('p-b', 'P', 'B', 4.0, fiber_loss=0.35)      # 2.8 + 0.75
+
+    path = network.shortest_path('A', 'B')
+    assert path['nodes'] == ['A', 'C', 'B']
+    assert path['loss'] == pytest.approx(2.9)
+    assert path['transit_loss'] == pytest.approx(0.1)
+    assert path['length'] == pytest.approx(8.0)
+    assert [p['spans'] for p in network.k_shortest_paths('A', 'B', 3)] == [
+        ['a-c', 'c-b'], ['direct'], ['a-p', 'p-b']]
+    network.add_node('island')
+    assert network.shortest_path('A', 'island') is None
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_k_shortest_matches_brute_force(seed):
+    network, names = _grid(seed=seed)
+    expected = _all_paths(network, names[0], names[-1])
+    paths = network.k_shortest_paths(names[0], names[-1], 8)
+    assert [p['loss'] for p in paths] == pytest.approx(expected[:8])
+    for path in paths:
+        assert len(set(path['nodes'])) == len(path['nodes'])
+
+
+def test_cached_routes_match_uncached_after_edits():
+    cached, names = _grid(cache_size=64)
+    reference, _ = _grid(cache_size=0)
+    rng = random.Random(7)
+    added = 0
+    for step in range(150):
+        action = rng.random()
+        span_ids = list(cached._span_index)
+        if action < 0.5:
+            span_id = rng.choice(span_ids)
+            length = rng.uniform(0.1, 12.0)
+            for network in (cached, reference):
+                network.update_span(span_id, length=length)
+        elif action < 0.7 and len(span_ids) > 12:
+            span_id = rng.choice(span_ids)
+            for network in (cached, reference):
+                network.remove_span(span_id)
+        else:
+            a, b = rng.sample(names, 2)
+            length = rng.uniform(0.5, 10.0)
+            for network in (cached, reference):
+                network.add_span(f'X{added}', a, b, length, fiber_loss=0.35)
+            added += 1
+        for _ in range(4):
+            source, target = rng.sample(names, 2)
+            k = rng.choice([1, 3])
+            got = cached.k_shortest_paths(source, target, k)
+            want = reference.k_shortest_paths(source, target, k)
+            assert [p['loss'] for p in got] == pytest.approx([p['loss'] for p in want])
+    info = cached.cache_info()
+    assert info['hits'] > 0 and info['invalidated'] > 0
@@ -0,0 +1,50 @@
+"""Incremental ingest must never lose files to an interrupted run."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks'))
+
+import synthetic  # noqa: E402
+from fiber_toolkit import otdr_ingest  # noqa: E402
+from fiber_toolkit.otdr_ingest import DirectoryIngest  # noqa: E402
+
+
+def _tree(root):
+    for name in ('a', 'b'):
+        synthetic.sor_directory(str(root / name), 2, points=2000,
+                                seed=1 + 10 * (name == 'b'))
+
+
+def test_incremental_poll_skips_ingested_dirs(tmp_path):
+    _tree(tmp_path)
+    ingester = DirectoryIngest(str(tmp_path))
+    counts = next(ingester.run())
+    assert counts['ingested'] == 4 and counts['errors'] == 0
+    assert ingester.pending(full=False) == []
+
+    added = synthetic.sor_directory(str(tmp_path / 'c'), 1, points=2000, seed=99)
+    assert [path for path, _ in ingester.pending(full=False)] == added
+    ingester.close()
+
+
+def test_interrupted_ingest_is_retried(tmp_path, monkeypatch):
+    _tree(tmp_path)
+
+    def crash(self, item):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(otdr_ingest._IngestTask, '__call__', crash)
+        ingester = DirectoryIngest(str(tmp_path))
+        with pytest.raises(KeyboardInterrupt):
+            next(ingester.run())
+        ingester.close()
+
+    ingester = DirectoryIngest(str(tmp_path))
+    assert len(ingester.pending(full=False)) == 4
+    assert ingester.ingest(ingester.pending(full=False))['ingested'] == 4
+    assert ingester.pending(full=False) == []
+    ingester.close()
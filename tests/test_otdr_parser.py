@@ -0,0 +1,99 @@
+"""The .sor parser must read back every field of a synthetic trace."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks'))
+
+import synthetic  # noqa: E402
+from fiber_toolkit.otdr_parser import OTDRParser  # noqa: E402
+from fiber_toolkit.sor_format import FieldReader, SORFormatError  # noqa: E402
+
+POINTS = 2000
+SPACING_KM = 0.005
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / 'trace.sor'
+    path.write_bytes(synthetic.sor_bytes(POINTS, SPACING_KM, event_count=6, fiber_id='F042'))
+    return str(path)
+
+
+def test_headers(trace_file):
+    with OTDRParser(trace_file) as parser:
+        data = parser.parse()
+    assert 'error' not in data
+    assert data['revision'] == 2
+    assert [block['name'] for block in data['blocks']] == [
+        'GenParams', 'SupParams', 'FxdParams', 'KeyEvents', 'DataPts']
+    assert data['general'] == dict(
+        data['general'], cable_id='CABLE-1', fiber_id='F042', fiber_type='G.652',
+        wavelength=1310, location_a='MDF', location_b='IDF-2', cable_code='',
+        operator='bench', comments='synthetic')
+    assert data['supplier']['supplier'] == 'Fiber-Optics-Toolkit'
+    assert data['supplier']['other'] == ''
+    fixed = data['fixed']
+    assert fixed['points'] == [POINTS] and data['trace_points'] == POINTS
+    assert fixed['group_index'] == pytest.approx(synthetic.GROUP_INDEX)
+    assert fixed['sample_spacing_km'] == pytest.approx(SPACING_KM, rel=1e-6)
+
+
+def test_events_and_trace_decode_lazily(trace_file):
+    with OTDRParser(trace_file) as parser:
+        parser.parse()
+        assert parser._events is None and parser._trace is None
+
+        events = parser.events
+        assert len(events) == 8  # start, six connectors/splices, end
+        assert list(events['number']) == list(range(1, 9))
+        assert events['distance'][-1] == pytest.approx(POINTS * SPACING_KM * 0.9, abs=1e-3)
+        assert (events['distance'][1:-1] > 0).all()
+        assert (events['loss'][1:-1] > 0).all()
+        assert parser._trace is None
+
+        trace = parser.trace
+    assert len(trace) == POINTS
+    assert len(parser.distances()) == POINTS  # the decoded trace outlives close()
+
+
+def test_analyze(trace_file):
+    with OTDRParser(trace_file) as parser:
+        parser.parse()
+        analysis = parser.analyze()
+    assert analysis['fiber_length'] == pytest.approx(POINTS * SPACING_KM * 0.9, abs=1e-3)
+    assert analysis['connector_count'] + analysis['splice_count'] == 6
+
+
+def _truncated(tmp_path, trace_file, size):
+    path = tmp_path / 'short.sor'
+    with open(trace_file, 'rb') as f:
+        path.write_bytes(f.read(size))
+    return str(path)
+
+
+def test_truncated_headers(tmp_path, trace_file):
+    with OTDRParser(_truncated(tmp_path, trace_file, 200)) as parser:
+        assert parser.parse()['error'].startswith('Invalid SOR file')
+
+
+def test_truncated_events(tmp_path, trace_file):
+    # Headers are intact; the cut through KeyEvents shows on first decode
+    with OTDRParser(_truncated(tmp_path, trace_file, 500)) as parser:
+        assert 'error' not in parser.parse()
+        with pytest.raises(SORFormatError):
+            parser.events
+        assert parser.analyze()['error'].startswith('Invalid SOR file')
+
+
+@pytest.mark.parametrize('wrap', [bytes, memoryview])
+def test_string_fields(wrap):
+    reader = FieldReader(wrap(b'xx ab \0\0cd\0tail'), start=2)
+    assert reader.string() == 'ab'
+    assert reader.string() == ''
+    assert reader.string() == 'cd'
+    assert reader.string() == 'tail'  # unterminated: runs to the region end
+    assert reader.pos == reader.end + 1
+    assert FieldReader(wrap(b'abc\0'), end=2).string() == 'ab'  # NUL past the region
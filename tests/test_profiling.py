@@ -0,0 +1,122 @@
+"""Profiling must cost nothing when off and report exact totals when on."""
+
+import json
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from fiber_toolkit import profiling
+
+
+@pytest.fixture(autouse=True)
+def _off(monkeypatch):
+    for name in ('FIBER_TOOLKIT_PROFILE', 'FIBER_TOOLKIT_PROFILE_DUMP',
+                 'FIBER_TOOLKIT_PROFILE_OUTPUT'):
+        monkeypatch.delenv(name, raising=False)
+    yield
+    profiling.disable()
+    profiling.reset()
+
+
+@profiling.timed('square')
+def _square(x):
+    return x * x
+
+
+def test_disabled_records_nothing():
+    assert profiling.stage('a') is profiling.stage('b')
+    with profiling.stage('a'):
+        profiling.count('items', 5)
+    assert _square(3) == 9
+    assert profiling.snapshot() == {'stages': {}, 'counters': {}}
+
+
+def test_timed_stage_and_count():
+    profiling.enable()
+    assert [_square(x) for x in range(3)] == [0, 1, 4]
+    with profiling.stage('outer'):
+        with profiling.stage('inner'):
+            profiling.count('items', 2)
+        profiling.count('items')
+    profiling.count('lookup.hits', 3)
+    profiling.count('lookup.misses')
+
+    data = profiling.report('demo')
+    assert {name: totals['calls'] for name, totals in data['stages'].items()} == {
+        'inner': 1, 'outer': 1, 'square': 3}
+    assert data['stages']['outer']['wall_s'] >= data['stages']['inner']['wall_s']
+    assert data['counters'] == {'items': 3, 'lookup.hits': 3, 'lookup.misses': 1}
+    assert data['cache_hit_rate']['lookup'] == 0.75  # registered caches may report too
+
+
+def test_merge_adds_worker_totals():
+    profiling.enable()
+    _square(2)
+    profiling.count('items', 1)
+    worker = {'stages': {'square': [2, 0.5, 0.25], 'parse': [1, 1.0, 1.0]},
+              'counters': {'items': 4, 'bytes': 100}}
+    profiling.merge(worker)
+    totals = profiling.snapshot()
+    assert totals['stages']['square'][0] == 3
+    assert totals['stages']['square'][1] >= 0.5
+    assert totals['stages']['parse'] == [1, 1.0, 1.0]
+    assert totals['counters'] == {'items': 5, 'bytes': 100}
+
+
+def test_prometheus_text():
+    data = {
+        'command': 'fiber-otdr',
+        'wall_s': 2.0,
+        'cpu_s': 1.5,
+        'stages': {'otdr.parse': {'calls': 4, 'wall_s': 0.5, 'cpu_s': 0.25}},
+        'counters': {'otdr.files': 4, 'path "a"\\b': 1},
+        'cache_hit_rate': {'result_cache': 0.5, 'idle': None},
+    }
+    lines = profiling.prometheus_text(data).splitlines()
+    samples = [line for line in lines if not line.startswith('#')]
+    assert samples == [
+        'fiber_toolkit_run_wall_seconds{command="fiber-otdr"} 2.0',
+        'fiber_toolkit_run_cpu_seconds{command="fiber-otdr"} 1.5',
+        'fiber_toolkit_stage_calls_total{command="fiber-otdr",stage="otdr.parse"} 4.0',
+        'fiber_toolkit_stage_wall_seconds_total{command="fiber-otdr",stage="otdr.parse"} 0.5',
+        'fiber_toolkit_stage_cpu_seconds_total{command="fiber-otdr",stage="otdr.parse"} 0.25',
+        'fiber_toolkit_events_total{command="fiber-otdr",counter="otdr.files"} 4.0',
+        'fiber_toolkit_events_total{command="fiber-otdr",counter="path \\"a\\"\\\\b"} 1.0',
+        'fiber_toolkit_cache_hit_ratio{command="fiber-otdr",cache="result_cache"} 0.5',
+    ]
+    assert '# TYPE fiber_toolkit_stage_calls_total counter' in lines
+    assert '# TYPE fiber_toolkit_cache_hit_ratio gauge' in lines
+
+
+@click.command('demo')
+@profiling.profile_option
+def _command():
+    with profiling.stage('work'):
+        profiling.count('items', 7)
+    click.echo('done')
+
+
+@pytest.mark.parametrize('args, expected', [
+    ([], None),
+    (['--profile'], 'json'),
+    (['--profile-format', 'prometheus'], 'prometheus'),
+    (['--profile', '--profile-format', 'prometheus'], 'prometheus'),
+])
+def test_profile_option(tmp_path, monkeypatch, args, expected):
+    output = tmp_path / 'profile.txt'
+    monkeypatch.setenv('FIBER_TOOLKIT_PROFILE_OUTPUT', str(output))
+    result = CliRunner().invoke(_command, args)
+    assert result.exit_code == 0, result.output
+    assert result.output == 'done\n'
+    assert not profiling.enabled()
+
+    if expected is None:
+        assert not output.exists()
+    elif expected == 'json':
+        data = json.loads(output.read_text())
+        assert data['stages']['work']['calls'] == 1
+        assert data['counters'] == {'items': 7}
+    else:
+        text = output.read_text()
+        assert 'fiber_toolkit_events_total{command="demo",counter="items"} 7.0' in text
@@ -0,0 +1,51 @@
+"""Results added to a FiberTestReport must survive the report being closed."""
+
+import pytest
+
+from fiber_toolkit.link_budget import LinkBudget
+from fiber_toolkit.report_generator import FiberTestReport
+from fiber_toolkit.result_store import SQLiteResultStore
+
+
+def test_close_commits_sqlite_store(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    result = LinkBudget(0, -28, 10, connector_count=2).calculate()
+    with FiberTestReport('Campus', store=SQLiteResultStore(path)) as report:
+        for _ in range(10):
+            report.add_link_budget(result)
+
+    assert len(SQLiteResultStore(path)) == 10
+
+
+def test_test_results_keeps_list_semantics(tmp_path):
+    report = FiberTestReport('Campus')
+    report.test_results.append({'type': 'link_budget', 'section': None, 'data': {}})
+    assert len(report.store) == 1
+
+    stored = FiberTestReport('Campus', store=SQLiteResultStore(str(tmp_path / 'r.sqlite')))
+    with pytest.raises(AttributeError):
+        stored.test_results.append({})
+    stored.close()
+
+
+def test_streamed_results_reach_persistent_store(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    result = LinkBudget(0, -28, 10, connector_count=2).calculate()
+    report = FiberTestReport('Campus', store=SQLiteResultStore(path))
+    report.add_link_budget(result, section='B01')
+    report.open(str(tmp_path / 'first.pdf'))
+    for _ in range(3):
+        report.add_link_budget(result, section='B02')
+    assert report.close()['pages'] >= 1
+
+    resumed = FiberTestReport.resume(SQLiteResultStore(path))
+    assert len(resumed.test_results) == 4
+    resumed.close()
+
+
+def test_streamed_results_not_kept_in_memory(tmp_path):
+    result = LinkBudget(0, -28, 10).calculate()
+    report = FiberTestReport('Campus').open(str(tmp_path / 'report.pdf'))
+    report.add_link_budget(result)
+    report.close()
+    assert report.test_results == []
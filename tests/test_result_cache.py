@@ -0,0 +1,111 @@
+"""The result cache must serve identical results and never go stale."""
+
+import os
+import sys
+
+from click.testing import CliRunner
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks'))
+
+import synthetic  # noqa: E402
+from fiber_toolkit import otdr_parser, result_cache  # noqa: E402
+from fiber_toolkit.otdr_parser import PARSER_VERSION, analyze_file  # noqa: E402
+from fiber_toolkit.result_cache import ResultCache, content_hash  # noqa: E402
+
+
+def _trace(directory, name='trace.sor', seed=1):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(synthetic.sor_bytes(2000, seed=seed))
+    return path
+
+
+def _accessed(cache, key):
+    return cache._connect().execute(
+        'SELECT accessed FROM entries WHERE key = ?', (key,)).fetchone()[0]
+
+
+def test_put_get(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.get('k') is None
+    cache.put('k', {'loss': 1.5, 'events': [1, 2]})
+    assert cache.get('k') == {'loss': 1.5, 'events': [1, 2]}
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_hit_matches_parse_and_follows_content(tmp_path):
+    path = _trace(str(tmp_path))
+    cache = ResultCache(str(tmp_path / 'cache'))
+    fresh = analyze_file(path, cache=cache)
+    assert cache.stats()['entries'] == 1 and cache.misses == 1
+
+    copy = _trace(str(tmp_path), 'renamed.sor')
+    hit = analyze_file(copy, cache=cache)
+    assert cache.hits == 1
+    assert hit['filename'] == copy
+    assert dict(hit, filename=path) == fresh
+
+    # Other content, mode or parser version are different keys
+    analyze_file(_trace(str(tmp_path), 'other.sor', seed=2), cache=cache)
+    analyze_file(path, detect=True, cache=cache)
+    assert cache.hits == 1 and cache.stats()['entries'] == 3
+    digest = content_hash(path)
+    assert cache.get(cache.make_key(digest, PARSER_VERSION, 'keyevents')) is not None
+    assert cache.get(cache.make_key(digest, PARSER_VERSION + 'x', 'keyevents')) is None
+
+
+def test_headers_only_skips_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    analyze_file(_trace(str(tmp_path)), headers_only=True, cache=cache)
+    assert cache.stats()['entries'] == 0 and cache.misses == 0
+
+
+def test_hits_touch_only_stale_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    cache = ResultCache(str(tmp_path))
+    cache.put('k', {})
+
+    now[0] += result_cache.TOUCH_SECONDS / 2
+    cache.get('k')
+    assert _accessed(cache, 'k') == 1000.0
+
+    now[0] += result_cache.TOUCH_SECONDS
+    cache.get('k')
+    assert _accessed(cache, 'k') == now[0]
+
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'time', lambda: now[0])
+    cache = ResultCache(str(tmp_path), max_bytes=30)
+    for key in 'abc':
+        now[0] += result_cache.TOUCH_SECONDS
+        cache.put(key, {'v': 'x'})  # 10 bytes each
+
+    now[0] += result_cache.TOUCH_SECONDS
+    cache.get('a')
+    cache.put('d', {'v': 'x'})
+    assert cache.evict() == 1
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+
+
+def test_single_file_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.setenv('FIBER_TOOLKIT_CACHE', str(tmp_path / 'default'))
+    path = _trace(str(tmp_path))
+    runner = CliRunner()
+
+    result = runner.invoke(otdr_parser.main, ['--file', path, '--analyze', '--format', 'json'])
+    assert result.exit_code == 0, result.output
+    assert not os.path.exists(tmp_path / 'default')
+
+    explicit = str(tmp_path / 'explicit')
+    result = runner.invoke(otdr_parser.main, ['--file', path, '--analyze', '--format', 'json',
+                                              '--cache-dir', explicit])
+    assert result.exit_code == 0, result.output
+    assert ResultCache(explicit).stats()['entries'] == 1
+
+    result = runner.invoke(otdr_parser.main, ['--dir', str(tmp_path), '--format', 'json'])
+    assert result.exit_code == 0, result.output
+    assert os.path.exists(tmp_path / 'default' / result_cache.CACHE_FILE)
@@ -0,0 +1,26 @@
+"""Spectral curves must hit their anchors and stay physical between them."""
+
+import pytest
+
+from fiber_toolkit import spectral
+from fiber_toolkit.link_budget import LinkBudget
+
+
+@pytest.mark.parametrize('fiber_type', ['SM', 'MM'])
+def test_anchors_exact(fiber_type):
+    for wavelength, value in spectral.FIBER_MODELS[fiber_type]['anchors']:
+        assert spectral.attenuation(fiber_type, wavelength) == value
+
+
+def test_sm_l_band():
+    # The IR tail must not lift the L band above the C band
+    wavelengths, values = spectral.curve('SM')
+    l_band = values[wavelengths >= 1550]
+    assert (l_band[1:] <= l_band[:-1]).all()
+    assert 0.23 <= spectral.attenuation('SM', 1625) <= 0.25
+    assert spectral.model_coefficients('SM')['infrared'] > 0
+
+
+def test_unknown_type_uses_sm_curve():
+    budget = LinkBudget(0.0, -28.0, 10.0, wavelength=1550, fiber_type='G.655')
+    assert budget.fiber_loss == spectral.attenuation('SM', 1550) == 0.25
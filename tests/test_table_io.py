@@ -0,0 +1,62 @@
+"""Chunked table I/O must round-trip whole files and chunks of mixed dtypes."""
+
+import pandas as pd
+import pytest
+
+from fiber_toolkit.table_io import ChunkWriter, iter_chunks, read_table, resolve_columns
+
+pytest.importorskip('pyarrow')
+
+
+def test_parquet_chunks_keep_first_schema(tmp_path):
+    path = tmp_path / 'out.parquet'
+    with ChunkWriter(str(path)) as writer:
+        writer.write(pd.DataFrame({'count': [1, 2], 'note': pd.Series([None, None], dtype=object)}))
+        writer.write(pd.DataFrame({'count': [3.0, None], 'note': ['spliced', None]}))
+    result = pd.read_parquet(path)
+    assert result['count'].tolist()[:3] == [1, 2, 3]
+    assert result['note'].tolist()[2] == 'spliced'
+
+
+def test_parquet_chunk_that_does_not_fit(tmp_path):
+    with pytest.raises(ValueError, match="count"):
+        with ChunkWriter(str(tmp_path / 'out.parquet')) as writer:
+            writer.write(pd.DataFrame({'count': [1, 2]}))
+            writer.write(pd.DataFrame({'count': [2.5]}))
+
+
+def test_read_table_joins_chunks(tmp_path):
+    path = tmp_path / 'nodes.csv'
+    path.write_text('node,parent\n' + ''.join(f'N{i},N{i - 1}\n' for i in range(7)))
+    frame = read_table(str(path), chunk_size=3)
+    assert frame['node'].tolist() == [f'N{i}' for i in range(7)]
+    assert frame.index.tolist() == list(range(7))
+
+    empty = tmp_path / 'empty.csv'
+    empty.write_text('')
+    assert read_table(str(empty)).empty
+
+
+def test_resolve_columns_prefers_first_alias():
+    frame = pd.DataFrame({'name': ['A'], 'building': ['B'], 'distance': [1.0]})
+    found = resolve_columns(frame, {'node': ('node', 'name', 'building'),
+                                    'length': ('length', 'distance'),
+                                    'strands': ('strands',)})
+    assert sorted(found) == ['length', 'node']
+    assert found['node'].tolist() == ['A']
+
+
+def test_empty_parquet_keeps_columns(tmp_path):
+    source = tmp_path / 'links.parquet'
+    pd.DataFrame({'tx_power': pd.Series([], dtype=float),
+                  'fiber_length': pd.Series([], dtype=float)}).to_parquet(source)
+    chunks = list(iter_chunks(str(source)))
+    assert len(chunks) == 1 and chunks[0].empty
+    assert chunks[0].columns.tolist() == ['tx_power', 'fiber_length']
+
+
+def test_unwritten_parquet_is_created(tmp_path):
+    path = tmp_path / 'out.parquet'
+    with ChunkWriter(str(path)):
+        pass
+    assert pd.read_parquet(path).empty
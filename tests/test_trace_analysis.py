@@ -0,0 +1,50 @@
+"""Events detected from synthetic traces must agree with their KeyEvents."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks'))
+
+import synthetic  # noqa: E402
+
+from fiber_toolkit.otdr_parser import OTDRParser  # noqa: E402
+
+EVENT_TYPES = (1, 2)  # Connector, Splice
+
+
+def _events(path):
+    with OTDRParser(str(path)) as parser:
+        parser.parse()
+        key = [(float(e['distance']), float(e['loss'])) for e in parser.events
+               if e['type'] in EVENT_TYPES]
+        detected = [(float(e['distance']), float(e['loss'])) for e in parser.detect_events()
+                    if e['type'] in EVENT_TYPES]
+    return key, detected
+
+
+@pytest.mark.parametrize('seed', [5, 25, 40])
+def test_splice_before_connector(tmp_path, seed):
+    # Each of these traces has a splice within a few hundred metres of a
+    # reflective connector, whose spike used to bend the splice's fits
+    path = tmp_path / 'trace.sor'
+    path.write_bytes(synthetic.sor_bytes(seed=seed))
+    key, detected = _events(path)
+
+    assert all(loss > 0 for _, loss in detected)
+    for distance, loss in detected:
+        assert min(abs(distance - k) for k, _ in key) < 0.1
+    for distance, loss in key:
+        assert min(abs(distance - d) for d, _ in detected) < 0.2
+
+
+def test_isolated_event_losses(tmp_path):
+    path = tmp_path / 'trace.sor'
+    path.write_bytes(synthetic.sor_bytes(seed=1))
+    key, detected = _events(path)
+    for distance, loss in key:
+        if all(abs(distance - other) > 0.5 for other, _ in key if other != distance):
+            match = min(detected, key=lambda d: abs(d[0] - distance))
+            assert match[0] == pytest.approx(distance, abs=0.05)
+            assert match[1] == pytest.approx(loss, abs=0.05)
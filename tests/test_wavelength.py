@@ -0,0 +1,47 @@
+"""Dispersion APIs must refuse fiber types they have no model for."""
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from fiber_toolkit.wavelength import WavelengthCalculator, main, run_sweep
+
+
+def test_unknown_fiber_type_raises():
+    with pytest.raises(ValueError, match='NZ-DSF'):
+        WavelengthCalculator.calculate_dispersion(np.array([1550.0]), 10, 'NZ-DSF')
+    with pytest.raises(ValueError, match='G655'):
+        WavelengthCalculator.dispersion_reach(
+            bit_rate=10, spectral_width=0.1, wavelength=[1550] * 3,
+            fiber_type=['SM', 'G655', 'mm-om3'])
+    with pytest.raises(ValueError, match='NZ-DSF'):
+        WavelengthCalculator.channel_sweep(
+            tx_power=0, rx_sensitivity=-28, fiber_length=[10, 20],
+            fiber_type=['SM', 'NZ-DSF'])
+
+
+def test_blank_fiber_type_is_sm():
+    reach = WavelengthCalculator.dispersion_reach(
+        bit_rate=1.25, spectral_width=3, wavelength=[1550] * 3,
+        fiber_type=['SM', None, ''])
+    coefficient = reach['dispersion_coefficient']
+    assert coefficient[1] == coefficient[2] == coefficient[0]
+
+
+@pytest.mark.parametrize('args', [
+    ['--dispersion', '--wavelength', '1550', '--length', '10'],
+    ['--sweep', 'cwdm', '--tx-power', '0', '--rx-sensitivity', '-28', '--length', '10'],
+])
+def test_cli_rejects_unknown_fiber_type(args):
+    result = CliRunner().invoke(main, args + ['--fiber-type', 'DSF'])
+    assert result.exit_code != 0
+    assert 'Unknown fiber type' in result.output
+
+
+def test_sweep_header_only_file(tmp_path):
+    source = tmp_path / 'links.csv'
+    source.write_text('link_id,tx_power,rx_sensitivity,fiber_length\n')
+    output = tmp_path / 'sweep.csv'
+    summary = run_sweep(str(source), str(output))
+    assert summary['links'] == 0
+    assert 'worst_som' in output.read_text()